@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import DailyDonationStats, RollupCursor
+
+
+@admin.register(DailyDonationStats)
+class DailyDonationStatsAdmin(admin.ModelAdmin):
+    list_display = ("day", "created", "claimed", "completed", "cancelled", "expired")
+    date_hierarchy = "day"
+
+
+@admin.register(RollupCursor)
+class RollupCursorAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_event_id", "last_event_at", "updated_at")
@@ -0,0 +1,199 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as day_start, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from analytics.rollups import get_stats, reset_rollups, update_rollups
+from donations.models import Donation, DonationEvent
+from users.models import User
+
+# outcome -> (weight, statuses the donation went through after "available")
+OUTCOMES = {
+    "available": (10, []),
+    "claimed": (5, ["claimed"]),
+    "picked_up": (3, ["claimed", "picked_up"]),
+    "completed": (60, ["claimed", "picked_up", "completed"]),
+    "cancelled": (2, ["cancelled"]),
+    "expired": (20, ["expired"]),
+}
+CHUNK = 20000
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create keep the seeded created_at/updated_at values.
+    """
+    fields = [field for model in models for field in model._meta.fields if getattr(field, "auto_now_add", False) or getattr(field, "auto_now", False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed donations with their event history, build the analytics "
+        "rollups, then time /api/stats/ reads from the rollups against the "
+        "same report computed with live GROUP BYs over donations and events. "
+        "Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--donations", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--range-days", type=int, default=30, help="Days covered by the timed report")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        end = timezone.localdate()
+        start = end - timedelta(days=options["range_days"] - 1)
+        with transaction.atomic():
+            reset_rollups()
+            started = time.perf_counter()
+            events = self.seed(options["donations"], options["days"])
+            self.stdout.write(f"Seeded {options['donations']} donations, {events} events in {time.perf_counter() - started:.0f} s")
+
+            started = time.perf_counter()
+            update_rollups(batch_size=10000, lag_seconds=0)
+            self.stdout.write(f"Built rollups in {time.perf_counter() - started:.1f} s")
+
+            rollup, rollup_times = self.measure(lambda: get_stats(start, end), options["repeat"])
+            live, live_times = self.measure(lambda: self.live_stats(start, end), options["repeat"])
+            mismatches = self.compare(rollup, live)
+            transaction.set_rollback(True)
+
+        for name, times in (("rollups", rollup_times), ("live", live_times)):
+            self.stdout.write(
+                f"{name:>8}: median {statistics.median(times) * 1000:.1f} ms, "
+                f"max {max(times) * 1000:.1f} ms over {len(times)} reads"
+            )
+        if mismatches:
+            raise CommandError(f"Rollups disagree with live aggregates: {', '.join(mismatches)}")
+        self.stdout.write(self.style.SUCCESS("Rollups match the live aggregates"))
+
+    def measure(self, read, repeat):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = read()
+            times.append(time.perf_counter() - started)
+        return result, times
+
+    def seed(self, count, days):
+        rng = random.Random(0)
+        stamp = time.time_ns()
+        users = User.objects.bulk_create([
+            User(username=f"stats-{kind}-{stamp}-{i}", email=f"stats-{kind}-{stamp}-{i}@example.com", user_type=kind)
+            for kind, n in (("donor", 500), ("ngo", 100))
+            for i in range(n)
+        ])
+        donors = [user for user in users if user.user_type == "donor"]
+        ngos = [user for user in users if user.user_type == "ngo"]
+        outcomes = list(OUTCOMES)
+        weights = [weight for weight, _ in OUTCOMES.values()]
+        now = timezone.now()
+        # oldest first, so event ids follow time as they do in production
+        created_times = sorted((now - timedelta(days=rng.random() * days) for _ in range(count)))
+        event_count = 0
+
+        with explicit_timestamps(Donation, DonationEvent):
+            for offset in range(0, count, CHUNK):
+                size = min(CHUNK, count - offset)
+                donations, histories = [], []
+                for created_at, outcome in zip(created_times[offset:offset + size], rng.choices(outcomes, weights=weights, k=size)):
+                    ngo = rng.choice(ngos) if OUTCOMES[outcome][1][:1] == ["claimed"] else None
+                    donations.append(Donation(
+                        donor=rng.choice(donors), ngo=ngo, title="stats donation", status=outcome,
+                        pickup_time=created_at, created_at=created_at, updated_at=created_at,
+                    ))
+                    histories.append(OUTCOMES[outcome][1])
+                donations = Donation.objects.bulk_create(donations, batch_size=2000)
+
+                events = []
+                for donation, history in zip(donations, histories):
+                    at = donation.created_at
+                    events.append(DonationEvent(donation_id=donation.pk, event_type="created", to_status="available", created_at=at))
+                    previous = "available"
+                    for to_status in history:
+                        at = min(at + timedelta(minutes=rng.expovariate(1 / 45)), now - timedelta(seconds=1))
+                        actor = donation.ngo if to_status in ("claimed", "picked_up", "completed") else None
+                        events.append(DonationEvent(
+                            donation_id=donation.pk, event_type="status_changed", from_status=previous,
+                            to_status=to_status, actor=actor, created_at=at,
+                        ))
+                        previous = to_status
+                events.sort(key=lambda event: event.created_at)
+                # the seeded history was never relayed, keep it away from the outbox
+                for event in events:
+                    event.published_at = event.created_at
+                DonationEvent.objects.bulk_create(events, batch_size=5000)
+                event_count += len(events)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return event_count
+
+    def live_stats(self, start, end):
+        """
+        The same report as get_stats(), aggregated from donations and events.
+        """
+        tz = timezone.get_current_timezone()
+        span = (
+            timezone.make_aware(datetime.combine(start, day_start.min), tz),
+            timezone.make_aware(datetime.combine(end, day_start.max), tz),
+        )
+        events = DonationEvent.objects.filter(created_at__range=span).annotate(day=TruncDate("created_at"))
+
+        days = {}
+        for row in events.values("day", "event_type", "to_status").annotate(n=Count("id")).order_by():
+            key = "created" if row["event_type"] == "created" else row["to_status"]
+            days.setdefault(row["day"], {})[key] = row["n"]
+        latency = (
+            events.filter(to_status="claimed")
+            .values("day").annotate(latency=Avg(F("created_at") - F("donation__created_at"))).order_by()
+        )
+        for row in latency:
+            days.setdefault(row["day"], {})["avg_claim_latency"] = row["latency"]
+
+        top_donors = list(
+            events.filter(event_type="created")
+            .values("donation__donor_id").annotate(donations=Count("id"))
+            .order_by("-donations", "donation__donor_id")[:10]
+        )
+        top_ngos = list(
+            events.filter(to_status__in=["claimed", "completed"])
+            .values("actor_id")
+            .annotate(
+                claimed=Count("id", filter=Q(to_status="claimed")),
+                completed=Count("id", filter=Q(to_status="completed")),
+            )
+            .order_by("-completed", "-claimed", "actor_id")[:10]
+        )
+        return {"days": days, "top_donors": top_donors, "top_ngos": top_ngos}
+
+    def compare(self, rollup, live):
+        mismatches = []
+        for row in rollup["days"]:
+            counts = live["days"].get(row["day"], {})
+            for name in ("created", "claimed", "picked_up", "completed", "cancelled", "expired"):
+                if row[name] != counts.get(name, 0):
+                    mismatches.append(f"{row['day']} {name}")
+        if sum(row["created"] for row in rollup["days"]) != sum(c.get("created", 0) for c in live["days"].values()):
+            mismatches.append("created total")
+        if [row["donations"] for row in rollup["top_donors"]] != [row["donations"] for row in live["top_donors"]]:
+            mismatches.append("top donors")
+        if [(row["claimed"], row["completed"]) for row in rollup["top_ngos"]] != [(row["claimed"], row["completed"]) for row in live["top_ngos"]]:
+            mismatches.append("top NGOs")
+        return mismatches
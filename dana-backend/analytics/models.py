@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import models
+
+
+class DailyDonationStats(models.Model):
+    """
+    Donation lifecycle counts per day (local date of the event), rolled up
+    from the DonationEvent outbox by analytics.rollups.
+    """
+    day = models.DateField(unique=True)
+    created = models.IntegerField(default=0)
+    claimed = models.IntegerField(default=0)
+    picked_up = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    expired = models.IntegerField(default=0)
+    # created -> claimed, over the claims of the day
+    claim_latency_seconds = models.FloatField(default=0)
+    claim_latency_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.created} created, {self.completed} completed"
+
+
+class DailyUserStats(models.Model):
+    """
+    Per donor / NGO counts per day, behind the top donors and NGOs lists.
+    Donors count donations posted, NGOs count claims and completions.
+    """
+    ROLE_CHOICES = (
+        ("donor", "Donor"),
+        ("ngo", "NGO"),
+    )
+    day = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    donations = models.IntegerField(default=0)
+    claimed = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "user", "role"], name="dailyuserstats_day_user_role_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["role", "day"], name="dailyuserstats_role_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.role} {self.user_id}"
+
+
+class RollupCursor(models.Model):
+    """
+    Last DonationEvent id folded into the rollups. Advanced in the same
+    transaction as the counts, so every event is counted exactly once.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} at event {self.last_event_id}"
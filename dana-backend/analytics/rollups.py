@@ -0,0 +1,191 @@
+import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from donations.models import Donation, DonationEvent
+from .models import DailyDonationStats, DailyUserStats, RollupCursor
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = "daily"
+STATUS_COUNTERS = ("claimed", "picked_up", "completed", "cancelled", "expired")
+DAY_FIELDS = ("created",) + STATUS_COUNTERS + ("claim_latency_seconds", "claim_latency_count")
+USER_FIELDS = ("donations", "claimed", "completed")
+EVENT_FIELDS = ("id", "event_type", "to_status", "created_at", "actor_id", "donation_id")
+NO_DONATION = {"created_at": None, "donor_id": None, "ngo_id": None}
+
+
+def fold_events(events, donations):
+    """
+    Count a batch of DonationEvent rows (dicts of EVENT_FIELDS) into
+    per-day and per-(day, user, role) deltas. `donations` maps ids to
+    created_at/donor_id/ngo_id; events outlive deleted donations, which
+    still count per day.
+    """
+    days = defaultdict(Counter)
+    users = defaultdict(Counter)
+    for event in events:
+        day = timezone.localdate(event["created_at"])
+        donation = donations.get(event["donation_id"], NO_DONATION)
+        if event["event_type"] == "created":
+            days[day]["created"] += 1
+            if donation["donor_id"]:
+                users[(day, donation["donor_id"], "donor")]["donations"] += 1
+            continue
+
+        to_status = event["to_status"]
+        if to_status not in STATUS_COUNTERS:
+            continue
+        days[day][to_status] += 1
+        if to_status == "claimed":
+            if donation["created_at"]:
+                latency = (event["created_at"] - donation["created_at"]).total_seconds()
+                days[day]["claim_latency_seconds"] += max(latency, 0)
+                days[day]["claim_latency_count"] += 1
+            ngo_id = event["actor_id"] or donation["ngo_id"]
+        elif to_status == "completed":
+            ngo_id = donation["ngo_id"] or event["actor_id"]
+        else:
+            continue
+        if ngo_id:
+            users[(day, ngo_id, "ngo")][to_status] += 1
+    return days, users
+
+
+def apply_counts(model, key_fields, fields, deltas):
+    """
+    Add `deltas` ({key tuple: Counter}) to the rollup rows of `model`: one
+    read, one bulk_update and one bulk_create per batch. Only the rollup job
+    writes these tables and it holds the cursor lock, so plain
+    read-modify-write is safe.
+    """
+    if not deltas:
+        return
+    lookup = {f"{name}__in": {key[index] for key in deltas} for index, name in enumerate(key_fields)}
+    existing = {
+        tuple(getattr(row, name) for name in key_fields): row
+        for row in model.objects.filter(**lookup)
+    }
+    to_update, to_create = [], []
+    for key, counts in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            row = model(**dict(zip(key_fields, key)))
+            to_create.append(row)
+        else:
+            to_update.append(row)
+        for name, value in counts.items():
+            setattr(row, name, getattr(row, name) + value)
+    if to_update:
+        model.objects.bulk_update(to_update, fields, batch_size=1000)
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=1000)
+
+
+def update_rollups(batch_size=None, lag_seconds=None):
+    """
+    Fold DonationEvent rows past the cursor into the daily rollups, in
+    batches. Events younger than ANALYTICS_ROLLUP_LAG_SECONDS are left for
+    the next run: ids are handed out before commit, so a fresher one may
+    still be missing a lower id that commits later.
+    """
+    batch_size = batch_size or settings.ANALYTICS_ROLLUP_BATCH_SIZE
+    if lag_seconds is None:
+        lag_seconds = settings.ANALYTICS_ROLLUP_LAG_SECONDS
+    RollupCursor.objects.get_or_create(name=CURSOR_NAME)
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            cursor = RollupCursor.objects.select_for_update().get(name=CURSOR_NAME)
+            horizon = timezone.now() - timedelta(seconds=lag_seconds)
+            events = list(
+                DonationEvent.objects.filter(id__gt=cursor.last_event_id)
+                .order_by("id").values(*EVENT_FIELDS)[:batch_size]
+            )
+            fetched = len(events)
+            for index, event in enumerate(events):
+                if event["created_at"] > horizon:
+                    events = events[:index]
+                    break
+            if not events:
+                break
+
+            donations = {
+                row["id"]: row
+                for row in Donation.objects.filter(pk__in={event["donation_id"] for event in events})
+                .values("id", "created_at", "donor_id", "ngo_id")
+            }
+            days, users = fold_events(events, donations)
+            apply_counts(DailyDonationStats, ("day",), DAY_FIELDS, {(day,): counts for day, counts in days.items()})
+            apply_counts(DailyUserStats, ("day", "user_id", "role"), USER_FIELDS, users)
+            cursor.last_event_id = events[-1]["id"]
+            cursor.last_event_at = events[-1]["created_at"]
+            cursor.save(update_fields=["last_event_id", "last_event_at", "updated_at"])
+        total += len(events)
+        if len(events) < fetched or fetched < batch_size:
+            break
+
+    if total:
+        logger.info(f"Rolled up {total} donation events")
+    return total
+
+
+def reset_rollups():
+    """
+    Drop the rollups and rewind the cursor; the next update_rollups()
+    rebuilds them from the whole event history.
+    """
+    with transaction.atomic():
+        DailyDonationStats.objects.all().delete()
+        DailyUserStats.objects.all().delete()
+        RollupCursor.objects.filter(name=CURSOR_NAME).update(last_event_id=0, last_event_at=None)
+
+
+def get_stats(start, end, top=10):
+    """
+    Report for the days start..end (inclusive), read from the rollups only.
+    """
+    days = list(
+        DailyDonationStats.objects.filter(day__range=(start, end))
+        .order_by("day").values("day", *DAY_FIELDS)
+    )
+    totals = {name: sum(row[name] for row in days) for name in DAY_FIELDS}
+    for row in days + [totals]:
+        latency_count = row.pop("claim_latency_count")
+        latency_seconds = row.pop("claim_latency_seconds")
+        row["avg_claim_latency_seconds"] = round(latency_seconds / latency_count, 1) if latency_count else None
+    finished = totals["completed"] + totals["cancelled"] + totals["expired"]
+    totals["completion_rate"] = round(totals["completed"] / finished, 4) if finished else None
+
+    users = DailyUserStats.objects.filter(day__range=(start, end))
+    top_donors = list(
+        users.filter(role="donor")
+        .values("user_id", "user__username")
+        .annotate(donations=Sum("donations"))
+        .order_by("-donations", "user_id")[:top]
+    )
+    top_ngos = list(
+        users.filter(role="ngo")
+        .values("user_id", "user__username")
+        .annotate(claimed=Sum("claimed"), completed=Sum("completed"))
+        .order_by("-completed", "-claimed", "user_id")[:top]
+    )
+    for row in top_donors + top_ngos:
+        row["username"] = row.pop("user__username")
+
+    cursor = RollupCursor.objects.filter(name=CURSOR_NAME).first()
+    return {
+        "from": start,
+        "to": end,
+        "as_of": cursor.last_event_at if cursor else None,
+        "totals": totals,
+        "days": days,
+        "top_donors": top_donors,
+        "top_ngos": top_ngos,
+    }
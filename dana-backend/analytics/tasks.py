@@ -0,0 +1,11 @@
+from celery import shared_task
+
+from .rollups import update_rollups
+
+
+@shared_task
+def update_analytics_rollups():
+    """
+    Fold new donation events into the daily stats behind /api/stats/.
+    """
+    return update_rollups()
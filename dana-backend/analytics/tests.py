@@ -0,0 +1,86 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from dana.testing import LOCMEM_CACHES
+from donations.models import Donation
+from donations.tasks import relay_donation_events
+from donations.transitions import transition
+from users.models import User
+from .models import DailyDonationStats, DailyUserStats, RollupCursor
+from .rollups import DAY_FIELDS, fold_events, reset_rollups, update_rollups
+
+
+class FoldEventsTests(SimpleTestCase):
+    def test_counts_per_day_and_user(self):
+        created_at = timezone.now() - timedelta(hours=3)
+        claimed_at = created_at + timedelta(minutes=30)
+        donations = {1: {"created_at": created_at, "donor_id": 10, "ngo_id": 20}}
+        events = [
+            {"id": 1, "event_type": "created", "to_status": "available", "created_at": created_at, "actor_id": 10, "donation_id": 1},
+            {"id": 2, "event_type": "status_changed", "to_status": "claimed", "created_at": claimed_at, "actor_id": 20, "donation_id": 1},
+            # the donation is gone, the event still counts for the day
+            {"id": 3, "event_type": "created", "to_status": "available", "created_at": created_at, "actor_id": 10, "donation_id": 2},
+        ]
+        days, users = fold_events(events, donations)
+
+        day = timezone.localdate(created_at)
+        self.assertEqual(days[timezone.localdate(claimed_at)]["claim_latency_seconds"], 1800)
+        self.assertEqual(sum(counts["created"] for counts in days.values()), 2)
+        self.assertEqual(users[(day, 10, "donor")]["donations"], 1)
+        self.assertEqual(users[(timezone.localdate(claimed_at), 20, "ngo")]["claimed"], 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UpdateRollupsTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.object(relay_donation_events, "delay"))
+        donor = User.objects.create(username="donor", user_type="donor")
+        ngo = User.objects.create(username="ngo", user_type="ngo")
+        recipient = User.objects.create(username="recipient", user_type="recipient")
+        donations = [
+            Donation.objects.create(donor=donor, title=f"Tray {number}", pickup_time=timezone.now() + timedelta(hours=2))
+            for number in range(5)
+        ]
+        for donation in donations[:3]:
+            transition(donation.pk, "claimed", ngo)
+        transition(donations[0].pk, "picked_up", ngo)
+        transition(donations[0].pk, "completed", ngo, recipient=recipient)
+        transition(donations[3].pk, "cancelled", donor)
+
+    def rollups(self):
+        # float sums depend on the batching in the last digits
+        days = [
+            {**row, "claim_latency_seconds": round(row["claim_latency_seconds"], 6)}
+            for row in DailyDonationStats.objects.values(*DAY_FIELDS).order_by("day")
+        ]
+        return (
+            days,
+            sorted(DailyUserStats.objects.values_list("day", "user__username", "role", "donations", "claimed", "completed")),
+        )
+
+    def test_batches_add_up_to_one_pass(self):
+        # 5 created, 3 claimed, picked up, completed, cancelled
+        self.assertEqual(update_rollups(batch_size=2, lag_seconds=0), 11)
+        batched = self.rollups()
+        (day,) = batched[0]
+        self.assertEqual(
+            [day[name] for name in ("created", "claimed", "picked_up", "completed", "cancelled", "expired")],
+            [5, 3, 1, 1, 1, 0],
+        )
+        self.assertEqual([row[1:] for row in batched[1]], [("donor", "donor", 5, 0, 0), ("ngo", "ngo", 0, 3, 1)])
+
+        # the cursor has moved past every event: nothing is counted twice
+        self.assertEqual(update_rollups(batch_size=2, lag_seconds=0), 0)
+        self.assertEqual(self.rollups(), batched)
+
+        reset_rollups()
+        self.assertEqual(update_rollups(batch_size=1000, lag_seconds=0), 11)
+        self.assertEqual(self.rollups(), batched)
+
+    def test_fresh_events_wait_for_the_lag(self):
+        self.assertEqual(update_rollups(lag_seconds=3600), 0)
+        self.assertFalse(DailyDonationStats.objects.exists())
+        self.assertEqual(RollupCursor.objects.get().last_event_id, 0)
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .rollups import get_stats
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def stats(request):
+    """
+    Admins: donations per day, claim latency, completion rate and top
+    donors/NGOs for `?from=`..`?to=` (ISO dates, default the last 30 days),
+    read from the daily rollups rather than the donations table.
+    """
+    try:
+        end = date.fromisoformat(request.query_params.get("to") or timezone.localdate().isoformat())
+        start = date.fromisoformat(request.query_params.get("from") or (end - timedelta(days=29)).isoformat())
+        top = int(request.query_params.get("top", 10))
+    except ValueError:
+        return Response({"error": "from and to must be YYYY-MM-DD dates, top a number"}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({"error": "from must not be after to"}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= settings.ANALYTICS_MAX_DAYS:
+        return Response({"error": f"At most {settings.ANALYTICS_MAX_DAYS} days per request"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(get_stats(start, end, top=max(1, min(top, 50))))
@@ -2,6 +2,7 @@
 ASGI config for dana project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django, WebSockets to the Channels consumers in donations.routing.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +14,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dana.settings')
 
-application = get_asgi_application()
+# Set up Django before importing anything that touches models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from donations.routing import websocket_urlpatterns  # noqa: E402
+from users.middleware import FirebaseTokenAuthMiddleware  # noqa: E402
+
+# No origin check: sockets authenticate with a bearer token, never cookies
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": FirebaseTokenAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
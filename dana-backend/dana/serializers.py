@@ -0,0 +1,122 @@
+from rest_framework import serializers
+
+
+class EagerLoadingMixin:
+    """
+    Derives select_related/prefetch_related (and optionally .only()) from
+    the fields a serializer will actually render.
+    """
+    def get_load_plan(self, prefix="", to_many=False, plan=None):
+        """
+        Walk the readable fields and work out what the queryset has to load:
+        columns for `.only()`, forward relations to join and to-many
+        relations to prefetch. Anything below a to-many relation is
+        prefetched as well.
+        """
+        if plan is None:
+            plan = {"only": [], "select": [], "prefetch": []}
+
+        for field in self.fields.values():
+            if field.write_only or field.source == "*":
+                continue
+            path = prefix + field.source.replace(".", "__")
+            if isinstance(field, serializers.ListSerializer):
+                plan["prefetch"].append(path)
+                if isinstance(field.child, EagerLoadingMixin):
+                    field.child.get_load_plan(path + "__", True, plan)
+            elif isinstance(field, serializers.BaseSerializer):
+                plan["prefetch" if to_many else "select"].append(path)
+                if isinstance(field, EagerLoadingMixin):
+                    field.get_load_plan(path + "__", to_many, plan)
+            elif not to_many:
+                plan["only"].append(path)
+                relation = path[len(prefix):].rpartition("__")[0]
+                if relation:
+                    plan["select"].append(prefix + relation)
+        return plan
+
+    def setup_eager_loading(self, queryset, only=None):
+        """
+        Join and prefetch every relation this serializer will render, so a
+        page costs a fixed number of queries. With `only` (a list of extra
+        columns the caller needs, e.g. for ordering) the query is also
+        limited to the rendered columns.
+        """
+        plan = self.get_load_plan()
+        if plan["select"]:
+            queryset = queryset.select_related(*dict.fromkeys(plan["select"]))
+        if plan["prefetch"]:
+            queryset = queryset.prefetch_related(*dict.fromkeys(plan["prefetch"]))
+        if only is not None:
+            queryset = queryset.only(*dict.fromkeys(plan["only"] + list(only)))
+        return queryset
+
+
+class DynamicFieldsMixin(EagerLoadingMixin):
+    """
+    Sparse fieldsets for ModelSerializers.
+
+    `?fields=title,donor.email` keeps only the listed fields; dotted names
+    reach into nested serializers. `?expand=donor` swaps a relation listed in
+    Meta.expandable_fields from its primary key to the nested serializer.
+    The query params are only read by the root serializer of a safe request,
+    nested serializers get their share from the parent.
+    """
+    def __init__(self, *args, **kwargs):
+        self._requested_fields = kwargs.pop("fields", None)
+        self._requested_expand = kwargs.pop("expand", None)
+        super().__init__(*args, **kwargs)
+
+    def _is_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def _query_param_set(self, name):
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD") or not self._is_root():
+            return None
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        return {part.strip() for part in value.split(",") if part.strip()}
+
+    def get_requested_fields(self):
+        if self._requested_fields is not None:
+            return set(self._requested_fields)
+        return self._query_param_set("fields")
+
+    def get_requested_expand(self):
+        if self._requested_expand is not None:
+            return set(self._requested_expand)
+        return self._query_param_set("expand") or set()
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in self.get_requested_expand() & set(expandable):
+            serializer_class, kwargs = expandable[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        requested = self.get_requested_fields()
+        if requested is None:
+            return fields
+
+        nested = {}
+        for name in requested:
+            head, _, rest = name.partition(".")
+            nested.setdefault(head, set())
+            if rest:
+                nested[head].add(rest)
+
+        for name in list(fields):
+            if name not in nested:
+                fields.pop(name)
+
+        for name, sub_fields in nested.items():
+            field = fields.get(name)
+            if isinstance(field, serializers.ListSerializer):
+                field = field.child
+            if sub_fields and isinstance(field, DynamicFieldsMixin):
+                field._requested_fields = sub_fields
+        return fields
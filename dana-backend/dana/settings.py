@@ -15,6 +15,7 @@ from pathlib import Path
 import firebase_admin
 from firebase_admin import credentials
 import environ
+from celery.schedules import crontab
 
 
 # Initialize environ
@@ -30,6 +31,9 @@ DEBUG = env.bool('DEBUG', default=False)
 ALLOWED_HOSTS = env('DJANGO_ALLOWED_HOSTS').split(',')
 
 INSTALLED_APPS = [
+    # serves ASGI (WebSockets) from runserver, must come before staticfiles
+    'daphne',
+
     # django
     'django.contrib.admin','django.contrib.auth','django.contrib.contenttypes',
     'django.contrib.sessions','django.contrib.messages','django.contrib.staticfiles',
@@ -37,12 +41,14 @@ INSTALLED_APPS = [
     # 3rd party
     'rest_framework',
     'corsheaders',
+    'channels',
 
     # local
     'users',
     'donations',
     'items',
     'notifications',
+    'analytics',
 
     'django_filters',
 
@@ -78,6 +84,7 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'dana.urls'
 WSGI_APPLICATION = 'dana.wsgi.application'
+ASGI_APPLICATION = 'dana.asgi.application'
 
 # Database - Postgres
 DATABASES = {
@@ -100,6 +107,148 @@ CACHES = {
     }
 }
 
+# Donation list/detail response cache (donations/response_cache.py); any
+# cache backend works, tests can point it at locmem
+DONATION_CACHE_ALIAS = "default"
+DONATION_CACHE_TIMEOUT = 300  # seconds; writes bump a version instead of deleting
+
+# Channels (WebSocket push, donations/consumers.py); tests can swap in
+# channels.layers.InMemoryChannelLayer
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {"hosts": [env('REDIS_URL')]},
+    }
+}
+REALTIME_CELL_PRECISIONS = (3, 4, 5)  # geohash cell groups every event is sent to
+REALTIME_MAX_CELLS = 16               # cell groups one area subscription may join
+
+# Celery
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default=env('REDIS_URL'))
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    'expire-donations': {
+        'task': 'donations.tasks.expire_donations',
+        'schedule': crontab(minute='*/15'),
+    },
+    'expire-document-uploads': {
+        'task': 'donations.tasks.expire_document_uploads',
+        'schedule': crontab(minute=30),
+    },
+    'prune-donation-tombstones': {
+        'task': 'donations.tasks.prune_donation_tombstones',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # safety net; commits also request a relay run right away
+    'relay-donation-events': {
+        'task': 'donations.tasks.relay_donation_events',
+        'schedule': 10.0,
+    },
+    'update-analytics-rollups': {
+        'task': 'analytics.tasks.update_analytics_rollups',
+        'schedule': 60.0,
+    },
+    # safety net; new locations without coordinates request a run right away
+    'geocode-pickup-locations': {
+        'task': 'donations.tasks.geocode_pickup_locations',
+        'schedule': crontab(minute='*/10'),
+    },
+}
+DONATION_EXPIRY_CHUNK_SIZE = 1000
+# most status changes one POST /api/donations/transitions/ may apply
+DONATION_TRANSITIONS_MAX_BATCH = 500
+# most donations one POST /api/donations/bulk/ may create
+DONATION_BULK_MAX_BATCH = 500
+
+# Delta sync (/api/donations/changes/, donations/sync.py)
+DONATION_CHANGES_MAX_LIMIT = 500
+DONATION_CHANGES_LAG_SECONDS = 5        # skip rows this fresh, their transaction may not be visible yet
+DONATION_TOMBSTONE_RETENTION_DAYS = 30  # older cursors get 410 and must resync
+
+# Donation event outbox (donations/outbox.py)
+DONATION_EVENT_CONSUMERS = [
+    'notifications.consumers.notify_new_donations',
+    'donations.realtime.broadcast_donation_events',
+]
+DONATION_OUTBOX_BATCH_SIZE = 200
+DONATION_OUTBOX_MAX_BATCHES = 50
+DONATION_OUTBOX_LEASE_SECONDS = 60  # a run's hold on its batch, then failed events are retried
+DONATION_OUTBOX_MAX_ATTEMPTS = 10   # then the event is set aside with failed_at
+
+# New-donation notifications (notifications/tasks.py)
+NOTIFICATION_BACKENDS = {
+    'email': 'notifications.backends.EmailBackend',
+    # LocalPushBackend only keeps pushes in memory: DEBUG runs and tests
+    'push': env(
+        'NOTIFICATION_PUSH_BACKEND',
+        default='notifications.backends.LocalPushBackend' if DEBUG else 'notifications.backends.FirebasePushBackend',
+    ),
+}
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_RADIUS_KM = 50
+NOTIFICATION_RATE_LIMIT_PER_HOUR = 20
+
+# Daily rollups behind /api/stats/ (analytics/rollups.py), fed from the
+# DonationEvent outbox through their own cursor
+ANALYTICS_ROLLUP_BATCH_SIZE = 1000
+ANALYTICS_ROLLUP_LAG_SECONDS = 30  # skip events this fresh, a lower id may not be committed yet
+ANALYTICS_MAX_DAYS = 366
+
+# Verified Firebase ID tokens are cached until their `exp`
+FIREBASE_TOKEN_CACHE_ALIAS = "default"
+FIREBASE_TOKEN_CACHE_SIZE = 1024        # per-process LRU entries
+FIREBASE_USER_CACHE_TIMEOUT = 300       # seconds a cached user object lives
+
+# ID token verification backend (see users/verifiers.py). Point
+# FIREBASE_JWKS_FILE at a `make_test_jwks` output to run the auth path offline.
+FIREBASE_TOKEN_VERIFIER = env('FIREBASE_TOKEN_VERIFIER', default='users.verifiers.FirebaseCertVerifier')
+FIREBASE_PROJECT_ID = env('FIREBASE_PROJECT_ID', default=None)
+FIREBASE_JWKS_URL = env('FIREBASE_JWKS_URL', default=None)
+FIREBASE_JWKS_FILE = env('FIREBASE_JWKS_FILE', default=None)
+
+# /api/donations/nearby/
+NEARBY_DEFAULT_RADIUS_KM = 5
+NEARBY_MAX_RADIUS_KM = 50
+
+# /api/donations/recommended/ (donations/matching.py)
+MATCHING_DEFAULT_RADIUS_KM = 10  # for NGOs without notification preferences
+MATCHING_WEIGHTS = {"distance": 0.4, "urgency": 0.3, "quantity": 0.15, "history": 0.15}
+MATCHING_URGENCY_HOURS = 24      # urgency falls to 1/e with this much time left
+MATCHING_QUANTITY_CAP_KG = 50    # quantities above this score the same
+MATCHING_KG_PER_SERVING = 0.4
+MATCHING_BATCH_CELLS = 2_000_000  # NGO x donation scores per matrix (~16 MB each)
+MATCHING_CELL_CACHE_TIMEOUT = 300
+
+# /api/donations/route/ (donations/routes.py)
+ROUTE_SPEED_KMH = 25              # average city driving speed
+ROUTE_STOP_MINUTES = 10           # time spent at each pickup
+ROUTE_PICKUP_WINDOW_MINUTES = 120  # a pickup may start this long after pickup_time
+ROUTE_TIME_BUDGET_MS = 200        # 2-opt search time per request
+ROUTE_MAX_STOPS = 200
+
+# Geocoding of pickup addresses sent without coordinates (donations/geocoding.py).
+# donations.geocoding.OfflineGeocoder places addresses inside
+# GEOCODING_OFFLINE_BOUNDS without any network access, for development and tests.
+# Deployments pick a backend explicitly (`check --deploy` insists), e.g.
+# donations.geocoding.NominatimGeocoder against GEOCODING_NOMINATIM_URL.
+GEOCODING_BACKEND = env('GEOCODING_BACKEND', default='donations.geocoding.OfflineGeocoder' if DEBUG else None)
+GEOCODING_NOMINATIM_URL = env('GEOCODING_NOMINATIM_URL', default='https://nominatim.openstreetmap.org/search')
+GEOCODING_USER_AGENT = env('GEOCODING_USER_AGENT', default='dana-backend')
+GEOCODING_COUNTRY_CODES = env('GEOCODING_COUNTRY_CODES', default='in')
+GEOCODING_MIN_INTERVAL_SECONDS = 1.0  # Nominatim usage policy
+GEOCODING_TIMEOUT_SECONDS = 5
+GEOCODING_MISS_TTL_DAYS = 7           # ask again about addresses not found
+GEOCODING_BATCH_SIZE = 100            # locations per geocode_pickup_locations run
+GEOCODING_OFFLINE_BOUNDS = (12.8, 13.4, 80.0, 80.5)  # min/max latitude, min/max longitude
+
+# Pickup locations are one per normalized address and geohash cell of this
+# length (donations/locations.py); 7 is roughly 150 x 150 m
+PICKUP_LOCATION_CELL_PRECISION = 7
+
+# Available supply per food type and area (donations/supply.py); cells are
+# geohash prefixes of this length, 5 is roughly 5 x 5 km
+SUPPLY_INDEX_PRECISION = 5
+
 # REST framework basics
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -145,9 +294,38 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    # processed donation photos; swap for an S3 backend in production
+    "donation_images": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": MEDIA_ROOT / "donations", "base_url": MEDIA_URL + "donations/"},
+    },
+}
+
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
+# Stream uploads to temp files instead of buffering whole photos in RAM
+FILE_UPLOAD_HANDLERS = ["django.core.files.uploadhandler.TemporaryFileUploadHandler"]
+
+# Donation photo pipeline (donations/images.py)
+DONATION_IMAGE_STORAGE = "donation_images"
+DONATION_IMAGE_PLACEHOLDER = "donations/placeholder.webp"  # static file shown until processed
+DONATION_IMAGE_MAX_UPLOAD_SIZE = 15 * 1024 * 1024
+DONATION_IMAGE_MAX_COUNT = 5
+DONATION_IMAGE_THUMBNAIL_SIZE = 320      # square feed thumbnail, px
+DONATION_IMAGE_WIDTHS = (640, 1280)      # responsive variants, px wide
+DONATION_IMAGE_QUALITY = 80
+
+# Resumable NGO document uploads (donations/uploads.py). Part files need a
+# local disk shared by the web workers.
+NGO_UPLOAD_DIR = BASE_DIR / "upload_parts"
+NGO_UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+NGO_UPLOAD_CHUNK_SIZE = 1024 * 1024          # suggested to clients
+NGO_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+NGO_UPLOAD_MAX_ACTIVE = 3                    # unfinished uploads per user
+NGO_UPLOAD_SESSION_TTL_HOURS = 24
 
 
 # Firebase admin init file path
@@ -0,0 +1,28 @@
+"""
+Shared by the apps' tests.
+"""
+import os
+import random
+from unittest import skipUnless
+
+from django.test import tag
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def benchmark(test_class):
+    """
+    Timing tests: tagged "benchmark" and skipped unless DANA_BENCHMARKS is
+    set, as wall-clock comparisons are too noisy for every CI run.
+    """
+    run = skipUnless(os.environ.get("DANA_BENCHMARKS"), "set DANA_BENCHMARKS=1 to run benchmarks")
+    return tag("benchmark")(run(test_class))
+
+
+def seed_rows(model, count, build, seed, batch_size=5000):
+    """
+    bulk_create `count` rows of `model` from `build(rng, number)`, with the
+    rng seeded by `seed` so every run gets the same data.
+    """
+    rng = random.Random(seed)
+    return model.objects.bulk_create([build(rng, number) for number in range(count)], batch_size=batch_size)
@@ -17,10 +17,15 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
-from donations.views import DonationViewSet, health_check, review_ngo, upload_ngo_doc
+from donations.views import (
+    DonationViewSet, health_check, review_ngo, upload_ngo_doc, outbox_stats, feed_cache_stats,
+    start_ngo_upload, ngo_upload_session, complete_ngo_upload,
+)
 from django.conf import settings
 from django.conf.urls.static import static
-from users.views import UserViewSet, NGOVerificationViewSet, sync_user
+from users.views import UserViewSet, NGOVerificationViewSet, sync_user, auth_cache_stats
+from notifications.views import notification_preferences
+from analytics.views import stats
 
 
 router = routers.DefaultRouter()
@@ -32,9 +37,17 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api/auth/sync/', sync_user),
+    path('api/auth/cache-stats/', auth_cache_stats),
     path('api/health/', health_check),
     path('api/auth/ngo-upload/', upload_ngo_doc),
+    path('api/auth/ngo-upload/sessions/', start_ngo_upload),
+    path('api/auth/ngo-upload/sessions/<uuid:pk>/', ngo_upload_session),
+    path('api/auth/ngo-upload/sessions/<uuid:pk>/complete/', complete_ngo_upload),
     path("api/admin/ngo-review/<int:pk>/", review_ngo, name="review-ngo"),
+    path("api/admin/outbox-stats/", outbox_stats, name="outbox-stats"),
+    path("api/admin/feed-cache-stats/", feed_cache_stats, name="feed-cache-stats"),
+    path('api/notifications/preferences/', notification_preferences),
+    path('api/stats/', stats, name='stats'),
 ]
 
 if settings.DEBUG:
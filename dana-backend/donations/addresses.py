@@ -0,0 +1,50 @@
+import re
+import unicodedata
+
+# Spelled-out forms of the abbreviations donors type most
+ABBREVIATIONS = {
+    "st": "street", "str": "street",
+    "rd": "road",
+    "ave": "avenue", "av": "avenue",
+    "blvd": "boulevard",
+    "ln": "lane",
+    "dr": "drive",
+    "hwy": "highway",
+    "sq": "square",
+    "ext": "extension", "extn": "extension",
+    "nr": "near",
+    "opp": "opposite",
+    "apt": "apartment", "apts": "apartments",
+    "bldg": "building",
+    "flr": "floor", "fl": "floor",
+    "no": "number",
+    "n": "north", "s": "south", "e": "east", "w": "west",
+}
+
+NON_WORD_RE = re.compile(r"[^\w]+")
+MAX_LENGTH = 512  # PickupLocation.normalized_address
+
+
+def normalize_address(address):
+    """
+    Comparable form of a free-text address: case, accents, punctuation,
+    spacing and common abbreviations don't matter, so "12, M.G. Rd." and
+    "12 mg road" match. Returns "" when nothing is left.
+    """
+    if not address:
+        return ""
+    text = unicodedata.normalize("NFKD", str(address))
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    words, initials = [], ""
+    # runs of initials are one word: "m.g.", "m g" and "mg" all give "mg"
+    for word in NON_WORD_RE.sub(" ", text).split() + [""]:
+        if len(word) == 1 and word.isalpha():
+            initials += word
+            continue
+        if initials:
+            words.append(initials)
+            initials = ""
+        if word:
+            words.append(word)
+    words = [ABBREVIATIONS.get(word, word) for word in words]
+    return " ".join(words)[:MAX_LENGTH].rstrip()
@@ -1,14 +1,34 @@
 from django.contrib import admin
-from .models import Donation, PickupLocation
+from .models import Donation, DonationEvent, GeocodeCache, PickupLocation
 
 
 admin.site.register(PickupLocation)
 
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ("normalized_address", "latitude", "longitude", "backend", "updated_at")
+    search_fields = ("normalized_address",)
+
 @admin.register(Donation)
 class DonationAdmin(admin.ModelAdmin):
     list_display = ("food_type", "donor", "status", "expiry_date", "created_at")
     list_filter = ("status", "expiry_date")
-    search_fields = ("food_type", "donor__username", "location")
+    search_fields = ("food_type", "donor__username", "location__address")
+    # filtered lists would otherwise COUNT(*) the whole table as well
+    show_full_result_count = False
+
+@admin.register(DonationEvent)
+class DonationEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "event_type", "donation_id", "to_status", "attempts", "published_at", "failed_at")
+    list_filter = (("failed_at", admin.EmptyFieldListFilter), "event_type")
+    actions = ["requeue"]
+    show_full_result_count = False
+
+    @admin.action(description="Requeue for delivery")
+    def requeue(self, request, queryset):
+        # consumers in delivered_to already have the event and are skipped
+        updated = queryset.filter(published_at__isnull=True).update(failed_at=None, attempts=0, leased_until=None)
+        self.message_user(request, f"Requeued {updated} events.")
 
 
 # Register your models here.
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DonationsConfig(AppConfig):
@@ -6,4 +7,8 @@ class DonationsConfig(AppConfig):
     name = 'donations'
 
     def ready(self):
+        import donations.checks
         import donations.signals
+        from .search import ensure_sqlite_fts_triggers
+
+        post_migrate.connect(ensure_sqlite_fts_triggers, sender=self)
@@ -0,0 +1,73 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from items.models import FoodItem
+from .locations import location_key, resolve_locations
+from .models import Donation, DonationEvent
+from .serializers import DonationSerializer
+from .signals import donations_created
+from .supply import add_supply
+
+# Set by the server, never taken from a bulk row
+SERVER_FIELDS = ("status", "ngo", "recipient", "donor")
+
+
+def validate_rows(rows, context):
+    """
+    Validate each row on its own, reusing one serializer so a batch doesn't
+    rebuild the field tree per row. Returns (valid, errors): `valid` is a
+    list of (index, validated_data), `errors` maps index to field errors.
+    """
+    child = DonationSerializer(context=context)
+    valid, errors = [], {}
+    for index, row in enumerate(rows):
+        try:
+            data = child.run_validation(row)
+        except serializers.ValidationError as exc:
+            errors[index] = exc.detail
+            continue
+        for name in SERVER_FIELDS:
+            data.pop(name, None)
+        valid.append((index, data))
+    return valid, errors
+
+
+def create_donations(donor, rows):
+    """
+    Insert validated donation rows with their items and pickup locations
+    in one transaction, a fixed number of queries whatever the batch size.
+    bulk_create bypasses save() and post_save, so the search document,
+    parsed quantities, supply index, outbox events and cache invalidation
+    are done here instead; the `donations_created` signal stands in for
+    the per-row post_save.
+    Returns the created donations in row order.
+    """
+    rows = [dict(data) for data in rows]
+    item_data = [data.pop("items", None) or [] for data in rows]
+    location_data = [data.pop("location", None) for data in rows]
+
+    with transaction.atomic():
+        locations = resolve_locations(data for data in location_data if data)
+        donations = []
+        for data, location in zip(rows, location_data):
+            donation = Donation(donor=donor, **data)
+            donation.location = locations.get(location_key(location)) if location else None
+            donation.update_search_document()
+            donation.update_quantity()
+            donations.append(donation)
+        donations = Donation.objects.bulk_create(donations, batch_size=500)
+
+        food_items = [
+            FoodItem(donation=donation, **item)
+            for donation, items in zip(donations, item_data)
+            for item in items
+        ]
+        for item in food_items:
+            item.update_quantity()
+        FoodItem.objects.bulk_create(food_items, batch_size=1000)
+
+        ids = [donation.pk for donation in donations]
+        add_supply(Donation.objects.filter(pk__in=ids))
+        DonationEvent.record_bulk(ids, "created", to_status="available")
+        donations_created.send(sender=Donation, donation_ids=ids)
+    return donations
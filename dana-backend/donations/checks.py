@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+OFFLINE_GEOCODERS = {"donations.geocoding.OfflineGeocoder"}
+
+
+@register(Tags.compatibility, deploy=True)
+def check_geocoding_backend(app_configs, **kwargs):
+    """
+    `check --deploy`: there is no default geocoder outside DEBUG, and
+    OfflineGeocoder makes coordinates up, so a deployment must name one.
+    """
+    if settings.GEOCODING_BACKEND and settings.GEOCODING_BACKEND not in OFFLINE_GEOCODERS:
+        return []
+    return [
+        Error(
+            f"GEOCODING_BACKEND is {settings.GEOCODING_BACKEND or 'not set'}, so addresses sent without coordinates never get real ones.",
+            hint="Set GEOCODING_BACKEND, e.g. to donations.geocoding.NominatimGeocoder with GEOCODING_NOMINATIM_URL.",
+            id="donations.E001",
+        )
+    ]
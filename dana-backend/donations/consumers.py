@@ -0,0 +1,117 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from users.middleware import TOKEN_SUBPROTOCOL
+from .geo import bounding_box, cells_in_box, haversine_km
+from .models import Donation
+from .realtime import cell_group, status_group
+
+STATUSES = {value for value, _ in Donation.STATUS_CHOICES}
+
+
+class DonationFeedConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/donations/: pushes donation events (created, claimed, expired, ...)
+    to authenticated clients. Send one of
+
+        {"action": "subscribe", "lat": 13.08, "lng": 80.27, "radius_km": 5}
+        {"action": "subscribe", "lat": ..., "lng": ..., "statuses": ["available"]}
+        {"action": "subscribe", "statuses": ["claimed", "expired"]}
+        {"action": "unsubscribe"}
+
+    and receive {"type": "donation.events", "events": [...]}. An area
+    subscription joins the groups of the geohash cells covering it, so the
+    server only wakes up connections near an event.
+    """
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.joined = set()
+        self.area = None
+        self.statuses = None
+        # a browser that sent its token as a subprotocol needs one echoed back
+        await self.accept(TOKEN_SUBPROTOCOL if TOKEN_SUBPROTOCOL in self.scope.get("subprotocols", []) else None)
+
+    async def disconnect(self, code):
+        await self.leave_groups()
+
+    async def leave_groups(self):
+        for group in getattr(self, "joined", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.joined = set()
+        self.area = None
+        self.statuses = None
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action") if isinstance(content, dict) else None
+        if action == "subscribe":
+            await self.subscribe(content)
+        elif action == "unsubscribe":
+            await self.leave_groups()
+            await self.send_json({"type": "unsubscribed"})
+        else:
+            await self.send_json({"type": "error", "error": "Unknown action"})
+
+    async def subscribe(self, content):
+        statuses = content.get("statuses")
+        if statuses is not None and (not isinstance(statuses, list) or not set(statuses) <= STATUSES):
+            await self.send_json({"type": "error", "error": "Invalid statuses"})
+            return
+
+        area = None
+        groups = []
+        if "lat" in content or "lng" in content:
+            try:
+                lat = float(content["lat"])
+                lng = float(content["lng"])
+                radius_km = float(content.get("radius_km", settings.NEARBY_DEFAULT_RADIUS_KM))
+            except (KeyError, TypeError, ValueError):
+                await self.send_json({"type": "error", "error": "lat and lng are required numbers"})
+                return
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius_km <= 0:
+                await self.send_json({"type": "error", "error": "Invalid coordinates or radius"})
+                return
+            area = (lat, lng, min(radius_km, settings.NEARBY_MAX_RADIUS_KM))
+            groups = [cell_group(cell) for cell in self.area_cells(*area)]
+        elif statuses:
+            groups = [status_group(status) for status in statuses]
+        else:
+            await self.send_json({"type": "error", "error": "Subscribe to an area or to statuses"})
+            return
+
+        await self.leave_groups()
+        for group in groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.joined = set(groups)
+        self.area = area
+        self.statuses = set(statuses) if statuses else None
+        await self.send_json({"type": "subscribed", "groups": len(groups)})
+
+    @staticmethod
+    def area_cells(lat, lng, radius_km):
+        # the finest precision that still keeps the subscription to a few groups
+        box = bounding_box(lat, lng, radius_km)
+        cells = []
+        for precision in sorted(settings.REALTIME_CELL_PRECISIONS):
+            candidate = cells_in_box(*box, precision)
+            if cells and len(candidate) > settings.REALTIME_MAX_CELLS:
+                break
+            cells = candidate
+        return cells
+
+    def wants(self, event):
+        if self.statuses is not None and event["status"] not in self.statuses:
+            return False
+        if self.area is not None:
+            if event["latitude"] is None or event["longitude"] is None:
+                return False
+            lat, lng, radius_km = self.area
+            return haversine_km(lat, lng, event["latitude"], event["longitude"]) <= radius_km
+        return True
+
+    async def donation_events(self, message):
+        events = [event for event in message["events"] if self.wants(event)]
+        if events:
+            await self.send_json({"type": "donation.events", "events": events})
@@ -0,0 +1,20 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The donation was changed by someone else."
+    default_code = "conflict"
+
+
+class InvalidTransition(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "This status change is not allowed."
+    default_code = "invalid_transition"
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "This sync cursor is too old, sync again from scratch."
+    default_code = "cursor_expired"
@@ -0,0 +1,124 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5m cells, what PickupLocation stores
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def prefix_lookup(field, prefix):
+    """
+    Filter kwargs for geohashes in `field` that start with `prefix`, as a
+    range: unlike LIKE 'prefix%' it can use the geohash index on SQLite
+    too, whose LIKE is case-insensitive.
+    """
+    lookup = {f"{field}__gte": prefix}
+    # the next prefix in base32 order bounds the range, if there is one
+    head = prefix.rstrip(_BASE32[-1])
+    if head:
+        lookup[f"{field}__lt"] = head[:-1] + _BASE32[_BASE32.index(head[-1]) + 1]
+    return lookup
+
+
+def cell_size_degrees(precision):
+    """
+    (height, width) of a geohash cell in degrees.
+    """
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells cover every point within `radius_km`:
+    the cell containing the centre plus its eight neighbours, at the finest
+    precision whose cells are still at least `radius_km` across.
+    """
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size_degrees(candidate)
+        if min(height * km_per_degree, width * km_per_degree * cos_lat) < radius_km:
+            break
+        precision = candidate
+
+    height, width = cell_size_degrees(precision)
+    cells = set()
+    for dlat in (-height, 0, height):
+        for dlng in (-width, 0, width):
+            lat = min(max(latitude + dlat, -90.0), 90.0)
+            lng = (longitude + dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
+
+
+def cells_in_box(min_lat, max_lat, min_lng, max_lng, precision):
+    """
+    Geohash cells of `precision` that overlap a lat/lng box.
+    """
+    height, width = cell_size_degrees(precision)
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0 - 1e-9)
+    max_lng = min(max_lng, min_lng + 360.0 - 1e-9)
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            wrapped = (lng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, wrapped, precision))
+            if lng >= max_lng:
+                break
+            lng = min(lng + width, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + height, max_lat)
+    return sorted(cells)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) around a point. Near the poles
+    the longitude span is left open.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6 or abs(latitude) + dlat >= 90:
+        return latitude - dlat, latitude + dlat, -180.0, 180.0
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return latitude - dlat, latitude + dlat, longitude - dlng, longitude + dlng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .addresses import normalize_address
+from .models import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+
+class BaseGeocoder:
+    """
+    Turns an address into (latitude, longitude), or None when it can't be
+    found. Raising means the lookup failed and may be retried; a None is
+    cached like a hit. Backends are selected with GEOCODING_BACKEND.
+    """
+    def geocode(self, address):
+        raise NotImplementedError
+
+
+class NominatimGeocoder(BaseGeocoder):
+    """
+    OpenStreetMap Nominatim. The public instance allows one request per
+    second per application, which this keeps to within a process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+
+    def geocode(self, address):
+        params = {"q": address, "format": "jsonv2", "limit": 1}
+        if settings.GEOCODING_COUNTRY_CODES:
+            params["countrycodes"] = settings.GEOCODING_COUNTRY_CODES
+        with self._lock:
+            wait = self._last_request + settings.GEOCODING_MIN_INTERVAL_SECONDS - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = requests.get(
+                    settings.GEOCODING_NOMINATIM_URL,
+                    params=params,
+                    headers={"User-Agent": settings.GEOCODING_USER_AGENT},
+                    timeout=settings.GEOCODING_TIMEOUT_SECONDS,
+                )
+            finally:
+                self._last_request = time.monotonic()
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+
+class OfflineGeocoder(BaseGeocoder):
+    """
+    Stand-in that never leaves the process: every address gets a stable
+    point inside GEOCODING_OFFLINE_BOUNDS derived from its normalized form,
+    so equal addresses land on the same spot. For development and tests.
+    """
+    def geocode(self, address):
+        normalized = normalize_address(address)
+        if not normalized:
+            return None
+        digest = hashlib.sha256(normalized.encode()).digest()
+        min_lat, max_lat, min_lng, max_lng = settings.GEOCODING_OFFLINE_BOUNDS
+        lat_share = int.from_bytes(digest[:8], "big") / 2 ** 64
+        lng_share = int.from_bytes(digest[8:16], "big") / 2 ** 64
+        return min_lat + lat_share * (max_lat - min_lat), min_lng + lng_share * (max_lng - min_lng)
+
+
+_geocoder = None
+
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        if not settings.GEOCODING_BACKEND:
+            raise ImproperlyConfigured("GEOCODING_BACKEND is not set")
+        _geocoder = import_string(settings.GEOCODING_BACKEND)()
+    return _geocoder
+
+
+def cached_coordinates(normalized_addresses):
+    """
+    normalized address -> (latitude, longitude) for the cached hits among
+    `normalized_addresses`, in one query.
+    """
+    rows = GeocodeCache.objects.filter(
+        normalized_address__in=set(normalized_addresses), latitude__isnull=False, longitude__isnull=False,
+    ).values_list("normalized_address", "latitude", "longitude")
+    return {normalized: (latitude, longitude) for normalized, latitude, longitude in rows}
+
+
+def geocode(address):
+    """
+    Coordinates of `address` from the GeocodeCache, asking the backend only
+    on a miss. Not-found answers are cached too and asked again after
+    GEOCODING_MISS_TTL_DAYS. Returns None when unknown or on backend errors.
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return None
+    entry = GeocodeCache.objects.filter(normalized_address=normalized).first()
+    if entry is not None:
+        if entry.latitude is not None and entry.longitude is not None:
+            return entry.latitude, entry.longitude
+        if entry.updated_at > timezone.now() - timedelta(days=settings.GEOCODING_MISS_TTL_DAYS):
+            return None
+
+    try:
+        coordinates = get_geocoder().geocode(address)
+    except Exception:
+        logger.warning(f"Geocoding failed for address {normalized!r}", exc_info=True)
+        return None
+    latitude, longitude = coordinates if coordinates else (None, None)
+    GeocodeCache.objects.update_or_create(
+        normalized_address=normalized,
+        defaults={"latitude": latitude, "longitude": longitude, "backend": settings.GEOCODING_BACKEND[-100:]},
+    )
+    return coordinates
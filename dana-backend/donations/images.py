@@ -0,0 +1,151 @@
+import io
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.templatetags.static import static
+from PIL import Image, ImageOps
+
+from .models import Donation
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED_FORMATS = {"JPEG", "PNG", "WEBP", "MPO"}
+
+
+def get_storage():
+    return storages[settings.DONATION_IMAGE_STORAGE]
+
+
+def placeholder_url():
+    return static(settings.DONATION_IMAGE_PLACEHOLDER)
+
+
+def thumbnail_url(entry):
+    """
+    Feed image for one Donation.images entry: its thumbnail once processed,
+    the placeholder until then. Old entries are plain URLs.
+    """
+    if isinstance(entry, str):
+        return entry
+    return entry.get("thumbnail") or placeholder_url()
+
+
+def validate_upload(upload):
+    if upload.size > settings.DONATION_IMAGE_MAX_UPLOAD_SIZE:
+        return f"{upload.name} is larger than {settings.DONATION_IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)} MB"
+    if upload.content_type and not upload.content_type.startswith("image/"):
+        return f"{upload.name} is not an image"
+    return None
+
+
+def attach_uploaded_images(donation, uploads):
+    """
+    Stage uploaded photos in the image storage (a rename for temp files on
+    the local filesystem), add pending entries to donation.images and queue
+    process_donation_image for each once the transaction commits.
+    """
+    from .tasks import process_donation_image
+
+    storage = get_storage()
+    entries = []
+    for upload in uploads:
+        image_id = uuid.uuid4().hex
+        extension = os.path.splitext(upload.name)[1].lower()[:8]
+        staged = storage.save(f"incoming/{image_id}{extension}", upload)
+        entries.append({"id": image_id, "status": "pending", "staged": staged, "thumbnail": None, "variants": {}})
+
+    with transaction.atomic():
+        donation = Donation.objects.select_for_update().get(pk=donation.pk)
+        donation.images = list(donation.images or []) + entries
+        donation.save(update_fields=["images", "updated_at"])
+        for entry in entries:
+            transaction.on_commit(
+                lambda image_id=entry["id"]: process_donation_image.delay(donation.pk, image_id)
+            )
+    return donation
+
+
+def render_variants(source):
+    """
+    WebP renditions of an image file: a square `thumb` for feed cards and
+    one `w<width>` per DONATION_IMAGE_WIDTHS no wider than the original.
+    Orientation is applied and EXIF (GPS included) is dropped. Returns
+    ({name: bytes}, (width, height)).
+    """
+    with Image.open(source) as image:
+        if image.format not in ACCEPTED_FORMATS:
+            raise ValueError(f"Unsupported image format {image.format}")
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    quality = settings.DONATION_IMAGE_QUALITY
+    renditions = {}
+
+    size = settings.DONATION_IMAGE_THUMBNAIL_SIZE
+    thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    renditions["thumb"] = encode_webp(thumb, quality)
+
+    widths = [w for w in settings.DONATION_IMAGE_WIDTHS if w < image.width] or [image.width]
+    for width in widths:
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        renditions[f"w{width}"] = encode_webp(resized, quality)
+    return renditions, image.size
+
+
+def encode_webp(image, quality):
+    buffer = io.BytesIO()
+    # no exif= argument, so nothing from the original's metadata is written
+    image.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def process_image(donation_id, image_id):
+    """
+    Render and store the variants of one staged upload, then swap the
+    placeholder entry for the real URLs. The original is not kept.
+    """
+    donation = Donation.objects.filter(pk=donation_id).only("id", "images").first()
+    entry = next((e for e in (donation.images or []) if isinstance(e, dict) and e.get("id") == image_id), None) if donation else None
+    if entry is None or entry.get("status") != "pending":
+        return None
+
+    storage = get_storage()
+    staged = entry["staged"]
+    update = {"status": "ready", "staged": None}
+    # storage errors propagate so the task retries; bad images fail for good
+    with storage.open(staged, "rb") as source:
+        data = source.read()
+    try:
+        renditions, (width, height) = render_variants(io.BytesIO(data))
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning(f"Could not process image {image_id} of donation {donation_id}: {exc}")
+        update["status"] = "failed"
+    else:
+        urls = {}
+        for name, data in renditions.items():
+            path = storage.save(f"{donation_id}/{image_id}/{name}.webp", ContentFile(data))
+            urls[name] = storage.url(path)
+        update.update(
+            thumbnail=urls.pop("thumb"),
+            variants=urls,
+            width=width,
+            height=height,
+        )
+    storage.delete(staged)
+
+    with transaction.atomic():
+        donation = Donation.objects.select_for_update().filter(pk=donation_id).first()
+        if donation is None:
+            return None
+        donation.images = [
+            dict(e, **update) if isinstance(e, dict) and e.get("id") == image_id else e
+            for e in donation.images or []
+        ]
+        donation.save(update_fields=["images", "updated_at"])
+    return update["status"]
@@ -0,0 +1,145 @@
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .addresses import normalize_address
+from .geo import encode_geohash
+from .geocoding import cached_coordinates
+from .models import PickupLocation
+
+logger = logging.getLogger(__name__)
+
+
+def coordinate(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def coordinate_cell(latitude, longitude):
+    if latitude is None or longitude is None:
+        return ""
+    return encode_geohash(latitude, longitude)[:settings.PICKUP_LOCATION_CELL_PRECISION]
+
+
+def location_key(data):
+    """
+    (normalized address, cell) a location dict of address/latitude/longitude
+    resolves to, or None for a blank address.
+    """
+    normalized = normalize_address(data.get("address"))
+    if not normalized:
+        return None
+    return normalized, coordinate_cell(coordinate(data.get("latitude")), coordinate(data.get("longitude")))
+
+
+def get_or_create_location(address, latitude=None, longitude=None):
+    """
+    The PickupLocation of `address` at `latitude`/`longitude`: one per
+    normalized address and coordinate cell, so the same street in two
+    cities stays two locations and the coordinates sent are kept. Without
+    coordinates, the address's one location keyed without any; it takes
+    them from the geocode cache or a geocoding task run after commit.
+    Returns None for a blank address.
+    """
+    key = location_key({"address": address, "latitude": latitude, "longitude": longitude})
+    if key is None:
+        return None
+    normalized, cell = key
+    if cell:
+        latitude, longitude = coordinate(latitude), coordinate(longitude)
+    else:
+        latitude, longitude = cached_coordinates([normalized]).get(normalized, (None, None))
+
+    location = PickupLocation.objects.filter(normalized_address=normalized, cell=cell).first()
+    if location is None:
+        try:
+            with transaction.atomic():
+                location = PickupLocation.objects.create(
+                    address=address.strip(), latitude=latitude, longitude=longitude, cell=cell,
+                )
+        except IntegrityError:
+            # created concurrently by another request
+            location = PickupLocation.objects.get(normalized_address=normalized, cell=cell)
+
+    if location.latitude is None or location.longitude is None:
+        if latitude is not None and longitude is not None:
+            location.latitude, location.longitude = latitude, longitude
+            location.save(update_fields=["latitude", "longitude"])
+        else:
+            request_geocoding([location.pk])
+    return location
+
+
+def resolve_locations(location_data):
+    """
+    Bulk get_or_create_location() for dicts of address/latitude/longitude:
+    one read, one bulk insert and one cache lookup for the whole batch.
+    Returns location_key() -> location.
+    """
+    wanted = {}
+    for data in location_data:
+        key = location_key(data)
+        if key is not None:
+            wanted.setdefault(key, data)
+    if not wanted:
+        return {}
+
+    locations = {
+        (location.normalized_address, location.cell): location
+        for location in PickupLocation.objects.filter(
+            normalized_address__in={normalized for normalized, _ in wanted},
+            cell__in={cell for _, cell in wanted},
+        )
+    }
+    locations = {key: location for key, location in locations.items() if key in wanted}
+    missing = [key for key in wanted if key not in locations]
+    cached = cached_coordinates([normalized for normalized, cell in missing if not cell])
+    new = []
+    for normalized, cell in missing:
+        data = wanted[normalized, cell]
+        if cell:
+            latitude, longitude = coordinate(data.get("latitude")), coordinate(data.get("longitude"))
+        else:
+            latitude, longitude = cached.get(normalized, (None, None))
+        location = PickupLocation(address=data["address"].strip(), latitude=latitude, longitude=longitude, cell=cell)
+        # bulk_create skips save(), which keeps these in sync
+        location.update_geohash()
+        location.update_normalized_address()
+        new.append(location)
+    try:
+        with transaction.atomic():
+            created = PickupLocation.objects.bulk_create(new, batch_size=500)
+    except IntegrityError:
+        # another request inserted some of them meanwhile
+        created = [get_or_create_location(**wanted[key]) for key in missing]
+    for location in created:
+        locations[location.normalized_address, location.cell] = location
+
+    request_geocoding([
+        location.pk for location in locations.values()
+        if location.latitude is None or location.longitude is None
+    ])
+    return locations
+
+
+def request_geocoding(location_ids):
+    """
+    Geocode locations without coordinates off the request path, after the
+    commit. Never raises: geocode_pickup_locations also runs on beat and
+    picks them up if the broker is down.
+    """
+    from .tasks import geocode_pickup_locations
+
+    if not location_ids:
+        return
+
+    def enqueue():
+        try:
+            geocode_pickup_locations.delay(list(location_ids))
+        except Exception:
+            logger.warning("Could not request geocoding", exc_info=True)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,89 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from donations.serializers import DonationSerializer
+from donations.views import DonationViewSet
+from users.models import User
+
+FOODS = ["rice", "bread", "vegetables", "fruit", "curry", "milk", "snacks", "biryani"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the same batch of donations one by one through "
+        "DonationSerializer and in one POST /api/donations/bulk/, and report "
+        "queries and donations per second for each. Runs inside a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--donations", type=int, default=100)
+        parser.add_argument("--locations", type=int, default=5, help="Distinct pickup locations in the batch")
+        parser.add_argument("--items", type=int, default=2, help="Food items per donation")
+
+    def handle(self, *args, **options):
+        rows = self.make_rows(options["donations"], options["locations"], options["items"])
+        with transaction.atomic():
+            donor = User.objects.create(username=f"bulk-bench-{time.time_ns()}", user_type="donor")
+            results = [
+                ("one by one", *self.measure(self.one_by_one, donor, rows)),
+                ("bulk", *self.measure(self.bulk, donor, rows)),
+            ]
+            transaction.set_rollback(True)
+
+        for name, seconds, queries in results:
+            self.stdout.write(
+                f"{name:>10}: {len(rows)} donations in {seconds * 1000:.0f} ms, "
+                f"{queries} queries, {len(rows) / seconds:.0f} donations/s"
+            )
+
+    def make_rows(self, count, location_count, item_count):
+        rng = random.Random(0)
+        locations = [
+            {"address": f"{i} Bench Street", "latitude": 12.8 + rng.random() * 0.6, "longitude": 80.0 + rng.random() * 0.5}
+            for i in range(location_count)
+        ]
+        pickup_time = (timezone.now() + timedelta(hours=2)).isoformat()
+        expiry_date = (timezone.localdate() + timedelta(days=1)).isoformat()
+        return [
+            {
+                "title": f"{food} tray {i}",
+                "food_type": food,
+                "quantity": f"{rng.randint(1, 20)} kg",
+                "pickup_time": pickup_time,
+                "expiry_date": expiry_date,
+                "location": rng.choice(locations),
+                "items": [{"name": food, "quantity": f"{rng.randint(1, 5)} boxes"} for _ in range(item_count)],
+            }
+            for i, food in enumerate(rng.choice(FOODS) for _ in range(count))
+        ]
+
+    def measure(self, create, donor, rows):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            create(donor, rows)
+            seconds = time.perf_counter() - started
+        return seconds, len(queries.captured_queries)
+
+    def one_by_one(self, donor, rows):
+        request = APIRequestFactory().post("/api/donations/")
+        request.user = donor
+        for row in rows:
+            serializer = DonationSerializer(data=row, context={"request": request})
+            serializer.is_valid(raise_exception=True)
+            serializer.save(donor=donor)
+
+    def bulk(self, donor, rows):
+        request = APIRequestFactory().post("/api/donations/bulk/", rows, format="json")
+        force_authenticate(request, donor)
+        view = DonationViewSet.as_view({"post": "bulk_create"}, **DonationViewSet.bulk_create.kwargs)
+        response = view(request)
+        if response.status_code != 201:
+            raise CommandError(f"bulk create failed: {response.data}")
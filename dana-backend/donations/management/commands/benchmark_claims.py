@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from donations.models import Donation, DonationEvent
+from donations.views import DonationViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "POST /api/donations/<id>/claim/ from parallel threads, each on its "
+        "own connection, first over distinct donations and then all on one "
+        "donation, and report claims per second for each. Claims have to "
+        "commit to race, so this writes to the database and deletes its "
+        "users, donations and events afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--donations", type=int, default=400)
+        parser.add_argument("--workers", type=int, default=8, help="Parallel clients")
+
+    def handle(self, *args, **options):
+        count, workers = options["donations"], options["workers"]
+        prefix = f"claim-bench-{time.time_ns()}"
+        donor = User.objects.create(username=f"{prefix}-donor", user_type="donor")
+        ngos = User.objects.bulk_create([
+            User(username=f"{prefix}-ngo-{number}", user_type="ngo") for number in range(workers)
+        ])
+        try:
+            pickup_time = timezone.now() + timedelta(hours=2)
+            donations = Donation.objects.bulk_create([
+                Donation(donor=donor, title="Meals", pickup_time=pickup_time) for _ in range(count)
+            ])
+
+            distinct, distinct_seconds = self.claim_all(
+                [(ngos[number % workers], donation) for number, donation in enumerate(donations)], workers
+            )
+            if distinct != [200] * count:
+                raise CommandError(f"{count - distinct.count(200)} claims of distinct donations failed")
+
+            Donation.objects.filter(donor=donor).update(status="available", ngo=None)
+            contended, contended_seconds = self.claim_all(
+                [(ngos[number % workers], donations[0]) for number in range(count)], workers
+            )
+            if contended.count(200) != 1 or contended.count(409) != count - 1:
+                raise CommandError(f"Claims on one donation: {contended.count(200)} won, {contended.count(409)} lost")
+        finally:
+            DonationEvent.objects.filter(donation__donor=donor).delete()
+            User.objects.filter(username__startswith=prefix).delete()
+
+        for name, seconds in (("distinct", distinct_seconds), ("one", contended_seconds)):
+            self.stdout.write(
+                f"{name:>8}: {count} claims from {workers} clients in {seconds * 1000:.0f} ms, "
+                f"{count / seconds:.0f} claims/s"
+            )
+        self.stdout.write(self.style.SUCCESS("Exactly one claim on the shared donation won"))
+
+    def claim_all(self, requests, workers):
+        start = threading.Event()
+        view = DonationViewSet.as_view({"post": "claim"}, **DonationViewSet.claim.kwargs)
+        factory = APIRequestFactory()
+
+        def claim(request):
+            user, donation = request
+            http_request = factory.post(f"/api/donations/{donation.pk}/claim/")
+            force_authenticate(http_request, user)
+            start.wait()
+            try:
+                return view(http_request, pk=donation.pk).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            codes = pool.map(claim, requests)
+            started = time.perf_counter()
+            # the first `workers` requests are lined up, so they really race
+            start.set()
+            codes = list(codes)
+            return codes, time.perf_counter() - started
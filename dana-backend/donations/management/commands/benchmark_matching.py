@@ -0,0 +1,123 @@
+import math
+import random
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.geo import encode_geohash, haversine_km
+from donations.matching import Candidates, NGOProfile, recommend_many
+
+FOODS = ["rice", "bread", "vegetables", "fruit", "curry", "milk", "snacks", "biryani"]
+# city centres the synthetic donations and NGOs are spread around
+CITIES = [(13.08, 80.27), (12.97, 77.59), (19.08, 72.88), (28.61, 77.21), (22.57, 88.36)]
+CITY_SPREAD_DEGREES = 0.25
+
+
+class Command(BaseCommand):
+    help = (
+        "Rank synthetic in-memory donations for synthetic NGOs with "
+        "donations.matching.recommend_many and with a plain Python scoring "
+        "loop over a sample of the NGOs, check both agree and report the "
+        "throughput of each. Touches no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--donations", type=int, default=100_000)
+        parser.add_argument("--ngos", type=int, default=5_000)
+        parser.add_argument("-k", type=int, default=20)
+        parser.add_argument("--sample", type=int, default=20, help="NGOs ranked by the Python loop")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        now = time.time()
+        candidates, geohashes = self.make_donations(rng, options["donations"], now)
+        profiles = self.make_profiles(rng, options["ngos"])
+        self.stdout.write(f"{len(candidates.ids)} donations, {len(profiles)} NGOs, k={options['k']}")
+
+        loaded = []
+
+        def loader(cell):
+            loaded.append(cell)
+            mask = np.char.startswith(geohashes, cell)
+            return Candidates(*(column[mask] for column in candidates))
+
+        started = time.perf_counter()
+        results = recommend_many(profiles, options["k"], loader=loader, now=now)
+        vectorized = time.perf_counter() - started
+        self.stdout.write(
+            f"  numpy: {vectorized:.2f} s, {len(profiles) / vectorized:.0f} NGOs/s, "
+            f"{vectorized / len(profiles) * 1000:.2f} ms per NGO ({len(loaded)} cells loaded)"
+        )
+
+        sample = rng.sample(range(len(profiles)), min(options["sample"], len(profiles)))
+        started = time.perf_counter()
+        expected = [self.python_rank(profiles[index], candidates, options["k"], now) for index in sample]
+        baseline = time.perf_counter() - started
+        self.stdout.write(
+            f" python: {baseline / len(sample) * 1000:.0f} ms per NGO, "
+            f"~{baseline / len(sample) * len(profiles):.0f} s for all {len(profiles)} NGOs"
+        )
+        self.stdout.write(f"speedup: {baseline / len(sample) * len(profiles) / vectorized:.0f}x")
+
+        mismatches = [
+            index for index, ranked in zip(sample, expected)
+            if not np.allclose([score for _, score, _ in results[index]], [score for _, score in ranked])
+        ]
+        if mismatches:
+            raise CommandError(f"Scores disagree with the Python loop for NGOs {mismatches}")
+        self.stdout.write(self.style.SUCCESS("Top-k scores match the Python loop"))
+
+    def make_donations(self, rng, count, now):
+        lat, lng, expires_at, kg, food_type = [], [], [], [], []
+        for _ in range(count):
+            city_lat, city_lng = rng.choice(CITIES)
+            lat.append(city_lat + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES))
+            lng.append(city_lng + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES))
+            # a few already expired or without a known expiry
+            expires_at.append(math.inf if rng.random() < 0.05 else now + rng.uniform(-2, 72) * 3600)
+            kg.append(0.0 if rng.random() < 0.1 else rng.uniform(0.5, 80))
+            food_type.append(rng.choice(FOODS))
+        candidates = Candidates(
+            np.arange(1, count + 1, dtype=np.int64), np.array(lat), np.array(lng),
+            np.array(expires_at), np.array(kg), np.array(food_type, dtype=object),
+        )
+        geohashes = np.array([encode_geohash(a, b) for a, b in zip(lat, lng)])
+        return candidates, geohashes
+
+    def make_profiles(self, rng, count):
+        profiles = []
+        for _ in range(count):
+            city_lat, city_lng = rng.choice(CITIES)
+            affinity = {food: rng.random() for food in rng.sample(FOODS, 3)}
+            profiles.append(NGOProfile(
+                city_lat + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES),
+                city_lng + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES),
+                rng.choice([5.0, 10.0, 15.0]),
+                affinity,
+            ))
+        return profiles
+
+    def python_rank(self, profile, candidates, k, now):
+        """
+        The score of donations.matching.score(), one donation at a time.
+        """
+        weights = settings.MATCHING_WEIGHTS
+        cap = math.log1p(settings.MATCHING_QUANTITY_CAP_KG)
+        ranked = []
+        for donation_id, lat, lng, expires_at, kg, food_type in zip(*candidates):
+            distance = haversine_km(profile.lat, profile.lng, lat, lng)
+            hours_left = (expires_at - now) / 3600
+            if distance > profile.radius_km or hours_left <= 0:
+                continue
+            urgency = math.exp(-hours_left / settings.MATCHING_URGENCY_HOURS) if math.isfinite(hours_left) else 0.0
+            value = (
+                weights["distance"] * min(max(1 - distance / profile.radius_km, 0), 1)
+                + weights["urgency"] * urgency
+                + weights["quantity"] * min(max(math.log1p(kg) / cap, 0), 1)
+                + weights["history"] * profile.affinity.get(food_type, 0.0)
+            )
+            ranked.append((int(donation_id), value))
+        ranked.sort(key=lambda row: -row[1])
+        return ranked[:k]
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import LimitedStream
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from donations.models import DocumentUpload, NGOVerification
+from donations.uploads import discard_part
+from donations.views import complete_ngo_upload, ngo_upload_session, start_ngo_upload
+from users.models import User
+
+MB = 1024 * 1024
+
+
+class RepeatingReader:
+    """
+    A request body that serves the same block over and over, so the
+    benchmark itself holds one chunk in memory, not one per request.
+    """
+    def __init__(self, block, length):
+        self.block = block
+        self.remaining = length
+        self.position = 0
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        size = min(size, len(self.block) - self.position)
+        data = self.block[self.position:self.position + size]
+        self.position = (self.position + size) % len(self.block)
+        self.remaining -= size
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent resumable NGO document uploads through the chunk "
+        "views and report peak Python memory per upload in flight "
+        "(tracemalloc), next to what buffering whole files would cost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--size-mb", type=float, default=20)
+        parser.add_argument("--chunk-mb", type=float, default=4)
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        size = int(options["size_mb"] * MB)
+        chunk = int(options["chunk_mb"] * MB)
+        block = os.urandom(256 * 1024)
+        # the file is `block` repeated, so every worker knows its sha256
+        digest = hashlib.sha256()
+        for _ in range(size // len(block)):
+            digest.update(block)
+        digest.update(block[:size % len(block)])
+        self.sha256 = digest.hexdigest()
+
+        stamp = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create(username=f"upload-bench-{stamp}-{i}", email=f"upload-bench-{stamp}-{i}@example.com", user_type="ngo")
+            for i in range(concurrency)
+        ]
+        self.factory = APIRequestFactory()
+        try:
+            with override_settings(NGO_UPLOAD_MAX_CHUNK_SIZE=max(chunk, 8 * MB), NGO_UPLOAD_MAX_ACTIVE=10):
+                tracemalloc.start()
+                baseline = tracemalloc.get_traced_memory()[0]
+                started = time.perf_counter()
+                with ThreadPoolExecutor(concurrency) as pool:
+                    list(pool.map(lambda user: self.upload(user, block, size, chunk), users))
+                seconds = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                tracemalloc.stop()
+        finally:
+            for upload in DocumentUpload.objects.filter(user__in=users):
+                discard_part(upload)
+            for verification in NGOVerification.objects.filter(user__in=users):
+                verification.document.delete(save=False)
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        total = concurrency * size
+        self.stdout.write(
+            f"{concurrency} concurrent uploads of {size / MB:.1f} MB in {chunk / MB:.1f} MB chunks: "
+            f"{total / MB / seconds:.0f} MB/s\n"
+            f"peak Python memory {peak / MB:.2f} MB, {peak / concurrency / 1024:.0f} KB per upload "
+            f"(buffering whole files: {size / MB:.1f} MB per upload)"
+        )
+
+    def upload(self, user, block, size, chunk):
+        try:
+            request = self.factory.post("/api/auth/ngo-upload/sessions/", {"filename": "bench.pdf", "size": size}, format="json")
+            force_authenticate(request, user)
+            response = start_ngo_upload(request)
+            if response.status_code != 201:
+                raise CommandError(f"start failed: {response.data}")
+            pk = response.data["id"]
+
+            for start in range(0, size, chunk):
+                length = min(chunk, size - start)
+                request = self.factory.generic(
+                    "PUT", f"/api/auth/ngo-upload/sessions/{pk}/", b"",
+                    content_type="application/octet-stream",
+                    HTTP_CONTENT_RANGE=f"bytes {start}-{start + length - 1}/{size}",
+                )
+                request.META["CONTENT_LENGTH"] = str(length)
+                request._stream = LimitedStream(RepeatingReader(block, length), length)
+                force_authenticate(request, user)
+                response = ngo_upload_session(request, pk=pk)
+                if response.status_code != 200:
+                    raise CommandError(f"chunk at {start} failed: {response.data}")
+
+            request = self.factory.post(f"/api/auth/ngo-upload/sessions/{pk}/complete/", {"sha256": self.sha256}, format="json")
+            force_authenticate(request, user)
+            response = complete_ngo_upload(request, pk=pk)
+            if response.status_code != 201:
+                raise CommandError(f"complete failed: {response.data}")
+        finally:
+            connection.close()
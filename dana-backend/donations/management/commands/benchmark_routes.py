@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from donations.routes import RoutePlanner, Stop
+
+CITY = (13.08, 80.27)
+CITY_SPREAD_DEGREES = 0.05
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan synthetic pickup routes of 10 to 200 stops and compare the "
+        "pickup_time order, nearest neighbour alone, nearest neighbour + "
+        "2-opt within ROUTE_TIME_BUDGET_MS, and 2-opt run to completion. "
+        "Touches no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,25,50,100,200")
+        parser.add_argument("--instances", type=int, default=5, help="Random routes per size")
+        parser.add_argument("--minutes-per-stop", type=float, default=20, help="Pickup times spread over this much per stop")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        budget = settings.ROUTE_TIME_BUDGET_MS
+        self.stdout.write(
+            f"{'stops':>5} {'by time km':>10} {'nn km':>8} {'2-opt km':>9} {'full km':>8} "
+            f"{'late':>9} {'plan ms':>8} {'full ms':>8} {'done':>5}"
+        )
+        for size in [int(size) for size in options["sizes"].split(",")]:
+            rows = [self.run(rng, size, size * options["minutes_per_stop"] * 60, budget) for _ in range(options["instances"])]
+            column = lambda name: statistics.mean(row[name] for row in rows)
+            self.stdout.write(
+                f"{size:>5} {column('by_time'):>10.1f} {column('nn'):>8.1f} {column('planned'):>9.1f} "
+                f"{column('full'):>8.1f} {column('late_by_time'):>4.1f}/{column('late'):<4.1f} "
+                f"{column('plan_ms'):>8.1f} {column('full_ms'):>8.1f} "
+                f"{sum(row['complete'] for row in rows):>3}/{len(rows)}"
+            )
+        self.stdout.write(
+            "km are route lengths averaged over the instances; late is stops "
+            "past their window in pickup_time order / in the planned route; "
+            f"done counts plans whose 2-opt finished within {budget} ms."
+        )
+
+    def run(self, rng, size, span, budget):
+        start_time = time.time()
+        stops = []
+        for index in range(size):
+            earliest = start_time + rng.uniform(0, span)
+            stops.append(Stop(
+                index,
+                CITY[0] + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES),
+                CITY[1] + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES),
+                earliest,
+                earliest + settings.ROUTE_PICKUP_WINDOW_MINUTES * 60,
+            ))
+
+        started = time.perf_counter()
+        planner = RoutePlanner(stops, CITY[0], CITY[1], start_time)
+        route = planner.plan(budget)
+        plan_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        full = RoutePlanner(stops, CITY[0], CITY[1], start_time).plan(budget_ms=600_000)
+        full_ms = (time.perf_counter() - started) * 1000
+
+        by_time = sorted(range(size), key=lambda index: stops[index].earliest)
+        late_by_time, by_time_km, arrivals = planner.schedule(by_time)
+        _, nn_km, _ = planner.schedule(planner.nearest_neighbor())
+        _, _, planned_arrivals = planner.schedule(route.order)
+        return {
+            "by_time": by_time_km,
+            "nn": nn_km,
+            "planned": route.distance_km,
+            "full": full.distance_km,
+            "late_by_time": self.late_stops(stops, by_time, arrivals),
+            "late": self.late_stops(stops, route.order, planned_arrivals),
+            "plan_ms": plan_ms,
+            "full_ms": full_ms,
+            "complete": route.complete,
+        }
+
+    def late_stops(self, stops, order, arrivals):
+        return sum(1 for index, arrival in zip(order, arrivals) if arrival > stops[index].latest)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from donations.tasks import expire_donations
+
+
+class Command(BaseCommand):
+    help = "Expire available donations past their expiry date (for deployments without celery beat)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows per UPDATE")
+
+    def handle(self, *args, **options):
+        total = expire_donations(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {total} donations"))
@@ -0,0 +1,125 @@
+import asyncio
+import random
+import statistics
+import time
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from donations.consumers import DonationFeedConsumer
+from donations.geo import encode_geohash, haversine_km
+from donations.realtime import group_messages, send_group_messages
+from users.models import User
+
+# the area the query plan tests seed, roughly Chennai
+MIN_LAT, MAX_LAT = 12.8, 13.4
+MIN_LNG, MAX_LNG = 80.0, 80.5
+
+
+class LoadTestChannelLayer(InMemoryChannelLayer):
+    """
+    The in-memory layer sweeps every channel and group for expired entries
+    on each receive, which is quadratic with thousands of sockets and would
+    measure the test layer rather than the consumer. Sweep once a second.
+    """
+    swept_at = 0
+
+    def _clean_expired(self):
+        if time.time() - self.swept_at >= 1:
+            self.swept_at = time.time()
+            super()._clean_expired()
+
+
+class Command(BaseCommand):
+    help = (
+        "Connect thousands of in-process WebSocket subscribers to the donation "
+        "feed over an in-memory channel layer, broadcast donation events to "
+        "them in batches and report connect time, fan-out latency and whether "
+        "every subscriber got exactly the events in its area."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=3000)
+        parser.add_argument("--events", type=int, default=300)
+        parser.add_argument("--batch", type=int, default=50, help="Events per outbox batch")
+        parser.add_argument("--radius-km", type=float, default=5)
+
+    def handle(self, *args, **options):
+        layers = {"default": {"BACKEND": f"{__name__}.LoadTestChannelLayer", "CONFIG": {"capacity": 1000}}}
+        with override_settings(CHANNEL_LAYERS=layers):
+            asyncio.run(self.run(**options))
+
+    async def run(self, subscribers, events, batch, radius_km, **options):
+        rng = random.Random(0)
+        layer = get_channel_layer()
+        app = DonationFeedConsumer.as_asgi()
+        user = User(username="loadtest", user_type="ngo")
+
+        areas = [(rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LNG, MAX_LNG)) for _ in range(subscribers)]
+        started = time.perf_counter()
+        communicators = await asyncio.gather(*(self.subscribe(app, user, lat, lng, radius_km) for lat, lng in areas))
+        connect_seconds = time.perf_counter() - started
+        self.stdout.write(f"{subscribers} subscribers connected in {connect_seconds:.2f}s")
+
+        payloads = []
+        for i in range(events):
+            lat, lng = rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LNG, MAX_LNG)
+            payloads.append({
+                "event": "created", "id": i, "title": f"load test {i}", "food_type": "rice",
+                "quantity": "1 kg", "status": "available", "expiry_date": None,
+                "latitude": lat, "longitude": lng, "geohash": encode_geohash(lat, lng),
+            })
+
+        latencies = []
+        delivered = 0
+        for start in range(0, events, batch):
+            chunk = payloads[start:start + batch]
+            expected = [
+                sum(haversine_km(lat, lng, p["latitude"], p["longitude"]) <= radius_km for p in chunk)
+                for lat, lng in areas
+            ]
+            started = time.perf_counter()
+            await send_group_messages(layer, group_messages(chunk))
+            received = await asyncio.gather(*(
+                self.drain(communicator, count) for communicator, count in zip(communicators, expected)
+            ))
+            latencies.append(time.perf_counter() - started)
+            if received != expected:
+                wrong = sum(r != e for r, e in zip(received, expected))
+                raise CommandError(f"{wrong} subscribers got the wrong number of events")
+            delivered += sum(received)
+
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+        total = sum(latencies)
+        self.stdout.write(
+            f"{events} events in {len(latencies)} batches -> {delivered} deliveries in {total:.2f}s "
+            f"({delivered / total:.0f}/s)\n"
+            f"batch fan-out latency: p50 {statistics.median(latencies) * 1000:.0f}ms, "
+            f"max {max(latencies) * 1000:.0f}ms"
+        )
+        self.stdout.write(self.style.SUCCESS("Every subscriber got exactly the events in its area"))
+
+    async def subscribe(self, app, user, lat, lng, radius_km):
+        communicator = WebsocketCommunicator(app, "/ws/donations/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect(timeout=30)
+        if not connected:
+            raise CommandError("Subscriber was rejected")
+        await communicator.send_json_to({"action": "subscribe", "lat": lat, "lng": lng, "radius_km": radius_km})
+        reply = await communicator.receive_json_from(timeout=30)
+        if reply.get("type") != "subscribed":
+            raise CommandError(f"Subscribe failed: {reply}")
+        return communicator
+
+    async def drain(self, communicator, count):
+        received = 0
+        while received < count:
+            message = await communicator.receive_json_from(timeout=10)
+            received += len(message["events"])
+        # anything beyond the expected events would be a wrong delivery
+        if not await communicator.receive_nothing(timeout=0.01):
+            received += len((await communicator.receive_json_from())["events"])
+        return received
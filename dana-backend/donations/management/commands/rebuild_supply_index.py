@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from donations.supply import rebuild_supply_index
+
+
+class Command(BaseCommand):
+    help = "Recompute the available supply index (SupplyIndex) from the donations table."
+
+    def handle(self, *args, **options):
+        rows = rebuild_supply_index()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt supply index: {rows} food type / area rows"))
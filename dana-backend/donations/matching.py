@@ -0,0 +1,233 @@
+import logging
+from collections import defaultdict, namedtuple
+from datetime import datetime, time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .geo import EARTH_RADIUS_KM, covering_cells, prefix_lookup
+from .models import Donation
+from .response_cache import feed_cache
+
+logger = logging.getLogger(__name__)
+
+CELL_KEY_PREFIX = "donation-candidates:"
+
+# Available donations as aligned column arrays. expires_at is epoch
+# seconds (inf when unknown), kg the parsed quantity with servings
+# converted (0 when unknown).
+Candidates = namedtuple("Candidates", "ids lat lng expires_at kg food_type")
+# Who is asking: where, how far they go, and food_type -> affinity in [0, 1]
+NGOProfile = namedtuple("NGOProfile", "lat lng radius_km affinity")
+
+
+def empty_candidates():
+    return Candidates(
+        np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty(0), np.empty(0),
+        np.empty(0, dtype=object),
+    )
+
+
+def candidates_from_rows(rows):
+    """
+    Rows of (id, latitude, longitude, expiry_date, created_at,
+    min item estimated_expiry_hours, quantity_kg, quantity_servings, food_type).
+    A donation expires at the end of its expiry_date or when its shortest
+    lived item does, whichever comes first.
+    """
+    if not rows:
+        return empty_candidates()
+    tz = timezone.get_current_timezone()
+    kg_per_serving = settings.MATCHING_KG_PER_SERVING
+    expires_at, kg = [], []
+    for _, _, _, expiry_date, created_at, item_hours, quantity_kg, servings, _ in rows:
+        deadline = np.inf
+        if expiry_date is not None:
+            deadline = timezone.make_aware(datetime.combine(expiry_date, time.max), tz).timestamp()
+        if item_hours is not None and created_at is not None:
+            deadline = min(deadline, created_at.timestamp() + item_hours * 3600)
+        expires_at.append(deadline)
+        kg.append(quantity_kg if quantity_kg is not None else (servings or 0) * kg_per_serving)
+    columns = list(zip(*rows))
+    return Candidates(
+        np.array(columns[0], dtype=np.int64),
+        np.array(columns[1], dtype=float),
+        np.array(columns[2], dtype=float),
+        np.array(expires_at, dtype=float),
+        np.array(kg, dtype=float),
+        np.array([food_type or "" for food_type in columns[8]], dtype=object),
+    )
+
+
+def load_cell(cell):
+    rows = list(
+        Donation.objects
+        .filter(status="available", **prefix_lookup("location__geohash", cell))
+        .annotate(item_hours=Min("items__estimated_expiry_hours"))
+        .order_by()
+        .values_list(
+            "id", "location__latitude", "location__longitude", "expiry_date", "created_at",
+            "item_hours", "quantity_kg", "quantity_servings", "food_type",
+        )
+    )
+    return candidates_from_rows(rows)
+
+
+def cell_candidates(cell):
+    """
+    Candidates of one geohash cell, cached under the feed cache version so
+    any donation write retires them together with the cached feed pages.
+    """
+    version = feed_cache.version()
+    if version is None:
+        return load_cell(cell)
+    key = f"{CELL_KEY_PREFIX}{version}:{cell}"
+    try:
+        candidates = feed_cache.cache.get(key)
+    except Exception:
+        logger.warning("Donation candidate cache unavailable", exc_info=True)
+        return load_cell(cell)
+    if candidates is None:
+        candidates = load_cell(cell)
+        try:
+            feed_cache.cache.set(key, candidates, timeout=settings.MATCHING_CELL_CACHE_TIMEOUT)
+        except Exception:
+            logger.warning("Could not cache donation candidates", exc_info=True)
+    return candidates
+
+
+def concat_candidates(sets):
+    sets = [candidates for candidates in sets if len(candidates.ids)]
+    if not sets:
+        return empty_candidates()
+    if len(sets) == 1:
+        return sets[0]
+    return Candidates(*(np.concatenate(columns) for columns in zip(*sets)))
+
+
+def get_candidates(cells, loader=cell_candidates):
+    return concat_candidates([loader(cell) for cell in cells])
+
+
+def ngo_profile(user, lat=None, lng=None, radius_km=None):
+    """
+    The NGO's position and reach (request values win over its notification
+    preference) and its food type affinities: the share of its past
+    donations per food type, relative to its most collected one, with the
+    food types it asked to be notified about counting in full.
+    Returns None when no position is known.
+    """
+    from notifications.models import NotificationPreference
+
+    preference = NotificationPreference.objects.filter(user=user).first()
+    if lat is None or lng is None:
+        if preference is None:
+            return None
+        lat, lng = preference.latitude, preference.longitude
+    if radius_km is None:
+        radius_km = preference.radius_km if preference else settings.MATCHING_DEFAULT_RADIUS_KM
+
+    history = Donation.objects.filter(ngo=user).order_by().values("food_type").annotate(n=Count("id"))
+    most = max((row["n"] for row in history), default=0)
+    affinity = {row["food_type"] or "": row["n"] / most for row in history}
+    for food_type in preference.food_types if preference else []:
+        affinity[food_type] = 1.0
+    return NGOProfile(float(lat), float(lng), float(radius_km), affinity)
+
+
+def score(candidates, profiles, now):
+    """
+    (len(profiles), len(candidates)) matrices of match scores and distances
+    in km. Scores are a weighted sum of four terms in [0, 1] (closeness
+    within the NGO's radius, urgency, quantity, food type affinity);
+    donations out of reach or already expired score -inf.
+    """
+    weights = settings.MATCHING_WEIGHTS
+    lat1 = np.radians([profile.lat for profile in profiles])[:, None]
+    lng1 = np.radians([profile.lng for profile in profiles])[:, None]
+    radius = np.array([profile.radius_km for profile in profiles])[:, None]
+    lat2 = np.radians(candidates.lat)[None, :]
+    lng2 = np.radians(candidates.lng)[None, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    closeness = np.clip(1 - distance / radius, 0, 1)
+
+    # the same for every NGO, so one row that broadcasts
+    hours_left = (candidates.expires_at - now) / 3600
+    with np.errstate(over="ignore"):
+        urgency = np.where(np.isfinite(hours_left), np.exp(-np.maximum(hours_left, 0) / settings.MATCHING_URGENCY_HOURS), 0.0)
+    quantity = np.clip(np.log1p(candidates.kg) / np.log1p(settings.MATCHING_QUANTITY_CAP_KG), 0, 1)
+
+    food_types, food_index = np.unique(candidates.food_type.astype(str), return_inverse=True)
+    affinity = np.array([[profile.affinity.get(food_type, 0.0) for food_type in food_types] for profile in profiles])
+    history = affinity[:, food_index] if len(food_types) else np.zeros((len(profiles), 0))
+
+    scores = (
+        weights["distance"] * closeness
+        + weights["urgency"] * urgency[None, :]
+        + weights["quantity"] * quantity[None, :]
+        + weights["history"] * history
+    )
+    scores[(distance > radius) | (hours_left <= 0)[None, :]] = -np.inf
+    return scores, distance
+
+
+def top_k(scores, k):
+    """
+    Column indices of the k best finite scores per row, best first.
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(scores.shape[0])]
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    rows = np.arange(scores.shape[0])[:, None]
+    best = np.take_along_axis(best, np.argsort(-scores[rows, best], axis=1, kind="stable"), axis=1)
+    return [row[np.isfinite(scores[index, row])] for index, row in enumerate(best)]
+
+
+def recommend(profiles, candidates, k, now=None):
+    """
+    Top-k (donation id, score, distance_km) lists, one per profile, scored
+    against a shared candidate set. NGOs are scored in chunks sized so a
+    score matrix stays under MATCHING_BATCH_CELLS entries.
+    """
+    now = timezone.now().timestamp() if now is None else now
+    results = []
+    batch_size = max(1, settings.MATCHING_BATCH_CELLS // max(1, len(candidates.ids)))
+    for start in range(0, len(profiles), batch_size):
+        chunk = profiles[start:start + batch_size]
+        if not len(candidates.ids):
+            results.extend([] for _ in chunk)
+            continue
+        scores, distance = score(candidates, chunk, now)
+        for row, best in enumerate(top_k(scores, k)):
+            results.append([
+                (int(candidates.ids[column]), float(scores[row, column]), float(distance[row, column]))
+                for column in best
+            ])
+    return results
+
+
+def recommend_many(profiles, k, loader=cell_candidates, now=None):
+    """
+    recommend() for NGOs spread over the map: NGOs whose radius is
+    covered by the same cells share one candidate set and are scored
+    together; each cell is loaded once.
+    """
+    groups = defaultdict(list)
+    for index, profile in enumerate(profiles):
+        groups[tuple(covering_cells(profile.lat, profile.lng, profile.radius_km))].append(index)
+
+    loaded = {}
+    results = [None] * len(profiles)
+    for cells, indexes in groups.items():
+        for cell in cells:
+            if cell not in loaded:
+                loaded[cell] = loader(cell)
+        candidates = concat_candidates([loaded[cell] for cell in cells])
+        for index, result in zip(indexes, recommend([profiles[i] for i in indexes], candidates, k, now)):
+            results[index] = result
+    return results
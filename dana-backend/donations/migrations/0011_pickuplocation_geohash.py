@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+from donations.geo import encode_geohash
+
+
+def backfill_geohash(apps, schema_editor):
+    PickupLocation = apps.get_model('donations', 'PickupLocation')
+    batch = []
+    locations = PickupLocation.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for location in locations.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        location.geohash = encode_geohash(location.latitude, location.longitude)
+        batch.append(location)
+        if len(batch) >= 2000:
+            PickupLocation.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        PickupLocation.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0010_donation_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pickuplocation',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, null=True),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
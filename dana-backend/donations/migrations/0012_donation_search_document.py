@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS donation_search_fts_idx ON donations_donation "
+    "USING gin (to_tsvector('english'::regconfig, COALESCE(search_document, '')))",
+    # matches the UPPER(...) LIKE UPPER(...) that icontains compiles to
+    "CREATE INDEX IF NOT EXISTS donation_search_trgm_idx ON donations_donation "
+    "USING gin ((UPPER(search_document::text)) gin_trgm_ops)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS donation_search_trgm_idx",
+    "DROP INDEX IF EXISTS donation_search_fts_idx",
+]
+
+# FTS5 external-content table kept in sync with donations_donation by triggers
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS donations_donation_fts USING fts5("
+    "search_document, content='donations_donation', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS donations_donation_fts_ai AFTER INSERT ON donations_donation BEGIN "
+    "INSERT INTO donations_donation_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS donations_donation_fts_ad AFTER DELETE ON donations_donation BEGIN "
+    "INSERT INTO donations_donation_fts(donations_donation_fts, rowid, search_document) "
+    "VALUES ('delete', old.id, old.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS donations_donation_fts_au AFTER UPDATE OF search_document ON donations_donation BEGIN "
+    "INSERT INTO donations_donation_fts(donations_donation_fts, rowid, search_document) "
+    "VALUES ('delete', old.id, old.search_document); "
+    "INSERT INTO donations_donation_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+    "INSERT INTO donations_donation_fts(donations_donation_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS donations_donation_fts_au",
+    "DROP TRIGGER IF EXISTS donations_donation_fts_ad",
+    "DROP TRIGGER IF EXISTS donations_donation_fts_ai",
+    "DROP TABLE IF EXISTS donations_donation_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {"postgresql": postgres, "sqlite": sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def backfill_search_document(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    batch = []
+    donations = Donation.objects.select_related('location').only(
+        'id', 'title', 'food_type', 'description', 'location__address'
+    )
+    for donation in donations.iterator(chunk_size=2000):
+        address = donation.location.address if donation.location_id else None
+        parts = (donation.title, donation.food_type, donation.description, address)
+        donation.search_document = " ".join(str(part) for part in parts if part)
+        batch.append(donation)
+        if len(batch) >= 2000:
+            Donation.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Donation.objects.bulk_update(batch, ['search_document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0011_pickuplocation_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+from donations.quantities import parse_quantity
+from donations.supply import supply_rows
+
+QUANTITY_FIELDS = ['quantity_amount', 'quantity_unit', 'quantity_kg', 'quantity_servings']
+
+
+def backfill_quantities(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    batch = []
+    for row in Donation.objects.exclude(quantity=None).exclude(quantity='').only('id', 'quantity').iterator(chunk_size=2000):
+        row.quantity_amount, row.quantity_unit, row.quantity_kg, row.quantity_servings = parse_quantity(row.quantity)
+        batch.append(row)
+        if len(batch) >= 2000:
+            Donation.objects.bulk_update(batch, QUANTITY_FIELDS)
+            batch = []
+    if batch:
+        Donation.objects.bulk_update(batch, QUANTITY_FIELDS)
+
+
+def build_supply_index(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    SupplyIndex = apps.get_model('donations', 'SupplyIndex')
+    SupplyIndex.objects.bulk_create([SupplyIndex(**row) for row in supply_rows(Donation.objects.all())], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0017_documentupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='quantity_amount',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='quantity_kg',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='quantity_servings',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='quantity_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SupplyIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_type', models.CharField(blank=True, default='', max_length=100)),
+                ('cell', models.CharField(blank=True, default='', max_length=12)),
+                ('donations', models.IntegerField(default=0)),
+                ('kg', models.FloatField(default=0)),
+                ('servings', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cell'], name='supplyindex_cell_idx')],
+                'constraints': [models.UniqueConstraint(fields=('food_type', 'cell'), name='supplyindex_food_type_cell_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_quantities, migrations.RunPython.noop),
+        migrations.RunPython(build_supply_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0018_donation_quantity_supplyindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_address', models.CharField(max_length=512, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('backend', models.CharField(max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        # Existing rows stay NULL, which the unique constraint ignores, until
+        # `manage.py dedupe_pickup_locations` merges their duplicates
+        migrations.AddField(
+            model_name='pickuplocation',
+            name='normalized_address',
+            field=models.CharField(blank=True, editable=False, max_length=512, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='pickuplocation',
+            constraint=models.UniqueConstraint(fields=('normalized_address',), name='pickuplocation_normalized_address_uniq'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0019_pickuplocation_normalized_address_geocodecache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='donation',
+            name='donation_expiry_idx',
+        ),
+        migrations.AlterField(
+            model_name='donation',
+            name='donor',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'user_type': 'donor'}, on_delete=django.db.models.deletion.CASCADE, related_name='donations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='donation',
+            name='ngo',
+            field=models.ForeignKey(blank=True, db_index=False, limit_choices_to={'user_type': 'ngo'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donations_collected', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='donation',
+            name='recipient',
+            field=models.ForeignKey(blank=True, db_index=False, limit_choices_to={'user_type': 'recipient'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donations_received', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Q
+
+from donations.quantities import parse_quantity
+from donations.supply import supply_rows
+
+QUANTITY_FIELDS = ['quantity_amount', 'quantity_unit', 'quantity_kg', 'quantity_servings']
+
+
+def reparse(model):
+    # only text the parser reads differently now: digit groups and dozens
+    rows = model.objects.filter(Q(quantity__contains=',') | Q(quantity__icontains='dozen')).only('id', 'quantity')
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        row.quantity_amount, row.quantity_unit, row.quantity_kg, row.quantity_servings = parse_quantity(row.quantity)
+        batch.append(row)
+        if len(batch) >= 2000:
+            model.objects.bulk_update(batch, QUANTITY_FIELDS)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, QUANTITY_FIELDS)
+
+
+def reparse_quantities(apps, schema_editor):
+    Donation = apps.get_model('donations', 'Donation')
+    SupplyIndex = apps.get_model('donations', 'SupplyIndex')
+    reparse(Donation)
+    reparse(apps.get_model('items', 'FoodItem'))
+    SupplyIndex.objects.all().delete()
+    SupplyIndex.objects.bulk_create([SupplyIndex(**row) for row in supply_rows(Donation.objects.all())], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0021_donationevent_delivery'),
+        ('items', '0002_fooditem_quantity_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse_quantities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models.functions import Substr
+
+
+def backfill_cells(apps, schema_editor):
+    # Locations already deduplicated by address alone keep their coordinates'
+    # cell (PICKUP_LOCATION_CELL_PRECISION); the rest are keyed by
+    # `dedupe_pickup_locations`
+    PickupLocation = apps.get_model('donations', 'PickupLocation')
+    PickupLocation.objects.filter(normalized_address__isnull=False, geohash__isnull=False).update(
+        cell=Substr('geohash', 1, 7),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0022_reparse_quantities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pickuplocation',
+            name='cell',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_cells, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='pickuplocation',
+            name='pickuplocation_normalized_address_uniq',
+        ),
+        migrations.AddConstraint(
+            model_name='pickuplocation',
+            constraint=models.UniqueConstraint(fields=('normalized_address', 'cell'), name='pickuplocation_address_cell_uniq'),
+        ),
+    ]
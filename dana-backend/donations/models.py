@@ -1,15 +1,69 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.conf import settings
 from users.models import User
+from .addresses import normalize_address
+from .geo import encode_geohash
+from .quantities import parse_quantity
 
 class PickupLocation(models.Model):
     address = models.CharField(max_length=512)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # spatial index for nearby searches, kept in sync with lat/lng on save
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
+    # one location per address (donations.addresses) and cell, kept in sync on
+    # save. NULL for blank addresses and rows `dedupe_pickup_locations` hasn't seen yet
+    normalized_address = models.CharField(max_length=512, null=True, blank=True, editable=False)
+    # geohash cell of the coordinates the location was keyed with, "" if it
+    # came without any (donations.locations). Not moved by later geocoding
+    cell = models.CharField(max_length=12, blank=True, default="", editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["normalized_address", "cell"], name="pickuplocation_address_cell_uniq"),
+        ]
 
     def __str__(self):
         return self.address[:50]
 
+    def update_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = encode_geohash(float(self.latitude), float(self.longitude))
+
+    def update_normalized_address(self):
+        self.normalized_address = normalize_address(self.address) or None
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        self.update_normalized_address()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        if update_fields is not None and "address" in update_fields:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"normalized_address"}
+        super().save(*args, **kwargs)
+
+
+class GeocodeCache(models.Model):
+    """
+    Geocoder answers per normalized address, misses included, so each
+    address goes to the backend once (donations.geocoding).
+    """
+    normalized_address = models.CharField(max_length=512, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    backend = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        found = f"{self.latitude}, {self.longitude}" if self.latitude is not None else "not found"
+        return f"{self.normalized_address[:50]}: {found}"
+
+
 class Donation(models.Model):
     STATUS_CHOICES = (
         ('available','Available'),
@@ -19,9 +73,10 @@ class Donation(models.Model):
         ('completed', 'Completed'),
         ('expired', 'Expired'),
     )
-    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='donations', limit_choices_to={'user_type': 'donor'})
-    ngo = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='donations_collected', limit_choices_to={'user_type': 'ngo'})
-    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='donations_received', limit_choices_to={'user_type': 'recipient'})
+    # no single-column indexes: the composite ones in Meta lead with these
+    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='donations', limit_choices_to={'user_type': 'donor'}, db_index=False)
+    ngo = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='donations_collected', limit_choices_to={'user_type': 'ngo'}, db_index=False)
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='donations_received', limit_choices_to={'user_type': 'recipient'}, db_index=False)
 
     food_type = models.CharField(max_length=100, null=True, blank=True)
     title = models.CharField(max_length=255)
@@ -29,16 +84,214 @@ class Donation(models.Model):
     expiry_date = models.DateField(null=True, blank=True)
     location = models.ForeignKey(PickupLocation, on_delete=models.SET_NULL, null=True)
     quantity = models.CharField(max_length=100, null=True, blank=True)
+    # `quantity` parsed on save (donations/quantities.py), null when unknown
+    quantity_amount = models.FloatField(null=True, blank=True, editable=False)
+    quantity_unit = models.CharField(max_length=20, blank=True, default="", editable=False)
+    quantity_kg = models.FloatField(null=True, blank=True, editable=False)
+    quantity_servings = models.FloatField(null=True, blank=True, editable=False)
 
     pickup_time = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     images = models.JSONField(blank=True, null=True)  # stored as list of S3 URLs
+    # denormalized text behind ?search=, indexed per database in migration 0012
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # backs the feed ordering and keyset pagination
+            models.Index(fields=["-created_at", "-id"], name="donation_created_id_idx"),
+            # the default feed: available donations, newest first
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="donation_available_feed_idx",
+                condition=models.Q(status="available"),
+            ),
+            models.Index(fields=["status", "-created_at", "-id"], name="donation_status_created_idx"),
+            # an NGO's claimed / picked up / completed lists
+            models.Index(fields=["ngo", "status"], name="donation_ngo_status_idx"),
+            models.Index(fields=["donor", "-created_at", "-id"], name="donation_donor_created_idx"),
+            models.Index(fields=["recipient", "status"], name="donation_recipient_status_idx"),
+            # the expiry sweeper's scan and expiry-ordered feeds
+            models.Index(fields=["status", "expiry_date"], name="donation_status_expiry_idx"),
+            # delta sync and Last-Modified
+            models.Index(fields=["updated_at", "id"], name="donation_updated_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.food_type} by {self.donor.username} ({self.status})"
-    
+
+    SEARCH_SOURCE_FIELDS = {"title", "food_type", "description", "location"}
+    QUANTITY_FIELDS = {"quantity_amount", "quantity_unit", "quantity_kg", "quantity_servings"}
+    # what the row contributes to SupplyIndex
+    SUPPLY_SOURCE_FIELDS = {"status", "food_type", "location", "quantity"}
+
+    def update_search_document(self):
+        address = self.location.address if self.location_id else None
+        parts = (self.title, self.food_type, self.description, address)
+        self.search_document = " ".join(str(part) for part in parts if part)
+
+    def update_quantity(self):
+        (self.quantity_amount, self.quantity_unit,
+         self.quantity_kg, self.quantity_servings) = parse_quantity(self.quantity)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remembered so save() can tell a status change apart (None if deferred)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_status = self.__dict__.get("status")
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or self.SEARCH_SOURCE_FIELDS & set(update_fields):
+            self.update_search_document()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"search_document"}
+
+        if update_fields is None or "quantity" in update_fields:
+            self.update_quantity()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(kwargs["update_fields"]) | self.QUANTITY_FIELDS
+
+        adding = self._state.adding
+        previous_status = getattr(self, "_loaded_status", None)
+        status_saved = update_fields is None or "status" in update_fields
+        supply_saved = update_fields is None or bool(self.SUPPLY_SOURCE_FIELDS & set(update_fields))
+
+        # The outbox row commits or rolls back together with the change itself
+        with transaction.atomic():
+            if supply_saved:
+                # Imported late: supply queries SupplyIndex, defined below
+                from .supply import available_supply, update_supply
+                before = {} if adding else available_supply(Donation.objects.filter(pk=self.pk))
+            super().save(*args, **kwargs)
+            if supply_saved:
+                update_supply(before, available_supply(Donation.objects.filter(pk=self.pk)))
+            if adding:
+                DonationEvent.record(self, "created", to_status=self.status)
+            elif status_saved and previous_status is not None and self.status != previous_status:
+                DonationEvent.record(
+                    self, "status_changed",
+                    from_status=previous_status,
+                    to_status=self.status,
+                    actor=getattr(self, "event_actor", None),
+                )
+        self._loaded_status = self.status
+
+
+class SupplyIndex(models.Model):
+    """
+    Available supply per food type and area (geohash cell of
+    SUPPLY_INDEX_PRECISION), kept up to date by deltas on every write that
+    changes what an available donation contributes (donations/supply.py),
+    so dashboards read totals without scanning donations.
+    """
+    food_type = models.CharField(max_length=100, blank=True, default="")
+    cell = models.CharField(max_length=12, blank=True, default="")  # "" for no location
+    donations = models.IntegerField(default=0)
+    kg = models.FloatField(default=0)
+    servings = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["food_type", "cell"], name="supplyindex_food_type_cell_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["cell"], name="supplyindex_cell_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.food_type or '-'} in {self.cell or '-'}: {self.donations} donations, {self.kg:g} kg, {self.servings:g} servings"
+
+
+class DonationEvent(models.Model):
+    """
+    Transactional outbox of donation lifecycle events. Rows are written in
+    the same transaction as the change and relayed to consumers afterwards
+    by donations.outbox, so delivery is at-least-once and requests never
+    wait on the broker. Events still failing after DONATION_OUTBOX_MAX_ATTEMPTS
+    get `failed_at` and are left alone until requeued from the admin.
+    """
+    EVENT_CHOICES = (
+        ("created", "Created"),
+        ("status_changed", "Status changed"),
+    )
+    # no FK constraint: events outlive deleted donations
+    donation = models.ForeignKey(
+        Donation, on_delete=models.DO_NOTHING, db_constraint=False, related_name="events"
+    )
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    from_status = models.CharField(max_length=20, null=True, blank=True)
+    to_status = models.CharField(max_length=20, null=True, blank=True)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    # DONATION_EVENT_CONSUMERS paths that already took the event
+    delivered_to = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    leased_until = models.DateTimeField(null=True, blank=True)  # a relay run owns it until then
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the relay only ever scans the pending tail
+            models.Index(
+                fields=["id"], name="donationevent_unpublished_idx",
+                condition=models.Q(published_at__isnull=True, failed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} donation {self.donation_id} {self.from_status or ''}→{self.to_status or ''}"
+
+    @classmethod
+    def record(cls, donation, event_type, from_status=None, to_status=None, actor=None):
+        event = cls.objects.create(
+            donation_id=donation.pk,
+            event_type=event_type,
+            from_status=from_status,
+            to_status=to_status,
+            actor=actor if getattr(actor, "is_authenticated", False) else None,
+        )
+        transaction.on_commit(request_relay)
+        return event
+
+    @classmethod
+    def record_bulk(cls, donation_ids, event_type, from_status=None, to_status=None, actor=None):
+        """
+        Outbox rows for a set-based UPDATE that bypassed save().
+        """
+        cls.objects.bulk_create([
+            cls(donation_id=donation_id, event_type=event_type, from_status=from_status, to_status=to_status, actor=actor)
+            for donation_id in donation_ids
+        ], batch_size=1000)
+        transaction.on_commit(request_relay)
+
+
+class DonationTombstone(models.Model):
+    """
+    Ids of deleted donations, so delta sync (/api/donations/changes/) can
+    tell clients what to drop. Pruned after DONATION_TOMBSTONE_RETENTION_DAYS.
+    """
+    donation_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"donation {self.donation_id} deleted {self.deleted_at}"
+
+
+def request_relay():
+    # Imported late: the relay pulls in consumers that import these models
+    from .outbox import request_relay as kick_relay
+    kick_relay()
+
 
 class NGOVerification(models.Model):
     STATUS_CHOICES = [
@@ -59,4 +312,35 @@ class NGOVerification(models.Model):
     
 
     def __str__(self):
-        return f"{self.user.email} - {self.status}"
\ No newline at end of file
+        return f"{self.user.email} - {self.status}"
+
+
+class DocumentUpload(models.Model):
+    """
+    A resumable, chunked upload of an NGO verification document. Chunks are
+    appended to a part file under NGO_UPLOAD_DIR (see donations.uploads);
+    the part file's length is the authoritative offset.
+    """
+    STATUS_CHOICES = (
+        ("active", "Active"),
+        ("complete", "Complete"),
+        ("expired", "Expired"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="document_uploads")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="active")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # the expiry sweep
+            models.Index(fields=["status", "updated_at"], name="documentupload_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}) by {self.user_id}"
@@ -0,0 +1,169 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DonationEvent
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "donation-outbox:last-run"
+RELAYED_KEY = "donation-outbox:relayed"
+KICK_KEY = "donation-outbox:kick"
+
+_consumers = None
+
+
+def get_consumers():
+    """
+    Callables from DONATION_EVENT_CONSUMERS, by path; each gets a list of
+    DonationEvents and must tolerate seeing an event more than once.
+    """
+    global _consumers
+    if _consumers is None:
+        _consumers = {path: import_string(path) for path in settings.DONATION_EVENT_CONSUMERS}
+    return _consumers
+
+
+def claim_batch(batch_size):
+    """
+    Lease the oldest pending events to this run. The row locks only last
+    for the claim; the lease keeps other runs off the events while the
+    consumers are called, and lets them retry once it runs out.
+    """
+    now = timezone.now()
+    leased_until = now + timedelta(seconds=settings.DONATION_OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        events = list(
+            DonationEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True, failed_at__isnull=True)
+            .filter(Q(leased_until__isnull=True) | Q(leased_until__lt=now))
+            .order_by("id")[:batch_size]
+        )
+        if events:
+            DonationEvent.objects.filter(id__in=[event.id for event in events]).update(
+                leased_until=leased_until, attempts=F("attempts") + 1,
+            )
+    for event in events:
+        event.leased_until = leased_until
+        event.attempts += 1
+    return events
+
+
+def deliver(path, consumer, events):
+    """
+    Ids of the events `consumer` took. A failing batch is retried one event
+    at a time, so a single bad event doesn't hold back the others.
+    """
+    try:
+        consumer(events)
+        return {event.id for event in events}
+    except Exception:
+        if len(events) == 1:
+            logger.exception(f"Outbox consumer {path} failed on event {events[0].id}")
+            return set()
+        logger.warning(f"Outbox consumer {path} failed on {len(events)} events, retrying them one by one", exc_info=True)
+    delivered = set()
+    for event in events:
+        delivered |= deliver(path, consumer, [event])
+    return delivered
+
+
+def relay_batch(batch_size):
+    """
+    Hand a batch of pending events to every consumer that doesn't have them
+    yet, outside of any transaction, then record who took what. Events all
+    consumers took are published; the rest are retried once their lease
+    runs out, up to DONATION_OUTBOX_MAX_ATTEMPTS. Returns the batch size.
+    """
+    events = claim_batch(batch_size)
+    if not events:
+        return 0
+    consumers = get_consumers()
+    delivered = {event.id: set(event.delivered_to) for event in events}
+    for path, consumer in consumers.items():
+        pending = [event for event in events if path not in delivered[event.id]]
+        if pending:
+            for event_id in deliver(path, consumer, pending):
+                delivered[event_id].add(path)
+
+    now = timezone.now()
+    outcomes = defaultdict(list)
+    for event in events:
+        if delivered[event.id] >= set(consumers):
+            outcome = "published"
+        elif event.attempts >= settings.DONATION_OUTBOX_MAX_ATTEMPTS:
+            outcome = "failed"
+        else:
+            outcome = "retry"
+        outcomes[outcome, tuple(sorted(delivered[event.id]))].append(event.id)
+    for (outcome, done), ids in outcomes.items():
+        # a run that outlived its lease leaves the events to the run that took them over
+        DonationEvent.objects.filter(id__in=ids, leased_until=events[0].leased_until).update(
+            delivered_to=list(done),
+            published_at=now if outcome == "published" else None,
+            failed_at=now if outcome == "failed" else None,
+        )
+        if outcome == "failed":
+            logger.error(f"Giving up on {len(ids)} donation events: {ids}")
+    return len(events)
+
+
+def relay(batch_size=None, max_batches=None):
+    batch_size = batch_size or settings.DONATION_OUTBOX_BATCH_SIZE
+    max_batches = max_batches or settings.DONATION_OUTBOX_MAX_BATCHES
+    started = time.perf_counter()
+    total = 0
+
+    try:
+        for _ in range(max_batches):
+            relayed = relay_batch(batch_size)
+            total += relayed
+            if relayed < batch_size:
+                break
+    finally:
+        seconds = time.perf_counter() - started
+        if total:
+            cache.add(RELAYED_KEY, 0, timeout=None)
+            cache.incr(RELAYED_KEY, total)
+        cache.set(STATS_KEY, {
+            "at": timezone.now().isoformat(),
+            "events": total,
+            "seconds": round(seconds, 4),
+            "events_per_second": round(total / seconds, 1) if seconds else None,
+        }, timeout=None)
+    return total
+
+
+def request_relay():
+    """
+    Ask for a relay run right after a commit instead of waiting for beat.
+    Coalesced to one task per second, and never raises: the scheduled run
+    picks the events up if the broker is down.
+    """
+    from .tasks import relay_donation_events
+    try:
+        if cache.add(KICK_KEY, 1, timeout=1):
+            relay_donation_events.delay()
+    except Exception:
+        logger.warning("Could not request an outbox relay run", exc_info=True)
+
+
+def outbox_stats():
+    pending = DonationEvent.objects.filter(published_at__isnull=True, failed_at__isnull=True)
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+    return {
+        "backlog": pending.count(),
+        "failed": DonationEvent.objects.filter(failed_at__isnull=False).count(),
+        "lag_seconds": round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0,
+        "relayed_total": cache.get(RELAYED_KEY, 0),
+        "last_run": cache.get(STATS_KEY),
+    }
@@ -0,0 +1,80 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class DonationPagination(LimitOffsetPagination):
+    """
+    `?limit=&offset=` as usual, or keyset pagination on (created_at, id)
+    when a `?cursor=` is sent (an empty cursor starts at the newest page).
+    Only the donation feed paginates; other endpoints return plain lists.
+
+    Keyset pages seek straight to the position through the
+    (created_at, id) index, so page 500 costs the same as page 1,
+    and rows inserted while scrolling do not shift the window.
+    """
+    default_limit = 20
+    max_limit = 100
+    cursor_query_param = "cursor"
+    keyset_ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.keyset_ordering)
+
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # One extra row tells us whether there is a next page without a COUNT
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            "next": self.get_next_cursor_link(),
+            "results": data,
+        })
+
+    def get_next_cursor_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    @staticmethod
+    def encode_cursor(donation):
+        payload = json.dumps({"c": donation.created_at.isoformat(), "i": donation.pk})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created_at = parse_datetime(payload["c"])
+            pk = int(payload["i"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Invalid cursor")
+        if created_at is None:
+            raise NotFound("Invalid cursor")
+        return created_at, pk
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .transitions import TRANSITIONS, is_allowed_actor
+
 class IsDonorOrReadOnly(permissions.BasePermission):
     """
     Donors can create donations.
@@ -30,13 +32,12 @@ class IsNGOCanClaim(permissions.BasePermission):
 class IsNGOCanClaimOrComplete(permissions.BasePermission):
     """
     NGOs can claim available donations and mark them completed.
+    Who may make which status change comes from donations.transitions;
+    moves the table doesn't know are rejected by the view with a 400.
     """
     def has_object_permission(self, request, view, obj):
-        if request.method == "PATCH":
-            new_status = request.data.get("status")
-            if new_status == "claimed":
-                return request.user.user_type == "ngo"
-            if new_status == "completed":
-                # Only the NGO who claimed it can complete
-                return request.user.user_type == "ngo" and obj.ngo == request.user
-        return True
\ No newline at end of file
+        new_status = request.data.get("status")
+        if request.method in ("PUT", "PATCH") and new_status and new_status != obj.status:
+            rule = TRANSITIONS.get((obj.status, new_status))
+            return rule is None or is_allowed_actor(rule, obj, request.user)
+        return True
@@ -0,0 +1,86 @@
+import re
+from collections import namedtuple
+
+Quantity = namedtuple("Quantity", "amount unit kg servings")
+UNKNOWN = Quantity(None, "", None, None)
+
+# alias -> (unit, kg per unit, servings per unit). Litres count as kg
+# (close enough for food); count units (boxes, trays...) have no weight.
+UNITS = {}
+for aliases, unit, kg, servings in [
+    (("kg", "kgs", "kilo", "kilos", "kilogram", "kilograms"), "kg", 1.0, None),
+    (("g", "gm", "gms", "gr", "gram", "grams"), "g", 0.001, None),
+    (("lb", "lbs", "pound", "pounds"), "lb", 0.45359237, None),
+    (("l", "ltr", "ltrs", "litre", "litres", "liter", "liters"), "l", 1.0, None),
+    (("ml", "millilitre", "millilitres", "milliliter", "milliliters"), "ml", 0.001, None),
+    (("serving", "servings", "meal", "meals", "plate", "plates", "portion", "portions",
+      "person", "persons", "people", "pax"), "serving", None, 1.0),
+    (("box", "boxes"), "box", None, None),
+    (("pack", "packs", "packet", "packets", "pkt", "pkts"), "pack", None, None),
+    (("tray", "trays"), "tray", None, None),
+    (("bag", "bags", "sack", "sacks"), "bag", None, None),
+    (("bottle", "bottles"), "bottle", None, None),
+    (("can", "cans", "tin", "tins"), "can", None, None),
+    (("loaf", "loaves"), "loaf", None, None),
+    (("piece", "pieces", "pc", "pcs", "nos", "no", "units", "unit"), "piece", None, None),
+]:
+    for alias in aliases:
+        UNITS[alias] = (unit, kg, servings)
+
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "dozen": 12}
+
+# "1,000 g" is a thousand grams, "1,5 kg" one and a half kilos
+DIGIT_GROUP_RE = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+# "5 kg", "2.5kg", "1/2 kg", "5-6 boxes" (lower bound), "a dozen eggs", "two trays"
+QUANTITY_RE = re.compile(
+    r"(?P<amount>\d+(?:[.,]\d+)?(?:\s*/\s*\d+)?|\b(?:%s)\b)"
+    r"(?:\s*(?:-|to)\s*\d+(?:[.,]\d+)?)?"
+    r"\s*(?P<dozen>dozens?\b)?\s*(?P<unit>[a-z]+)?" % "|".join(WORD_NUMBERS),
+    re.IGNORECASE,
+)
+
+
+def parse_amount(text):
+    text = text.lower().replace(",", ".")
+    if text in WORD_NUMBERS:
+        return float(WORD_NUMBERS[text])
+    if "/" in text:
+        numerator, denominator = (float(part) for part in text.split("/"))
+        return numerator / denominator if denominator else None
+    return float(text)
+
+
+def parse_quantity(text):
+    """
+    Normalize a free-text quantity ("2 boxes", "5 kg", "10 meals") into
+    (amount, unit, kg, servings). kg/servings are None when the unit can't
+    be converted; unparseable text gives UNKNOWN.
+    """
+    if not text:
+        return UNKNOWN
+    match = QUANTITY_RE.search(DIGIT_GROUP_RE.sub("", str(text)))
+    if match is None:
+        return UNKNOWN
+    amount = parse_amount(match["amount"])
+    if amount is None:
+        return UNKNOWN
+    if match["dozen"]:
+        amount *= 12
+    # "dozen eggs" and "two dozen eggs" both count pieces
+    dozens = bool(match["dozen"]) or match["amount"].lower() == "dozen"
+
+    word = (match["unit"] or "").lower()
+    if word in UNITS:
+        unit, kg, servings = UNITS[word]
+    elif dozens:
+        unit, kg, servings = "piece", None, None
+    else:
+        unit, kg, servings = "", None, None
+    return Quantity(
+        amount,
+        unit,
+        amount * kg if kg is not None else None,
+        amount * servings if servings is not None else None,
+    )
@@ -0,0 +1,80 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .models import Donation
+
+GROUP_PREFIX = "donations"
+
+
+def cell_group(cell):
+    return f"{GROUP_PREFIX}.cell.{cell}"
+
+
+def status_group(status):
+    return f"{GROUP_PREFIX}.status.{status}"
+
+
+def event_payloads(events):
+    """
+    What subscribers get for each DonationEvent: the event name
+    ("created" or the new status) and a compact donation.
+    """
+    rows = {
+        row["id"]: row for row in Donation.objects.filter(pk__in={event.donation_id for event in events}).values(
+            "id", "title", "food_type", "quantity", "expiry_date",
+            "location__latitude", "location__longitude", "location__geohash",
+        )
+    }
+    payloads = []
+    for event in events:
+        row = rows.get(event.donation_id)
+        if row is None:  # deleted since
+            continue
+        payloads.append({
+            "event": "created" if event.event_type == "created" else event.to_status,
+            "id": row["id"],
+            "title": row["title"],
+            "food_type": row["food_type"],
+            "quantity": row["quantity"],
+            "status": event.to_status,
+            "expiry_date": row["expiry_date"].isoformat() if row["expiry_date"] else None,
+            "latitude": row["location__latitude"],
+            "longitude": row["location__longitude"],
+            "geohash": row["location__geohash"] or None,
+        })
+    return payloads
+
+
+def group_messages(payloads):
+    """
+    One message per group: every status group, plus the area cells at each
+    of REALTIME_CELL_PRECISIONS, gets the batch of payloads that fall in it.
+    """
+    groups = defaultdict(list)
+    for payload in payloads:
+        groups[status_group(payload["status"])].append(payload)
+        if payload["geohash"]:
+            for precision in settings.REALTIME_CELL_PRECISIONS:
+                groups[cell_group(payload["geohash"][:precision])].append(payload)
+    return {group: {"type": "donation.events", "events": batch} for group, batch in groups.items()}
+
+
+async def send_group_messages(layer, messages):
+    await asyncio.gather(*(layer.group_send(group, message) for group, message in messages.items()))
+
+
+def broadcast_donation_events(events):
+    """
+    Donation outbox consumer: push events to WebSocket subscribers
+    (donations.consumers.DonationFeedConsumer) through the channel layer.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    payloads = event_payloads(events)
+    if payloads:
+        async_to_sync(send_group_messages)(layer, group_messages(payloads))
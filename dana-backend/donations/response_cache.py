@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "donation-feed:version"
+KEY_PREFIX = "donation-feed:"
+
+
+class ResponseCache:
+    """
+    Rendered JSON responses of the donation list/detail routes, keyed by the
+    query shape (path, sorted query params, media type) and a version number.
+
+    Nothing is deleted on writes: any change to a donation, its location,
+    items or users bumps the version, which orphans every cached response
+    at once and lets them expire. ETags are hashes of the body, so clients
+    still get 304s when a bump didn't change what they are looking at;
+    Last-Modified comes from the view (donations.sync.feed_last_modified
+    for lists, updated_at for a single donation).
+    """
+    def __init__(self):
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "bumps": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.DONATION_CACHE_ALIAS]
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def version(self):
+        # A cache outage only costs the caching, never the request
+        try:
+            self.cache.add(VERSION_KEY, 1, timeout=None)
+            return self.cache.get(VERSION_KEY) or 1
+        except Exception:
+            logger.warning("Donation feed cache unavailable", exc_info=True)
+            return None
+
+    def bump(self):
+        try:
+            self.cache.add(VERSION_KEY, 1, timeout=None)
+            self.cache.incr(VERSION_KEY)
+        except Exception:
+            logger.warning("Could not bump the donation feed cache version", exc_info=True)
+        self._count("bumps")
+
+    def invalidate(self):
+        """
+        Bump once the current transaction commits, so no request can cache
+        the old rows under the new version.
+        """
+        transaction.on_commit(self.bump)
+
+    def key(self, request, version):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        shape = f"{request.path}?{query}|{request.accepted_media_type}"
+        return f"{KEY_PREFIX}v{version}:{hashlib.sha256(shape.encode()).hexdigest()}"
+
+    def get(self, key):
+        try:
+            entry = self.cache.get(key)
+        except Exception:
+            logger.warning("Donation feed cache read failed for %s", key, exc_info=True)
+            entry = None
+        self._count("hits" if entry is not None else "misses")
+        return entry
+
+    def set(self, key, response, last_modified=None):
+        entry = {
+            "content": response.content,
+            "content_type": response["Content-Type"],
+            "etag": quote_etag(hashlib.md5(response.content).hexdigest()),
+            "last_modified": int(last_modified.timestamp()) if last_modified else None,
+        }
+        if key is None:
+            return entry
+        try:
+            self.cache.set(key, entry, settings.DONATION_CACHE_TIMEOUT)
+        except Exception:
+            logger.warning("Donation feed cache write failed for %s", key, exc_info=True)
+        return entry
+
+    def respond(self, request, entry, response=None, status="HIT"):
+        """
+        The response for a cached `entry`: 304 if the client's
+        If-None-Match / If-Modified-Since says it already has it,
+        otherwise `response` or one rebuilt from the entry.
+        """
+        if response is None:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        if entry.get("last_modified"):
+            response["Last-Modified"] = http_date(entry["last_modified"])
+        response["X-Cache"] = status
+        conditional = get_conditional_response(
+            request, etag=entry["etag"], last_modified=entry.get("last_modified"), response=response
+        )
+        if conditional is not response:
+            self._count("not_modified")
+        return conditional
+
+    def store(self, request, key, response, last_modified=None):
+        """
+        Cache a freshly rendered 200 (unless `key` is None) and answer it
+        like a hit would be.
+        """
+        if response.status_code != 200:
+            return response
+        response.render()
+        entry = self.set(key, response, last_modified)
+        return self.respond(request, entry, response, status="MISS" if key else "BYPASS")
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["version"] = self.version()
+        return stats
+
+
+feed_cache = ResponseCache()
@@ -0,0 +1,228 @@
+import time
+from collections import namedtuple
+from datetime import datetime, time as day_end
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .geo import EARTH_RADIUS_KM
+
+# One pickup: where, and the window (epoch seconds) it should start in.
+# latest is inf when the donation gives no deadline.
+Stop = namedtuple("Stop", "id lat lng earliest latest")
+# visit order (indexes into the stops), arrival times, leg distances in km
+Route = namedtuple("Route", "order arrivals legs distance_km late_seconds complete")
+
+
+def donation_stop(donation):
+    """
+    Pickup window of a claimed donation: from its pickup_time until
+    ROUTE_PICKUP_WINDOW_MINUTES later, cut short by the end of its
+    expiry_date.
+    """
+    earliest = donation.pickup_time.timestamp()
+    latest = earliest + settings.ROUTE_PICKUP_WINDOW_MINUTES * 60
+    if donation.expiry_date is not None:
+        expiry = datetime.combine(donation.expiry_date, day_end.max)
+        latest = max(earliest, min(latest, timezone.make_aware(expiry).timestamp()))
+    location = donation.location
+    return Stop(donation.pk, location.latitude, location.longitude, earliest, latest)
+
+
+def distance_matrix(lat, lng):
+    """
+    Haversine distances in km between every pair of points.
+    """
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lng = np.radians(np.asarray(lng, dtype=float))
+    a = (
+        np.sin((lat[None, :] - lat[:, None]) / 2) ** 2
+        + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lng[None, :] - lng[:, None]) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class RoutePlanner:
+    """
+    Orders pickups on a precomputed distance matrix. Point 0 is where the
+    NGO starts; stop i is point i + 1. Waiting for a window to open is
+    allowed, arriving after it closes counts as late.
+    """
+
+    def __init__(self, stops, start_lat, start_lng, start_time):
+        self.stops = stops
+        self.start_time = start_time
+        self.distance = distance_matrix(
+            [start_lat] + [stop.lat for stop in stops],
+            [start_lng] + [stop.lng for stop in stops],
+        )
+        self.travel = self.distance / settings.ROUTE_SPEED_KMH * 3600
+        self.earliest = np.array([stop.earliest for stop in stops], dtype=float)
+        self.latest = np.array([stop.latest for stop in stops], dtype=float)
+        self.service = settings.ROUTE_STOP_MINUTES * 60
+        # plain lists for the schedule walks, numpy scalars are slow to index
+        self.travel_rows = self.travel.tolist()
+        self.earliest_list = self.earliest.tolist()
+        self.latest_list = self.latest.tolist()
+
+    def schedule(self, order):
+        """
+        (late seconds, distance km, arrivals) of visiting `order` in turn.
+        """
+        clock, point, late, distance = self.start_time, 0, 0.0, 0.0
+        arrivals = []
+        for stop in order:
+            distance += self.distance[point, stop + 1]
+            clock = max(clock + self.travel[point, stop + 1], self.earliest[stop])
+            late += max(clock - self.latest[stop], 0.0)
+            arrivals.append(clock)
+            clock += self.service
+            point = stop + 1
+        return late, distance, arrivals
+
+    def departures(self, order):
+        """
+        (clock, late seconds so far) after leaving each stop of `order`,
+        from which a changed route can be rescheduled.
+        """
+        travel, earliest, latest = self.travel_rows, self.earliest_list, self.latest_list
+        clock, point, late = self.start_time, 0, 0.0
+        states = []
+        for stop in order:
+            clock = max(clock + travel[point][stop + 1], earliest[stop])
+            late += max(clock - latest[stop], 0.0)
+            clock += self.service
+            point = stop + 1
+            states.append((clock, late))
+        return states
+
+    def reversal_late(self, order, i, end, states, limit):
+        """
+        Late seconds of `order` with order[i..end] reversed, or None as soon
+        as it passes `limit`. The stops before i are unchanged; once the
+        route is back on the old path no later than before, the rest of it
+        cannot get any later, so the walk stops there.
+        """
+        travel, earliest, latest = self.travel_rows, self.earliest_list, self.latest_list
+        clock, late = states[i - 1] if i else (self.start_time, 0.0)
+        point = order[i - 1] + 1 if i else 0
+        for position in range(end, i - 1, -1):
+            stop = order[position]
+            clock += travel[point][stop + 1]
+            if clock < earliest[stop]:
+                clock = earliest[stop]
+            elif clock > latest[stop]:
+                late += clock - latest[stop]
+                if late > limit:
+                    return None
+            clock += self.service
+            point = stop + 1
+        for position in range(end + 1, len(order)):
+            stop = order[position]
+            clock += travel[point][stop + 1]
+            if clock < earliest[stop]:
+                clock = earliest[stop]
+            elif clock > latest[stop]:
+                late += clock - latest[stop]
+                if late > limit:
+                    return None
+            clock += self.service
+            point = stop + 1
+            old_clock, old_late = states[position]
+            if clock <= old_clock and late <= old_late:
+                return late + states[-1][1] - old_late
+        return late
+
+    def nearest_neighbor(self):
+        """
+        Greedy order: from wherever the NGO is, the stop it can start
+        soonest among those still reachable in their window; when none is,
+        the one it would be least late for.
+        """
+        unvisited = np.ones(len(self.stops), dtype=bool)
+        clock, point, order = self.start_time, 0, []
+        for _ in range(len(self.stops)):
+            arrival = np.maximum(clock + self.travel[point, 1:], self.earliest)
+            late = arrival - self.latest
+            on_time = unvisited & (late <= 0)
+            if on_time.any():
+                stop = int(np.argmin(np.where(on_time, arrival, np.inf)))
+            else:
+                stop = int(np.argmin(np.where(unvisited, late, np.inf)))
+            order.append(stop)
+            unvisited[stop] = False
+            clock, point = arrival[stop] + self.service, stop + 1
+        return order
+
+    def two_opt(self, order, deadline):
+        """
+        Reverse segments of `order` while that shortens the route without
+        making it any later. Distance deltas of every move from a given
+        start are computed at once on the matrix, along with a lower bound on
+        the lateness they cause; only shortening moves within that bound get
+        their schedule checked. Stops at `deadline` (perf_counter time).
+        Returns (order, finished).
+        """
+        order = list(order)
+        late, _, _ = self.schedule(order)
+        n = len(order)
+        improved = True
+        while improved:
+            improved = False
+            states = self.departures(order)
+            for i in range(n - 1):
+                if time.perf_counter() > deadline:
+                    return order, False
+                points = np.array(order) + 1
+                before = points[i - 1] if i else 0
+                j = np.arange(i + 1, n)
+                after = np.append(points[i + 2:], -1)
+                # reversing order[i..j] swaps edges (before, i) + (j, after)
+                # for (before, j) + (i, after); the last stop has no after
+                has_after = after >= 0
+                delta = (
+                    self.distance[before, points[j]] - self.distance[before, points[i]]
+                    + np.where(has_after, self.distance[points[i], after] - self.distance[points[j], after], 0.0)
+                )
+                # order[i] now comes after order[j]: at least that late
+                bound = np.maximum(self.earliest[points[j] - 1] + self.service - self.latest[points[i] - 1], 0)
+                prefix_late = states[i - 1][1] if i else 0.0
+                delta[prefix_late + bound > late + 1e-6] = np.inf
+                for index in np.argsort(delta):
+                    if delta[index] >= -1e-9:
+                        break
+                    end = i + 1 + int(index)
+                    if self.reversal_late(order, i, end, states, late + 1e-6) is not None:
+                        order = order[:i] + order[i:end + 1][::-1] + order[end + 1:]
+                        states = self.departures(order)
+                        late = states[-1][1]
+                        improved = True
+                        break
+        return order, True
+
+    def plan(self, budget_ms=None):
+        budget_ms = settings.ROUTE_TIME_BUDGET_MS if budget_ms is None else budget_ms
+        deadline = time.perf_counter() + budget_ms / 1000
+        order = self.nearest_neighbor()
+        order, complete = self.two_opt(order, deadline)
+        late, distance, arrivals = self.schedule(order)
+        points = [0] + [stop + 1 for stop in order]
+        legs = [float(self.distance[a, b]) for a, b in zip(points, points[1:])]
+        return Route(order, arrivals, legs, float(distance), float(late), complete)
+
+
+def plan_route(stops, start_lat=None, start_lng=None, start_time=None, budget_ms=None):
+    """
+    Near-optimal visit order for `stops`: time-windowed nearest neighbour,
+    then 2-opt until the time budget (ROUTE_TIME_BUDGET_MS) runs out.
+    Without a start position the route starts at the stop whose window
+    opens first.
+    """
+    start_time = timezone.now().timestamp() if start_time is None else start_time
+    if not stops:
+        return Route([], [], [], 0.0, 0.0, True)
+    if start_lat is None or start_lng is None:
+        first = min(stops, key=lambda stop: stop.earliest)
+        start_lat, start_lng = first.lat, first.lng
+    return RoutePlanner(stops, start_lat, start_lng, start_time).plan(budget_ms)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import DonationFeedConsumer
+
+websocket_urlpatterns = [
+    path("ws/donations/", DonationFeedConsumer.as_asgi()),
+]
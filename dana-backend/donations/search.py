@@ -0,0 +1,102 @@
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_CONFIG = "english"
+SQLITE_FTS_TABLE = "donations_donation_fts"
+
+# the triggers of migration 0012 that keep the FTS5 table in sync
+SQLITE_FTS_TRIGGERS = {
+    "donations_donation_fts_ai":
+        "CREATE TRIGGER IF NOT EXISTS donations_donation_fts_ai AFTER INSERT ON donations_donation BEGIN "
+        "INSERT INTO donations_donation_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+    "donations_donation_fts_ad":
+        "CREATE TRIGGER IF NOT EXISTS donations_donation_fts_ad AFTER DELETE ON donations_donation BEGIN "
+        "INSERT INTO donations_donation_fts(donations_donation_fts, rowid, search_document) "
+        "VALUES ('delete', old.id, old.search_document); END",
+    "donations_donation_fts_au":
+        "CREATE TRIGGER IF NOT EXISTS donations_donation_fts_au AFTER UPDATE OF search_document ON donations_donation BEGIN "
+        "INSERT INTO donations_donation_fts(donations_donation_fts, rowid, search_document) "
+        "VALUES ('delete', old.id, old.search_document); "
+        "INSERT INTO donations_donation_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+}
+
+
+def ensure_sqlite_fts_triggers(using="default", **kwargs):
+    """
+    post_migrate: SQLite alters a table by copying it into a new one, which
+    drops its triggers, so any migration that rebuilds donations_donation
+    silently stops the FTS5 sync. Recreate missing triggers and rebuild the
+    index they missed.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if SQLITE_FTS_TABLE not in connection.introspection.table_names(cursor):
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        missing = set(SQLITE_FTS_TRIGGERS) - {name for name, in cursor.fetchall()}
+        if not missing:
+            return
+        for name in sorted(missing):
+            cursor.execute(SQLITE_FTS_TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def sqlite_match_expression(term):
+    # Quote every token so user input can't use FTS5 query syntax,
+    # and let the last one match as a prefix while the user is typing
+    tokens = ['"%s"' % token.replace('"', '""') for token in term.split()]
+    if tokens:
+        tokens[-1] += "*"
+    return " ".join(tokens)
+
+
+class DonationSearchFilter(filters.SearchFilter):
+    """
+    `?search=` over Donation.search_document (title, food type, description
+    and pickup address), ranked by relevance unless `?ordering=` is given.
+
+    PostgreSQL matches against a GIN-indexed tsvector and falls back to the
+    trigram index for partial words; SQLite (development) filters through
+    the FTS5 table kept in sync by triggers and lists matches newest first.
+    Other databases fall back to the plain `search_fields` scan.
+    """
+    def filter_queryset(self, request, queryset, view):
+        term = " ".join(self.get_search_terms(request))
+        if not term:
+            return queryset
+
+        if connection.vendor == "postgresql":
+            return self.postgres_search(queryset, term)
+        if connection.vendor == "sqlite":
+            return self.sqlite_search(queryset, term)
+        return super().filter_queryset(request, queryset, view)
+
+    def postgres_search(self, queryset, term):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        # Must match the expression of donation_search_fts_idx to use it
+        vector = SearchVector("search_document", config=FTS_CONFIG)
+        query = SearchQuery(term, config=FTS_CONFIG, search_type="websearch")
+        return (
+            queryset
+            .alias(search_vector=vector)
+            .annotate(search_rank=SearchRank(vector, query))
+            .filter(Q(search_vector=query) | Q(search_document__icontains=term))
+            .order_by("-search_rank", "-created_at", "-id")
+        )
+
+    def sqlite_search(self, queryset, term):
+        match = sqlite_match_expression(term)
+        if not match:
+            return queryset
+        # Newest first rather than by bm25: a correlated rank lookup re-runs
+        # the MATCH for every matching row
+        return (
+            queryset
+            .filter(id__in=RawSQL(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s", [match]))
+            .order_by("-created_at", "-id")
+        )
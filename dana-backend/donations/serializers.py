@@ -1,21 +1,60 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
-from .models import Donation, PickupLocation, NGOVerification
+from .models import Donation, DocumentUpload, DonationEvent, PickupLocation, NGOVerification
+from items.models import FoodItem
 from items.serializers import FoodItemSerializer
 from users.serializers import UserSerializer
 from users.models import User
+from dana.serializers import DynamicFieldsMixin
+from .images import thumbnail_url
+from .locations import get_or_create_location
+
 
-class PickupLocationSerializer(serializers.ModelSerializer):
+class PickupLocationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PickupLocation
         fields = ["id", "address", "latitude", "longitude"]
 
 
-class DonationSerializer(serializers.ModelSerializer):
+class ThumbnailField(serializers.ReadOnlyField):
+    """
+    First image of a donation, for feed cards: its thumbnail, or a
+    placeholder while it is still being processed.
+    """
+    def to_representation(self, value):
+        return thumbnail_url(value[0]) if value else None
+
+
+class DonationImagesField(serializers.ReadOnlyField):
+    """
+    Donation.images without the pipeline's bookkeeping: thumbnail and
+    WebP variants per image, placeholders until they are processed.
+    """
+    def to_representation(self, value):
+        images = []
+        for entry in value or []:
+            if isinstance(entry, dict):
+                entry = {
+                    "id": entry["id"],
+                    "status": entry["status"],
+                    "thumbnail": thumbnail_url(entry),
+                    "variants": entry.get("variants", {}),
+                }
+            images.append(entry)
+        return images
+
+
+class DonationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     donor = UserSerializer(read_only=True)
     ngo = UserSerializer(read_only=True)
     recipient = UserSerializer(read_only=True)
     items = FoodItemSerializer(many=True, required=False)
     location = PickupLocationSerializer(required=False, allow_null=True)
+    images = DonationImagesField()
+    image = ThumbnailField(source="images")
 
     recipient_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.filter(user_type="recipient"),
@@ -26,7 +65,7 @@ class DonationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Donation
-        fields = "__all__"
+        exclude = ["search_document"]
 
     def create(self, validated_data):
         # Extract location from either nested dict or flattened keys
@@ -51,18 +90,118 @@ class DonationSerializer(serializers.ModelSerializer):
                 }
 
         location = None
-        if location_data:
-            location = PickupLocation.objects.create(**location_data)
-
-        # Create donation instance
-        donation = Donation.objects.create(
-            donor=request.user,
-            location=location,
-            **validated_data
-        )
+        if isinstance(location_data, PickupLocation):
+            location = location_data
+        elif location_data:
+            location = get_or_create_location(**location_data)
+
+        items_data = validated_data.pop("items", None)
+        with transaction.atomic():
+            # Create donation instance
+            donation = Donation.objects.create(
+                donor=request.user,
+                location=location,
+                **validated_data
+            )
+            if items_data:
+                self.save_items(donation, items_data, existing={})
 
         return donation
 
+    def update(self, instance, validated_data):
+        items_data = validated_data.pop("items", None)
+        if "location" in validated_data:
+            location_data = validated_data.pop("location")
+            validated_data["location"] = (
+                location_data if isinstance(location_data, PickupLocation) or not location_data
+                else get_or_create_location(**location_data)
+            )
+        with transaction.atomic():
+            # Only write what the request changed: a stale copy of status or
+            # ngo must not undo a claim made since the instance was read
+            for name, value in validated_data.items():
+                setattr(instance, name, value)
+            instance.save(update_fields=[*validated_data, "updated_at"])
+            if items_data is not None:
+                self.save_items(instance, items_data)
+        instance.refresh_from_db(fields=["status", "ngo", "recipient"])
+        return instance
+
+    def validate_items(self, value):
+        ids = [item["id"] for item in value if "id" in item]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Each item can only be listed once.")
+        if ids:
+            known = set(self.instance.items.values_list("id", flat=True)) if self.instance else set()
+            unknown = sorted(set(ids) - known)
+            if unknown:
+                raise serializers.ValidationError(f"Unknown item ids: {unknown}")
+        return value
+
+    def save_items(self, donation, items_data, existing=None):
+        """
+        Make the donation's items match `items_data`: rows with an id update
+        that item, rows without one are new, and items left out are deleted.
+        One bulk_update, one bulk_create and one delete whatever the count.
+        """
+        if existing is None:
+            existing = {item.pk: item for item in donation.items.all()}
+
+        to_create, to_update, changed_fields = [], [], set()
+        for data in items_data:
+            data = dict(data)
+            item = existing.pop(data.pop("id", None), None)
+            if item is None:
+                item = FoodItem(donation=donation, **data)
+                item.update_quantity()
+                to_create.append(item)
+                continue
+            changed = {name for name, value in data.items() if getattr(item, name) != value}
+            for name in changed:
+                setattr(item, name, data[name])
+            if "quantity" in changed:
+                item.update_quantity()
+                changed |= FoodItem.QUANTITY_FIELDS
+            if changed:
+                to_update.append(item)
+                changed_fields |= changed
+
+        # Bulk writes skip FoodItem's signals; the donation was saved just
+        # before, which already bumps updated_at and the feed cache. The
+        # delete goes through the collector so post_delete receivers still run.
+        if existing:
+            FoodItem.objects.filter(pk__in=list(existing)).delete()
+        if to_update:
+            FoodItem.objects.bulk_update(to_update, sorted(changed_fields), batch_size=500)
+        if to_create:
+            FoodItem.objects.bulk_create(to_create, batch_size=500)
+
+
+
+class DonationListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact representation for feed cards (`?view=compact`). Relations render
+    as ids unless named in `?expand=`.
+    """
+    thumbnail = ThumbnailField(source="images")
+    latitude = serializers.FloatField(source="location.latitude", read_only=True, allow_null=True)
+    longitude = serializers.FloatField(source="location.longitude", read_only=True, allow_null=True)
+
+    class Meta:
+        model = Donation
+        fields = [
+            "id", "title", "food_type", "status", "expiry_date", "quantity",
+            "thumbnail", "latitude", "longitude",
+            "donor", "ngo", "recipient", "location", "created_at",
+        ]
+        read_only_fields = fields
+        expandable_fields = {
+            "donor": (UserSerializer, {}),
+            "ngo": (UserSerializer, {}),
+            "recipient": (UserSerializer, {}),
+            "location": (PickupLocationSerializer, {}),
+            "items": (FoodItemSerializer, {"many": True}),
+        }
 
 
 class NGOVerificationSerializer(serializers.ModelSerializer):
@@ -71,5 +210,37 @@ class NGOVerificationSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "document", "status", "submitted_at", "reviewed_at"]
         read_only_fields = ["user", "submitted_at", "reviewed_at"]
 
-    
 
+class DonationEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DonationEvent
+        fields = ["id", "event_type", "from_status", "to_status", "actor", "created_at"]
+
+
+class DonationTransitionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Donation.STATUS_CHOICES)
+    recipient_id = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(user_type="recipient"),
+        source="recipient",
+        required=False,
+    )
+
+
+class DocumentUploadSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source="received", read_only=True)
+
+    class Meta:
+        model = DocumentUpload
+        fields = ["id", "filename", "size", "sha256", "offset", "status", "created_at"]
+        read_only_fields = ["status", "created_at"]
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.NGO_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Documents must be between 1 byte and {settings.NGO_UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        if value and not re.fullmatch(r"[0-9a-fA-F]{64}", value):
+            raise serializers.ValidationError("Expected a hex sha256 digest.")
+        return value.lower()
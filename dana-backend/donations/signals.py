@@ -1,11 +1,20 @@
 import logging
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import Donation
-from users.models import NGOVerification
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver, Signal
+from django.utils import timezone
+from .models import Donation, DonationTombstone, PickupLocation
+from .response_cache import feed_cache
+from .supply import available_supply, remove_supply, update_supply
+from items.models import FoodItem
+from users.models import NGOVerification, User
 
 logger = logging.getLogger(__name__)
 
+# Sent once per bulk UPDATE, which bypasses post_save. Args: donation_ids
+donations_expired = Signal()
+# Sent once per bulk insert (donations/bulk.py), ditto. Args: donation_ids
+donations_created = Signal()
+
 
 @receiver(post_save, sender=Donation)
 def donation_status_logger(sender, instance, created, **kwargs):
@@ -23,9 +32,86 @@ def donation_status_logger(sender, instance, created, **kwargs):
             logger.info(f"Donation expired: {instance.food_type} (ID: {instance.id})")
 
 
+@receiver(donations_expired)
+def donations_expired_logger(sender, donation_ids, **kwargs):
+    logger.info(f"Donations expired: {len(donation_ids)} (IDs: {donation_ids[0]}..{donation_ids[-1]})")
+
+
+@receiver(donations_created)
+def donations_created_logger(sender, donation_ids, **kwargs):
+    if donation_ids:
+        logger.info(f"Donations created in bulk: {len(donation_ids)} (IDs: {donation_ids[0]}..{donation_ids[-1]})")
+
+
+@receiver(post_save, sender=PickupLocation)
+def refresh_donation_search_documents(sender, instance, created, **kwargs):
+    # The pickup address is part of Donation.search_document
+    if created:
+        return
+    donations = list(Donation.objects.filter(location=instance).select_related("location"))
+    now = timezone.now()
+    for donation in donations:
+        donation.update_search_document()
+        donation.updated_at = now  # the nested location changed, so delta sync must resend it
+    Donation.objects.bulk_update(donations, ["search_document", "updated_at"], batch_size=500)
+
+
+@receiver(pre_save, sender=PickupLocation)
+@receiver(pre_delete, sender=PickupLocation)
+def remember_location_supply(sender, instance, **kwargs):
+    # Moving or deleting a location moves its donations to another area cell
+    if instance.pk is None:
+        return
+    donations = Donation.objects.filter(location_id=instance.pk)
+    instance._supply_donation_ids = list(donations.values_list("id", flat=True))
+    instance._supply_before = available_supply(donations) if instance._supply_donation_ids else {}
+
+
+@receiver(post_save, sender=PickupLocation)
+@receiver(post_delete, sender=PickupLocation)
+def update_location_supply(sender, instance, **kwargs):
+    ids = getattr(instance, "_supply_donation_ids", None)
+    if ids:
+        update_supply(instance._supply_before, available_supply(Donation.objects.filter(pk__in=ids)))
+
+
+@receiver(pre_delete, sender=Donation)
+def remove_deleted_donation_supply(sender, instance, **kwargs):
+    remove_supply(Donation.objects.filter(pk=instance.pk, status="available"))
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+def touch_donation_on_item_change(sender, instance, **kwargs):
+    # Items are nested in the donation, so delta sync must resend it
+    Donation.objects.filter(pk=instance.donation_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Donation)
+def record_donation_tombstone(sender, instance, **kwargs):
+    DonationTombstone.objects.create(donation_id=instance.pk)
+
+
 @receiver(post_save, sender=NGOVerification)
 def ngo_verification_logger(sender, instance, created, **kwargs):
     if created:
         logger.info(f"NGO verification submitted by {instance.user.username} (ID: {instance.id})")
     elif instance.verified:
         logger.info(f"NGO verified: {instance.user.username} (ID: {instance.id})")
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+@receiver(post_save, sender=PickupLocation)
+@receiver(post_delete, sender=PickupLocation)
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+@receiver(post_save, sender=User)  # donors/NGOs are nested in the responses
+@receiver(donations_created)
+def invalidate_feed_cache(sender, **kwargs):
+    feed_cache.invalidate()
+
+
+@receiver(donations_expired)
+def invalidate_feed_cache_after_expiry(sender, **kwargs):
+    feed_cache.bump()
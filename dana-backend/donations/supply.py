@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce, Substr
+from django.utils import timezone
+
+from .models import Donation, SupplyIndex
+
+
+def contributions(queryset):
+    """
+    What the rows of a donation queryset add to SupplyIndex, whatever their
+    status: {(food_type, cell): (donations, kg, servings)}. One grouped query.
+    """
+    rows = (
+        queryset.order_by()
+        .annotate(
+            supply_food_type=Coalesce("food_type", Value("")),
+            supply_cell=Coalesce(Substr("location__geohash", 1, settings.SUPPLY_INDEX_PRECISION), Value("")),
+        )
+        .values("supply_food_type", "supply_cell")
+        .annotate(
+            supply_donations=Count("id"),
+            supply_kg=Coalesce(Sum("quantity_kg"), Value(0.0), output_field=FloatField()),
+            supply_servings=Coalesce(Sum("quantity_servings"), Value(0.0), output_field=FloatField()),
+        )
+    )
+    return {
+        (row["supply_food_type"], row["supply_cell"]): (row["supply_donations"], row["supply_kg"], row["supply_servings"])
+        for row in rows
+    }
+
+
+def available_supply(queryset):
+    return contributions(queryset.filter(status="available"))
+
+
+def update_supply(before, after):
+    """
+    Apply the difference between two contributions() results to SupplyIndex
+    with relative UPDATEs, so concurrent writers don't overwrite each other.
+    """
+    for key in before.keys() | after.keys():
+        old = before.get(key, (0, 0.0, 0.0))
+        new = after.get(key, (0, 0.0, 0.0))
+        delta = tuple(n - o for n, o in zip(new, old))
+        if any(delta):
+            apply_delta(key, *delta)
+
+
+def add_supply(queryset):
+    update_supply({}, contributions(queryset))
+
+
+def remove_supply(queryset):
+    update_supply(contributions(queryset), {})
+
+
+def move_supply(donation_ids, from_status, to_status):
+    """
+    For set-based status UPDATEs that bypass save(). Call after the UPDATE,
+    in its transaction: the rows are locked, so what they contribute can't
+    change underneath.
+    """
+    if (from_status == "available") != (to_status == "available"):
+        queryset = Donation.objects.filter(pk__in=donation_ids)
+        if to_status == "available":
+            add_supply(queryset)
+        else:
+            remove_supply(queryset)
+
+
+def apply_delta(key, donations, kg, servings):
+    food_type, cell = key
+    changes = {
+        "donations": F("donations") + donations,
+        "kg": F("kg") + kg,
+        "servings": F("servings") + servings,
+        "updated_at": timezone.now(),
+    }
+    rows = SupplyIndex.objects.filter(food_type=food_type, cell=cell)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SupplyIndex.objects.create(food_type=food_type, cell=cell, donations=donations, kg=kg, servings=servings)
+    except IntegrityError:
+        # someone else created the row first
+        rows.update(**changes)
+
+
+def supply_rows(queryset):
+    """
+    SupplyIndex field values for a from-scratch build over `queryset`.
+    Takes a queryset so migrations can pass their historical model.
+    """
+    return [
+        {"food_type": food_type, "cell": cell, "donations": donations, "kg": kg, "servings": servings}
+        for (food_type, cell), (donations, kg, servings) in contributions(queryset.filter(status="available")).items()
+    ]
+
+
+def rebuild_supply_index():
+    """
+    Recompute SupplyIndex from the donations table, dropping any drift
+    (float rounding, writes that bypassed the hooks).
+    """
+    with transaction.atomic():
+        SupplyIndex.objects.all().delete()
+        rows = SupplyIndex.objects.bulk_create(
+            [SupplyIndex(**row) for row in supply_rows(Donation.objects.all())], batch_size=1000
+        )
+    return len(rows)
@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .exceptions import CursorExpired
+from .models import Donation, DonationTombstone
+
+
+def encode_cursor(position):
+    payload = {
+        "s": position["synced_at"].isoformat(),
+        "u": position["updated_at"].isoformat() if position["updated_at"] else None,
+        "i": position["id"],
+        "t": position["tombstone_id"],
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position = {
+            "synced_at": parse_datetime(payload["s"]),
+            "updated_at": parse_datetime(payload["u"]) if payload["u"] else None,
+            "id": int(payload["i"]),
+            "tombstone_id": int(payload["t"]),
+        }
+    except (TypeError, ValueError, KeyError):
+        raise ValidationError({"since": "Invalid cursor"})
+    if position["synced_at"] is None or timezone.is_naive(position["synced_at"]):
+        raise ValidationError({"since": "Invalid cursor"})
+    return position
+
+
+def get_changes(queryset, since, limit):
+    """
+    Donations created or updated and ids deleted after the `since` cursor
+    (everything if it is empty), oldest change first.
+
+    Rows are read in (updated_at, id) order up to a horizon a few seconds
+    in the past, so a transaction that commits late with an older
+    updated_at is still picked up by the next sync instead of skipped.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.DONATION_CHANGES_LAG_SECONDS)
+    if since:
+        position = decode_cursor(since)
+        if position["synced_at"] < now - timedelta(days=settings.DONATION_TOMBSTONE_RETENTION_DAYS):
+            raise CursorExpired()
+    else:
+        position = {"updated_at": None, "id": 0, "tombstone_id": None}
+
+    changed = queryset.filter(updated_at__lte=horizon).order_by("updated_at", "id")
+    if position["updated_at"] is not None:
+        changed = changed.filter(
+            Q(updated_at__gt=position["updated_at"]) | Q(updated_at=position["updated_at"], id__gt=position["id"])
+        )
+    changed = list(changed[:limit + 1])
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+
+    tombstones = DonationTombstone.objects.filter(deleted_at__lte=horizon)
+    if position["tombstone_id"] is None:
+        # a full sync has nothing to drop, just start after the newest tombstone
+        last_tombstone = tombstones.aggregate(last=Max("id"))["last"] or 0
+        deleted = []
+    else:
+        rows = list(
+            tombstones.filter(id__gt=position["tombstone_id"])
+            .order_by("id").values_list("id", "donation_id")[:limit + 1]
+        )
+        has_more = has_more or len(rows) > limit
+        rows = rows[:limit]
+        last_tombstone = rows[-1][0] if rows else position["tombstone_id"]
+        deleted = [donation_id for _, donation_id in rows]
+
+    last = changed[-1] if changed else None
+    cursor = encode_cursor({
+        "synced_at": now,
+        "updated_at": last.updated_at if last else position["updated_at"],
+        "id": last.pk if last else position["id"],
+        "tombstone_id": last_tombstone,
+    })
+    return changed, deleted, cursor, has_more
+
+
+def feed_last_modified():
+    """
+    When anything in the donation feed last changed, deletions included.
+    """
+    updated = Donation.objects.aggregate(last=Max("updated_at"))["last"]
+    deleted = DonationTombstone.objects.aggregate(last=Max("deleted_at"))["last"]
+    return max(filter(None, (updated, deleted)), default=None)
@@ -0,0 +1,138 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .geocoding import geocode
+from .images import process_image
+from .models import Donation, DocumentUpload, DonationEvent, DonationTombstone, GeocodeCache, PickupLocation
+from .outbox import relay
+from .uploads import discard_part
+from .signals import donations_expired
+from .supply import move_supply
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def expire_donations(chunk_size=None):
+    """
+    Move available donations past their expiry_date to `expired`.
+
+    Works in chunks of set-based UPDATEs over the (status, expiry_date) index
+    so a large backlog never holds long locks. A bulk update bypasses
+    post_save, so every chunk sends one `donations_expired` signal instead.
+    """
+    chunk_size = chunk_size or settings.DONATION_EXPIRY_CHUNK_SIZE
+    today = timezone.localdate()
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Donation.objects
+                .select_for_update(skip_locked=True)
+                .filter(status="available", expiry_date__lt=today)
+                .order_by("expiry_date", "id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+
+            Donation.objects.filter(id__in=ids).update(status="expired", updated_at=timezone.now())
+            move_supply(ids, "available", "expired")
+            DonationEvent.record_bulk(ids, "status_changed", from_status="available", to_status="expired")
+            transaction.on_commit(
+                lambda ids=ids: donations_expired.send(sender=Donation, donation_ids=ids)
+            )
+        total += len(ids)
+
+    if total:
+        logger.info(f"Expired {total} donations past their expiry date")
+    return total
+
+
+@shared_task
+def relay_donation_events():
+    """
+    Drain the DonationEvent outbox to its consumers (see donations.outbox).
+    """
+    return relay()
+
+
+@shared_task
+def prune_donation_tombstones():
+    """
+    Drop deletion records older than any sync cursor that is still accepted.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.DONATION_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = DonationTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    if deleted:
+        logger.info(f"Pruned {deleted} donation tombstones")
+    return deleted
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(OSError,),
+    retry_backoff=True,
+    max_retries=3,
+)
+def process_donation_image(self, donation_id, image_id):
+    """
+    Turn one uploaded donation photo into WebP thumbnail and variants
+    (see donations.images), off the request path.
+    """
+    return process_image(donation_id, image_id)
+
+
+@shared_task
+def expire_document_uploads():
+    """
+    Abandon resumable uploads nobody touched for NGO_UPLOAD_SESSION_TTL_HOURS
+    and free their part files.
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.NGO_UPLOAD_SESSION_TTL_HOURS)
+    stale = list(DocumentUpload.objects.filter(status="active", updated_at__lt=cutoff))
+    for upload in stale:
+        discard_part(upload)
+    DocumentUpload.objects.filter(pk__in=[upload.pk for upload in stale]).update(status="expired")
+    if stale:
+        logger.info(f"Expired {len(stale)} abandoned document uploads")
+    return len(stale)
+
+
+@shared_task
+def geocode_pickup_locations(location_ids=None):
+    """
+    Fill in coordinates of pickup locations created without them, through
+    the geocode cache (donations.geocoding). Without ids, takes the newest
+    GEOCODING_BATCH_SIZE locations still missing coordinates, skipping
+    addresses the backend recently didn't find so they can't crowd out the rest.
+    """
+    recent_miss = GeocodeCache.objects.filter(
+        normalized_address=OuterRef("normalized_address"), latitude__isnull=True,
+        updated_at__gt=timezone.now() - timedelta(days=settings.GEOCODING_MISS_TTL_DAYS),
+    )
+    locations = (
+        PickupLocation.objects.filter(latitude__isnull=True, normalized_address__isnull=False)
+        .exclude(Exists(recent_miss))
+    )
+    if location_ids is not None:
+        locations = locations.filter(pk__in=location_ids)
+    found = 0
+    for location in locations.order_by("-id")[:settings.GEOCODING_BATCH_SIZE]:
+        coordinates = geocode(location.address)
+        if coordinates is None:
+            continue
+        location.latitude, location.longitude = coordinates
+        # save() moves the location's donations in the supply index too
+        location.save(update_fields=["latitude", "longitude"])
+        found += 1
+    if found:
+        logger.info(f"Geocoded {found} pickup locations")
+    return found
@@ -1,3 +1,1091 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection, connections
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.test import APIClient
+
+from dana.testing import LOCMEM_CACHES, benchmark, seed_rows
+from items.models import FoodItem
+from users.middleware import TOKEN_SUBPROTOCOL, FirebaseTokenAuthMiddleware
+from users.models import User
+from . import outbox
+from . import geocoding
+from .checks import check_geocoding_backend
+from .geo import haversine_km
+from .images import attach_uploaded_images, get_storage as get_image_storage, placeholder_url, process_image, thumbnail_url
+from .locations import get_or_create_location, resolve_locations
+from .matching import Candidates, NGOProfile, empty_candidates, recommend, top_k
+from .models import Donation, DonationEvent, GeocodeCache, PickupLocation, SupplyIndex
+from .quantities import Quantity, parse_quantity
+from .realtime import broadcast_donation_events
+from .response_cache import feed_cache
+from .routing import websocket_urlpatterns
+from .search import DonationSearchFilter
+from .signals import donations_expired
+from .sync import encode_cursor, feed_last_modified
+from .tasks import expire_donations, geocode_pickup_locations, process_donation_image, relay_donation_events
+from .transitions import transition
+from .views import DonationViewSet
+
+# (name, url) of every donation read endpoint whose SQL must stay indexed
+PLAN_ENDPOINTS = [
+    ("feed", "/api/donations/?limit=20"),
+    ("feed, keyset page", "/api/donations/?cursor=&limit=20"),
+    ("available feed", "/api/donations/?status=available&cursor=&limit=20"),
+    ("available feed, offset page", "/api/donations/?status=available&limit=20&offset=200"),
+    ("ngo claims", "/api/donations/?ngo={ngo}&status=claimed&limit=20"),
+    ("donor history", "/api/donations/?donor={donor}&limit=20"),
+    ("recipient deliveries", "/api/donations/?recipient={recipient}&status=completed&limit=20"),
+    ("available, expiring on a date", "/api/donations/?status=available&expiry_date={expiry_date}&limit=20"),
+    ("available, soonest expiry", "/api/donations/?status=available&ordering=expiry_date&limit=20"),
+    ("detail", "/api/donations/{donation}/"),
+    ("nearby", "/api/donations/nearby/?lat={lat}&lng={lng}&radius_km=3"),
+    ("search", "/api/donations/?search=rice&limit=20"),
+]
+PLAN_TABLES = ("donations_donation", "donations_pickuplocation", "items_fooditem", "users_user")
+
+
+def make_user(username, user_type="donor"):
+    return User.objects.create(username=username, firebase_uid=username, user_type=user_type)
+
+
+def make_donation(donor, **fields):
+    fields.setdefault("title", "Rice and dal")
+    fields.setdefault("food_type", "cooked")
+    fields.setdefault("quantity", "5 kg")
+    fields.setdefault("pickup_time", timezone.now() + timedelta(hours=2))
+    return Donation.objects.create(donor=donor, **fields)
+
+
+# what the outbox test consumers were handed, by consumer
+received = {"fragile": [], "steady": []}
+POISON_DONATION_ID = 13
+
+
+def fragile_consumer(events):
+    if any(event.donation_id == POISON_DONATION_ID for event in events):
+        raise RuntimeError("poison event")
+    received["fragile"].extend(event.id for event in events)
+
+
+def steady_consumer(events):
+    received["steady"].extend(event.id for event in events)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DonationTestCase(TestCase):
+    def setUp(self):
+        # the locmem cache outlives a test, and with no commits the feed
+        # cache version never moves on: start from an empty one
+        cache.clear()
+        self.client = APIClient()
+        self.donor = make_user("donor")
+        self.ngo = make_user("ngo", "ngo")
+
+
+class DonationListQueryTests(DonationTestCase):
+    def setUp(self):
+        super().setUp()
+        recipient = make_user("recipient", "recipient")
+        for number in range(25):
+            location = PickupLocation.objects.create(
+                address=f"{number} MG Road", latitude=12.97 + number / 1000, longitude=77.59,
+            )
+            donation = make_donation(self.donor, location=location, ngo=self.ngo, recipient=recipient)
+            FoodItem.objects.create(donation=donation, name="Rice", quantity="2 kg")
+            FoodItem.objects.create(donation=donation, name="Dal", quantity="1 kg")
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        # Last-Modified (2), count, page, items: the same at any page size
+        for limit in (5, 20):
+            with self.assertNumQueries(5):
+                response = self.client.get("/api/donations/", {"limit": limit, "status": "available"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), limit)
+            self.assertEqual(len(response.data["results"][0]["items"]), 2)
+
+    def test_keyset_pages_ignore_ordering(self):
+        newest_first = list(Donation.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        response = self.client.get("/api/donations/", {"limit": 100, "ordering": "created_at"})
+        self.assertEqual([item["id"] for item in response.data["results"]], newest_first[::-1])
+
+        seen = []
+        url, params = "/api/donations/", {"cursor": "", "limit": 10, "ordering": "created_at"}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen += [item["id"] for item in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(seen, newest_first)
+        self.assertIn("ordering=created_at", response.request["QUERY_STRING"])
+
+    def test_default_page_size(self):
+        response = self.client.get("/api/donations/")
+        self.assertEqual((response.data["count"], len(response.data["results"])), (25, 20))
+
+
+class DonationUpdateTests(DonationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.donation = make_donation(self.donor)
+
+    def test_edit_does_not_undo_a_concurrent_claim(self):
+        read = DonationViewSet.get_object
+
+        def read_then_claim(view):
+            # the NGO claims between the PATCH reading the row and saving it
+            donation = read(view)
+            transition(donation.pk, "claimed", self.ngo)
+            return donation
+
+        self.client.force_authenticate(self.donor)
+        with mock.patch.object(DonationViewSet, "get_object", read_then_claim):
+            response = self.client.patch(
+                f"/api/donations/{self.donation.pk}/", {"description": "Packed in boxes"}, format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "claimed")
+        self.donation.refresh_from_db()
+        self.assertEqual(
+            (self.donation.status, self.donation.ngo_id, self.donation.description),
+            ("claimed", self.ngo.pk, "Packed in boxes"),
+        )
+
+    def test_removed_items_send_post_delete(self):
+        kept = FoodItem.objects.create(donation=self.donation, name="Rice", quantity="2 kg")
+        removed = FoodItem.objects.create(donation=self.donation, name="Dal", quantity="1 kg")
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.pk)
+
+        post_delete.connect(receiver, sender=FoodItem)
+        self.addCleanup(post_delete.disconnect, receiver, sender=FoodItem)
+        self.client.force_authenticate(self.donor)
+        response = self.client.patch(
+            f"/api/donations/{self.donation.pk}/", {"items": [{"id": kept.pk, "name": "Rice", "quantity": "3 kg"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(deleted, [removed.pk])
+        self.assertEqual(list(self.donation.items.values_list("id", flat=True)), [kept.pk])
+
+    def test_claim_unknown_id(self):
+        self.client.force_authenticate(self.ngo)
+        for pk in ("abc", "999999"):
+            with self.subTest(pk):
+                self.assertEqual(self.client.post(f"/api/donations/{pk}/claim/").status_code, 404)
+
+
+class ResponseCacheTests(DonationTestCase):
+    """
+    Conditional GETs against the feed cache: a client's ETag keeps getting
+    304 until a write commits, then the fresh body.
+    """
+    def setUp(self):
+        super().setUp()
+        # commits kick the outbox relay; there is no broker here
+        self.enterContext(mock.patch.object(relay_donation_events, "delay"))
+        self.donation = make_donation(self.donor, expiry_date=timezone.localdate() + timedelta(days=1))
+        self.client.force_authenticate(self.ngo)
+
+    def assertChangedAfter(self, url, write):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response["X-Cache"]), (200, "MISS"))
+        self.assertNotEqual(response["ETag"], etag)
+        return response
+
+    def test_claim(self):
+        url = f"/api/donations/{self.donation.pk}/"
+        response = self.assertChangedAfter(url, lambda: self.client.post(f"{url}claim/"))
+        self.assertEqual(response.data["status"], "claimed")
+
+    def test_transition(self):
+        url = f"/api/donations/{self.donation.pk}/"
+        transition(self.donation.pk, "claimed", self.ngo)
+        response = self.assertChangedAfter(url, lambda: transition(self.donation.pk, "picked_up", self.ngo))
+        self.assertEqual(response.data["status"], "picked_up")
+
+    def test_bulk_create(self):
+        rows = [
+            {"title": f"Tray {number}", "pickup_time": (timezone.now() + timedelta(hours=2)).isoformat()}
+            for number in range(3)
+        ]
+
+        def write():
+            self.client.force_authenticate(self.donor)
+            self.assertEqual(self.client.post("/api/donations/bulk/", rows, format="json").status_code, 201)
+            self.client.force_authenticate(self.ngo)
+
+        response = self.assertChangedAfter("/api/donations/", write)
+        self.assertEqual(response.data["count"], 4)
+
+    def test_expiry(self):
+        def write():
+            Donation.objects.filter(pk=self.donation.pk).update(expiry_date=timezone.localdate() - timedelta(days=1))
+            self.assertEqual(expire_donations(), 1)
+
+        response = self.assertChangedAfter("/api/donations/?status=available", write)
+        self.assertEqual(response.data["count"], 0)
+
+    def test_last_modified(self):
+        response = self.client.get(f"/api/donations/{self.donation.pk}/")
+        self.assertEqual(response["Last-Modified"], http_date(self.donation.updated_at.timestamp()))
+
+        response = self.client.get("/api/donations/")
+        self.assertEqual(response["Last-Modified"], http_date(feed_last_modified().timestamp()))
+        response = self.client.get("/api/donations/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(DONATION_CHANGES_LAG_SECONDS=0)
+class DeltaSyncTests(DonationTestCase):
+    url = "/api/donations/changes/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.ngo)
+        self.donations = [make_donation(self.donor, title=f"Tray {number}") for number in range(3)]
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_delta_after_a_delete_and_an_update(self):
+        full = self.sync()
+        self.assertEqual([row["id"] for row in full["changed"]], [d.pk for d in self.donations])
+        self.assertEqual(full["deleted"], [])
+        self.assertFalse(full["has_more"])
+
+        removed = self.donations[0].pk
+        self.donations[0].delete()
+        self.donations[1].title = "Tray 1, renamed"
+        self.donations[1].save()
+
+        delta = self.sync(full["cursor"])
+        self.assertEqual([row["id"] for row in delta["changed"]], [self.donations[1].pk])
+        self.assertEqual(delta["deleted"], [removed])
+        again = self.sync(delta["cursor"])
+        self.assertEqual((again["changed"], again["deleted"]), ([], []))
+
+    def test_pages_follow_the_cursor(self):
+        first = self.sync(limit=2)
+        self.assertTrue(first["has_more"])
+        second = self.sync(first["cursor"], limit=2)
+        self.assertFalse(second["has_more"])
+        self.assertEqual(
+            [row["id"] for row in first["changed"] + second["changed"]], [d.pk for d in self.donations],
+        )
+
+    def test_expired_cursor(self):
+        cursor = encode_cursor({
+            "synced_at": timezone.now() - timedelta(days=settings.DONATION_TOMBSTONE_RETENTION_DAYS + 1),
+            "updated_at": None, "id": 0, "tombstone_id": 0,
+        })
+        self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, 410)
+
+    def test_malformed_cursor(self):
+        naive = base64.urlsafe_b64encode(b'{"s": "2026-10-18T10:00:00", "u": null, "i": 0, "t": 0}').decode()
+        for since in ("not-a-cursor", "e30=", naive):
+            with self.subTest(since):
+                response = self.client.get(self.url, {"since": since})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("since", response.data)
+
+    @override_settings(DONATION_CHANGES_LAG_SECONDS=60)
+    def test_rows_inside_the_lag_wait_for_the_next_sync(self):
+        full = self.sync()
+        self.assertEqual(full["changed"], [])
+
+        Donation.objects.filter(pk=self.donations[0].pk).update(updated_at=timezone.now() - timedelta(minutes=2))
+        delta = self.sync(full["cursor"])
+        self.assertEqual([row["id"] for row in delta["changed"]], [self.donations[0].pk])
+
+
+class ExpireDonationsTests(DonationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(mock.patch.object(relay_donation_events, "delay"))
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.expired = [
+            make_donation(self.donor, food_type="rice", quantity="2 kg", expiry_date=yesterday) for _ in range(3)
+        ]
+        self.fresh = make_donation(self.donor, food_type="rice", quantity="2 kg", expiry_date=timezone.localdate())
+        self.claimed = make_donation(self.donor, food_type="rice", ngo=self.ngo, status="claimed", expiry_date=yesterday)
+
+    def rice_supply(self):
+        return SupplyIndex.objects.filter(food_type="rice").values_list("donations", "kg").get()
+
+    def test_sweep_moves_supply_and_signals_per_chunk(self):
+        self.assertEqual(self.rice_supply(), (4, 8.0))
+        signalled = []
+        receiver = lambda sender, donation_ids, **kwargs: signalled.append(donation_ids)
+        donations_expired.connect(receiver)
+        self.addCleanup(donations_expired.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_donations(chunk_size=2), 3)
+
+        self.assertEqual([len(ids) for ids in signalled], [2, 1])
+        self.assertCountEqual(sum(signalled, []), [d.pk for d in self.expired])
+        self.assertEqual(
+            set(Donation.objects.filter(status="expired").values_list("id", flat=True)), {d.pk for d in self.expired},
+        )
+        self.assertEqual(Donation.objects.get(pk=self.claimed.pk).status, "claimed")
+        self.assertEqual(self.rice_supply(), (1, 2.0))
+        self.assertEqual(DonationEvent.objects.filter(to_status="expired").count(), 3)
+
+        # nothing left to do on the next run
+        self.assertEqual(expire_donations(), 0)
+        self.assertEqual(self.rice_supply(), (1, 2.0))
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class DonationFeedConsumerTests(TransactionTestCase):
+    """
+    The whole WebSocket stack: token middleware, routing, consumer, and
+    events broadcast the way the outbox relay does it. Not a TestCase:
+    database_sync_to_async closes the connection its transaction is on.
+    """
+    def setUp(self):
+        # commits kick the outbox relay; there is no broker here
+        self.enterContext(mock.patch.object(relay_donation_events, "delay"))
+        self.donor = make_user("donor")
+        self.ngo = make_user("ngo", "ngo")
+        self.application = FirebaseTokenAuthMiddleware(URLRouter(websocket_urlpatterns))
+        self.enterContext(mock.patch(
+            "users.middleware.authenticate_id_token",
+            side_effect=lambda token: self.ngo if token == "ngo-token" else AnonymousUser(),
+        ))
+        near = PickupLocation.objects.create(address="1 Anna Salai", latitude=13.06, longitude=80.26)
+        far = PickupLocation.objects.create(address="1 MG Road", latitude=12.97, longitude=77.59)
+        self.near = make_donation(self.donor, location=near)
+        make_donation(self.donor, location=far)
+        self.events = list(DonationEvent.objects.filter(event_type="created"))
+
+    async def connect(self, token):
+        communicator = WebsocketCommunicator(self.application, "/ws/donations/", subprotocols=[TOKEN_SUBPROTOCOL, token])
+        connected, subprotocol = await communicator.connect()
+        return communicator, connected, subprotocol
+
+    async def test_rejects_unauthenticated_sockets(self):
+        communicator, connected, code = await self.connect("made-up")
+        self.assertEqual((connected, code), (False, 4401))
+
+    async def test_area_subscription_receives_nearby_events(self):
+        communicator, connected, subprotocol = await self.connect("ngo-token")
+        self.assertEqual((connected, subprotocol), (True, TOKEN_SUBPROTOCOL))
+
+        await communicator.send_json_to({"action": "subscribe", "lat": 13.08, "lng": 80.27, "radius_km": 5})
+        self.assertEqual((await communicator.receive_json_from())["type"], "subscribed")
+
+        await sync_to_async(broadcast_donation_events)(self.events)
+        message = await communicator.receive_json_from()
+        self.assertEqual(message["type"], "donation.events")
+        self.assertEqual([event["id"] for event in message["events"]], [self.near.pk])
+        self.assertTrue(await communicator.receive_nothing())
+
+        await communicator.send_json_to({"action": "unsubscribe"})
+        self.assertEqual((await communicator.receive_json_from())["type"], "unsubscribed")
+        await sync_to_async(broadcast_donation_events)(self.events)
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+
+class DonationImageTests(DonationTestCase):
+    def setUp(self):
+        super().setUp()
+        storages = {
+            **settings.STORAGES,
+            "donation_images": {
+                "BACKEND": "django.core.files.storage.InMemoryStorage",
+                "OPTIONS": {"base_url": "/media/donations/"},
+            },
+        }
+        self.enterContext(override_settings(STORAGES=storages))
+        self.storage = get_image_storage()
+        self.donation = make_donation(self.donor)
+
+    def upload(self, content, name="photo.jpg"):
+        with mock.patch.object(process_donation_image, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                attach_uploaded_images(self.donation, [SimpleUploadedFile(name, content, "image/jpeg")])
+        (donation_id, image_id), = [call.args for call in delay.call_args_list]
+        return image_id
+
+    def jpeg(self, width, height, exif=None):
+        image = Image.new("RGB", (width, height), "orange")
+        metadata = Image.Exif()
+        metadata.update(exif or {})
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", exif=metadata)
+        return buffer.getvalue()
+
+    def entry(self):
+        self.donation.refresh_from_db()
+        return self.donation.images[-1]
+
+    def test_variants(self):
+        # orientation (0x0112) 6: stored landscape, shown rotated a quarter turn
+        image_id = self.upload(self.jpeg(2000, 1000, {0x0112: 6, 0x010F: "Phone"}))
+        self.assertEqual(self.entry()["status"], "pending")
+        staged = self.entry()["staged"]
+
+        self.assertEqual(process_image(self.donation.pk, image_id), "ready")
+        entry = self.entry()
+        self.assertEqual((entry["width"], entry["height"]), (1000, 2000))
+        self.assertEqual(entry["thumbnail"], f"/media/donations/{self.donation.pk}/{image_id}/thumb.webp")
+        self.assertEqual(set(entry["variants"]), {"w640"})
+        self.assertFalse(self.storage.exists(staged))
+
+        for name, size in (("thumb", (320, 320)), ("w640", (640, 1280))):
+            with self.storage.open(f"{self.donation.pk}/{image_id}/{name}.webp") as stored, Image.open(stored) as image:
+                self.assertEqual((image.format, image.size), ("WEBP", size))
+                self.assertFalse(image.getexif())
+
+        # already processed: a repeated task is a no-op
+        self.assertIsNone(process_image(self.donation.pk, image_id))
+
+    def test_small_image_keeps_its_width(self):
+        image_id = self.upload(self.jpeg(300, 200))
+        process_image(self.donation.pk, image_id)
+        self.assertEqual(set(self.entry()["variants"]), {"w300"})
+
+    def test_not_an_image(self):
+        image_id = self.upload(b"not an image", name="notes.jpg")
+        with self.assertLogs("donations.images", "WARNING"):
+            self.assertEqual(process_image(self.donation.pk, image_id), "failed")
+        self.assertEqual(self.entry()["thumbnail"], None)
+        self.assertEqual(thumbnail_url(self.entry()), placeholder_url())
+
+
+class BulkCreateTests(DonationTestCase):
+    url = "/api/donations/bulk/"
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(mock.patch.object(relay_donation_events, "delay"))
+        self.client.force_authenticate(self.donor)
+        pickup_time = (timezone.now() + timedelta(hours=2)).isoformat()
+        location = {"address": "12 Anna Salai", "latitude": 13.06, "longitude": 80.26}
+        self.rows = [
+            {
+                "title": "Bread", "food_type": "bread", "quantity": "3 kg", "pickup_time": pickup_time,
+                "location": location, "items": [{"name": "Buns", "quantity": "2 kg"}, {"name": "Loaves", "quantity": "1 kg"}],
+            },
+            {"title": "No pickup time", "food_type": "fruit"},
+            {"title": "Fruit", "food_type": "fruit", "quantity": "5 kg", "pickup_time": pickup_time, "location": location},
+        ]
+
+    def test_partial_batch(self):
+        version = feed_cache.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.rows, format="json")
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 1))
+        results = response.data["results"]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertIn("pickup_time", results[1]["errors"])
+
+        bread, fruit = Donation.objects.get(pk=results[0]["id"]), Donation.objects.get(pk=results[2]["id"])
+        self.assertEqual((bread.donor, bread.status, bread.quantity_kg), (self.donor, "available", 3.0))
+        self.assertEqual(sorted(bread.items.values_list("name", flat=True)), ["Buns", "Loaves"])
+        self.assertEqual(bread.location_id, fruit.location_id)
+        self.assertEqual(PickupLocation.objects.count(), 1)
+        self.assertEqual(DonationEvent.objects.filter(event_type="created").count(), 2)
+        self.assertEqual(feed_cache.version(), version + 1)
+
+    def test_all_rows_invalid(self):
+        response = self.client.post(self.url, [self.rows[1]], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Donation.objects.exists())
+
+    def test_server_fields_are_ignored(self):
+        row = dict(self.rows[2], status="completed", ngo=self.ngo.pk)
+        response = self.client.post(self.url, [row], format="json")
+        self.assertEqual(response.status_code, 201)
+        donation = Donation.objects.get(pk=response.data["results"][0]["id"])
+        self.assertEqual((donation.status, donation.ngo), ("available", None))
+
+    def test_only_donors(self):
+        self.client.force_authenticate(self.ngo)
+        self.assertEqual(self.client.post(self.url, self.rows, format="json").status_code, 403)
+
+
+class MatchingTests(SimpleTestCase):
+    NOW = 1_800_000_000.0
+    KM = 1 / 111.2  # degrees of latitude
+
+    def candidates(self, rows):
+        """
+        rows: (id, km north of the NGO, hours to expiry, kg, food_type)
+        """
+        ids, north, hours, kg, food_types = zip(*rows)
+        return Candidates(
+            np.array(ids, dtype=np.int64),
+            13.0 + np.array(north) * self.KM,
+            np.full(len(rows), 80.0),
+            self.NOW + np.array(hours, dtype=float) * 3600,
+            np.array(kg, dtype=float),
+            np.array(food_types, dtype=object),
+        )
+
+    def test_top_k_orders_best_first_and_drops_infinite_scores(self):
+        scores = np.array([[3.0, -np.inf, 5.0, 1.0], [-np.inf, -np.inf, 2.0, -np.inf]])
+        self.assertEqual([list(row) for row in top_k(scores, 3)], [[2, 0, 3], [2]])
+        self.assertEqual([list(row) for row in top_k(scores, 10)], [[2, 0, 3], [2]])
+        self.assertEqual([list(row) for row in top_k(np.empty((1, 0)), 3)], [[]])
+
+    def test_recommend_ranks_reachable_live_donations(self):
+        candidates = self.candidates([
+            (1, 1, np.inf, 5, "bread"),    # close, no known expiry
+            (2, 20, 2, 50, "rice"),        # beyond the 5 km radius
+            (3, 0.5, -1, 50, "rice"),      # expired an hour ago
+            (4, 3, 1, 20, "rice"),         # a bit further, expiring soon, a favourite
+            (5, 4.5, 48, 1, "fruit"),      # at the edge, not urgent, small
+        ])
+        profile = NGOProfile(13.0, 80.0, 5.0, {"rice": 1.0})
+
+        (ranked,) = recommend([profile], candidates, k=10, now=self.NOW)
+        self.assertEqual([donation_id for donation_id, _, _ in ranked], [4, 1, 5])
+        scores = [score for _, score, _ in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertAlmostEqual(ranked[1][2], 1.0, places=2)
+
+        (top,) = recommend([profile], candidates, k=1, now=self.NOW)
+        self.assertEqual(top, ranked[:1])
+
+    def test_batches_score_like_one_matrix(self):
+        candidates = self.candidates([(n, n % 7, n % 5 + 1, n, "rice") for n in range(1, 30)])
+        profiles = [NGOProfile(13.0 + n * self.KM, 80.0, 2.0 + n, {}) for n in range(6)]
+        whole = recommend(profiles, candidates, k=5, now=self.NOW)
+        with override_settings(MATCHING_BATCH_CELLS=len(candidates.ids)):
+            self.assertEqual(recommend(profiles, candidates, k=5, now=self.NOW), whole)
+        self.assertEqual(recommend(profiles, empty_candidates(), k=5, now=self.NOW), [[]] * len(profiles))
+
+
+class ParseQuantityTests(SimpleTestCase):
+    def test_digit_groups(self):
+        self.assertEqual(parse_quantity("1,000 g"), Quantity(1000.0, "g", 1.0, None))
+        self.assertEqual(parse_quantity("2,500,000 g"), Quantity(2500000.0, "g", 2500.0, None))
+        # a comma before fewer or more than three digits is a decimal point
+        self.assertEqual(parse_quantity("1,5 kg"), Quantity(1.5, "kg", 1.5, None))
+        self.assertEqual(parse_quantity("1,2500 kg"), Quantity(1.25, "kg", 1.25, None))
+
+    def test_dozens_count_pieces(self):
+        for text, amount in [("dozen eggs", 12), ("a dozen eggs", 12), ("two dozen eggs", 24), ("3 dozen", 36)]:
+            with self.subTest(text):
+                self.assertEqual(parse_quantity(text), Quantity(float(amount), "piece", None, None))
+
+
+@override_settings(GEOCODING_BACKEND="donations.geocoding.OfflineGeocoder")
+class PickupLocationTests(TestCase):
+    def setUp(self):
+        geocoding._geocoder = None
+        self.addCleanup(setattr, geocoding, "_geocoder", None)
+
+    def test_same_address_in_two_cities(self):
+        bengaluru = get_or_create_location("12 MG Road", 12.9756, 77.6067)
+        pune = get_or_create_location("12, M.G. Rd.", 18.5167, 73.8795)
+        self.assertNotEqual(bengaluru.pk, pune.pk)
+        self.assertEqual((pune.latitude, pune.longitude), (18.5167, 73.8795))
+        # a few metres away is the same place
+        self.assertEqual(get_or_create_location("12 mg road", 12.9757, 77.6068).pk, bengaluru.pk)
+        # and without coordinates it's neither
+        self.assertNotIn(get_or_create_location("12 MG Road").pk, {bengaluru.pk, pune.pk})
+
+    def test_resolve_locations_keeps_coordinates(self):
+        get_or_create_location("12 MG Road", 12.9756, 77.6067)
+        locations = resolve_locations([
+            {"address": "12 MG Road", "latitude": 12.9756, "longitude": 77.6067},
+            {"address": "12 M.G. Road", "latitude": 18.5167, "longitude": 73.8795},
+            {"address": "12 MG Rd"},
+        ])
+        self.assertEqual(len(locations), 3)
+        self.assertEqual(PickupLocation.objects.count(), 3)
+        self.assertEqual(
+            sorted((location.latitude, location.longitude) for location in locations.values() if location.latitude),
+            [(12.9756, 77.6067), (18.5167, 73.8795)],
+        )
+
+    def test_recent_misses_do_not_block_the_backlog(self):
+        older = PickupLocation.objects.create(address="1 Old Street")
+        missed = [PickupLocation.objects.create(address=f"{number} Nowhere Lane") for number in range(3)]
+        GeocodeCache.objects.bulk_create([
+            GeocodeCache(normalized_address=location.normalized_address, backend="test") for location in missed
+        ])
+        with self.settings(GEOCODING_BATCH_SIZE=2):
+            self.assertEqual(geocode_pickup_locations(), 1)
+        older.refresh_from_db()
+        self.assertIsNotNone(older.latitude)
+
+    def test_deploy_check_wants_a_real_geocoder(self):
+        self.assertEqual([error.id for error in check_geocoding_backend(None)], ["donations.E001"])
+        with self.settings(GEOCODING_BACKEND=None):
+            self.assertEqual([error.id for error in check_geocoding_backend(None)], ["donations.E001"])
+        with self.settings(GEOCODING_BACKEND="donations.geocoding.NominatimGeocoder"):
+            self.assertEqual(check_geocoding_backend(None), [])
+
+
+class RouteTests(DonationTestCase):
+    def test_invalid_start_time(self):
+        self.client.force_authenticate(self.ngo)
+        for start_time in ("tomorrow", "2026-13-40T00:00:00", "2026-02-30T10:00:00"):
+            with self.subTest(start_time):
+                response = self.client.get("/api/donations/route/", {"start_time": start_time})
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/donations/route/", {"start_time": "2026-10-18T09:00:00"})
+        self.assertEqual(response.status_code, 200)
+
+
+class DocumentUploadTests(DonationTestCase):
+    def setUp(self):
+        super().setUp()
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        self.enterContext(override_settings(NGO_UPLOAD_DIR=upload_dir.name, MEDIA_ROOT=upload_dir.name))
+        self.client.force_authenticate(self.ngo)
+        response = self.client.post("/api/auth/ngo-upload/sessions/", {"filename": "licence.pdf", "size": 3}, format="json")
+        self.url = f"/api/auth/ngo-upload/sessions/{response.data['id']}/"
+
+    def put_chunk(self, content_length):
+        return self.client.put(
+            self.url, b"pdf", content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE="bytes 0-2/3", CONTENT_LENGTH=content_length,
+        )
+
+    def test_malformed_content_length(self):
+        for content_length in ("abc", "", "4"):
+            with self.subTest(content_length):
+                self.assertEqual(self.put_chunk(content_length).status_code, 400)
+        response = self.put_chunk("3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"offset": 3, "complete": True})
+
+    def test_checksum_mismatch_resets_the_upload(self):
+        self.put_chunk("3")
+        response = self.client.post(f"{self.url}complete/", {"sha256": "0" * 64}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.url).data["offset"], 0)
+
+        self.assertEqual(self.put_chunk("3").data, {"offset": 3, "complete": True})
+        response = self.client.post(f"{self.url}complete/", {"sha256": hashlib.sha256(b"pdf").hexdigest()}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(self.url).data["status"], "complete")
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    DONATION_EVENT_CONSUMERS=["donations.tests.fragile_consumer", "donations.tests.steady_consumer"],
+    DONATION_OUTBOX_LEASE_SECONDS=0,
+    DONATION_OUTBOX_MAX_ATTEMPTS=3,
+)
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        outbox._consumers = None
+        self.addCleanup(setattr, outbox, "_consumers", None)
+        for events in received.values():
+            events.clear()
+        DonationEvent.objects.bulk_create([
+            DonationEvent(donation_id=donation_id, event_type="created", to_status="available")
+            for donation_id in range(10, 16)
+        ])
+
+    def test_poison_event_is_retried_alone_then_set_aside(self):
+        poison = DonationEvent.objects.get(donation_id=POISON_DONATION_ID)
+        others = list(DonationEvent.objects.exclude(pk=poison.pk).values_list("id", flat=True))
+
+        with self.assertLogs("donations.outbox", "WARNING"):
+            self.assertEqual(outbox.relay(batch_size=10), 6)
+        self.assertEqual(sorted(received["fragile"]), others)
+        self.assertEqual(sorted(received["steady"]), sorted(others + [poison.pk]))
+        self.assertEqual(outbox.outbox_stats()["backlog"], 1)
+        poison.refresh_from_db()
+        self.assertEqual(poison.delivered_to, ["donations.tests.steady_consumer"])
+
+        # later runs only retry the poison event, and only with the consumer that failed it
+        received["steady"].clear()
+        with self.assertLogs("donations.outbox", "ERROR") as logs:
+            outbox.relay(batch_size=10)
+            outbox.relay(batch_size=10)
+        self.assertIn("Giving up on 1 donation events", logs.output[-1])
+        self.assertEqual(received["steady"], [])
+        poison.refresh_from_db()
+        self.assertEqual(poison.attempts, 3)
+        self.assertIsNotNone(poison.failed_at)
+        self.assertIsNone(poison.published_at)
+
+        self.assertEqual(outbox.relay(batch_size=10), 0)
+        stats = outbox.outbox_stats()
+        self.assertEqual((stats["backlog"], stats["failed"]), (0, 1))
+        self.assertEqual(DonationEvent.objects.filter(published_at__isnull=False).count(), 5)
+
+
+def post_claims(requests, workers):
+    """
+    POST /claim/ for each (user, donation) from `workers` threads, each
+    with its own client and database connection. Returns the status codes.
+    """
+    start = threading.Event()
+
+    def claim(request):
+        user, donation = request
+        client = APIClient()
+        client.force_authenticate(user)
+        start.wait()
+        try:
+            return client.post(f"/api/donations/{donation.pk}/claim/").status_code
+        finally:
+            connections.close_all()
+
+    # commits kick the outbox relay; the broker isn't what is measured here
+    with mock.patch.object(relay_donation_events, "delay"), ThreadPoolExecutor(max_workers=workers) as pool:
+        codes = pool.map(claim, requests)
+        # the first `workers` requests are lined up, so they really race
+        start.set()
+        return list(codes)
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+@override_settings(CACHES=LOCMEM_CACHES)
+class ParallelClaimTests(TransactionTestCase):
+    """
+    Real concurrent requests, so no wrapping transaction: each thread gets
+    its own connection and commits. Needs a database with row locking, as
+    SQLite locks the whole table against the other threads' writes.
+    Claims per second: manage.py benchmark_claims.
+    """
+    NGOS = 8
+
+    def setUp(self):
+        self.ngos = [make_user(f"ngo-{number}", "ngo") for number in range(self.NGOS)]
+        self.donation = make_donation(make_user("donor"))
+
+    def test_exactly_one_parallel_claim_wins(self):
+        codes = post_claims([(ngo, self.donation) for ngo in self.ngos], workers=self.NGOS)
+
+        self.assertEqual(codes.count(200), 1, codes)
+        self.assertEqual(codes.count(409), self.NGOS - 1, codes)
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.status, "claimed")
+        self.assertEqual(self.ngos[codes.index(200)].pk, self.donation.ngo_id)
+        self.assertEqual(self.donation.events.filter(to_status="claimed").count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the SQL every donation read endpoint runs against a realistic,
+    ANALYZEd dataset and fail if any of it scans a whole donations,
+    locations, items or users table.
+    """
+    DONATIONS = 5000
+    STATUS_WEIGHTS = {
+        "available": 10, "claimed": 5, "picked_up": 3,
+        "completed": 60, "cancelled": 2, "expired": 20,
+    }
+    FOODS = ["rice", "bread", "vegetables", "fruit", "curry", "milk", "snacks", "biryani"]
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        users = User.objects.bulk_create([
+            User(username=f"plan-{kind}-{number}", user_type=kind)
+            for kind, count in (("donor", 200), ("ngo", 50), ("recipient", 100))
+            for number in range(count)
+        ])
+        donors = [user for user in users if user.user_type == "donor"]
+        ngos = [user for user in users if user.user_type == "ngo"]
+        recipients = [user for user in users if user.user_type == "recipient"]
+
+        locations = []
+        for number in range(cls.DONATIONS // 4):
+            location = PickupLocation(
+                address=f"{number} Plan Street",
+                latitude=12.8 + rng.random() * 0.6, longitude=80.0 + rng.random() * 0.5,
+            )
+            location.update_geohash()
+            location.update_normalized_address()
+            locations.append(location)
+        locations = PickupLocation.objects.bulk_create(locations, batch_size=2000)
+
+        statuses = rng.choices(list(cls.STATUS_WEIGHTS), weights=list(cls.STATUS_WEIGHTS.values()), k=cls.DONATIONS)
+        today = timezone.localdate()
+        donations = []
+        for number, donation_status in enumerate(statuses):
+            food = rng.choice(cls.FOODS)
+            donation = Donation(
+                donor=rng.choice(donors),
+                ngo=rng.choice(ngos) if donation_status != "available" else None,
+                recipient=rng.choice(recipients) if donation_status == "completed" else None,
+                title=f"{food} donation {number}", food_type=food,
+                expiry_date=today + timedelta(days=rng.randint(-60, 10)),
+                location=rng.choice(locations),
+                quantity=f"{rng.randint(1, 20)} kg",
+                pickup_time=timezone.now(),
+                status=donation_status,
+            )
+            donation.update_search_document()
+            donations.append(donation)
+        donations = Donation.objects.bulk_create(donations, batch_size=2000)
+        FoodItem.objects.bulk_create(
+            [FoodItem(donation=donation, name=donation.food_type, quantity=donation.quantity) for donation in donations],
+            batch_size=2000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        sample = next(donation for donation in reversed(donations) if donation.status == "completed")
+        cls.params = {
+            "donation": sample.pk,
+            "donor": sample.donor_id,
+            "ngo": sample.ngo_id,
+            "recipient": sample.recipient_id,
+            "expiry_date": sample.expiry_date,
+            "lat": sample.location.latitude,
+            "lng": sample.location.longitude,
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def explain(self, sql):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def full_scans(self, plan):
+        # "SCAN t USING INDEX" walks an index in order and stops at the
+        # LIMIT, unless the rows still have to be sorted afterwards
+        sorted_afterwards = any("USE TEMP B-TREE FOR ORDER BY" in line for line in plan)
+        scans = []
+        for line in plan:
+            for table in PLAN_TABLES:
+                if connection.vendor == "sqlite":
+                    if re.search(rf"\bSCAN {table}\b" + ("" if sorted_afterwards else "(?! USING)"), line):
+                        scans.append(line.strip())
+                elif f"Seq Scan on {table}" in line:
+                    scans.append(line.strip())
+        return scans
+
+    def test_read_endpoints_use_indexes(self):
+        for name, url in PLAN_ENDPOINTS:
+            with self.subTest(name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url.format(**self.params))
+                self.assertEqual(response.status_code, 200)
+                for query in queries.captured_queries:
+                    sql = query["sql"]
+                    if not sql.startswith("SELECT") or not any(table in sql for table in PLAN_TABLES):
+                        continue
+                    # An unfiltered COUNT(*) has to touch every row whatever the indexes
+                    if sql.startswith("SELECT COUNT(*)") and " WHERE " not in sql:
+                        continue
+                    self.assertEqual(self.full_scans(self.explain(sql)), [], sql)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NearbyTests(TestCase):
+    """
+    Located donations around Bengaluru; the geohash-indexed search has to
+    agree with a brute-force haversine scan.
+    """
+    LOCATIONS = 5000
+    RADIUS_KM = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        def build(rng, number):
+            location = PickupLocation(
+                address=f"{number} Benchmark Road",
+                latitude=12.5 + rng.random(), longitude=77.1 + rng.random(),
+            )
+            location.update_geohash()
+            return location
+
+        donor = make_user("donor")
+        locations = seed_rows(PickupLocation, cls.LOCATIONS, build, seed=6)
+        pickup_time = timezone.now() + timedelta(hours=2)
+        Donation.objects.bulk_create(
+            [Donation(donor=donor, title="Meals", location=location, pickup_time=pickup_time) for location in locations],
+            batch_size=5000,
+        )
+        cls.points = list(PickupLocation.objects.values_list("donation__id", "latitude", "longitude"))
+        # planner statistics, as a production database has them
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+
+    def brute_force(self, lat, lng, radius_km, limit):
+        ranked = sorted(
+            (haversine_km(lat, lng, latitude, longitude), donation_id)
+            for donation_id, latitude, longitude in self.points
+        )
+        return [donation_id for distance, donation_id in ranked if distance <= radius_km][:limit]
+
+    def test_nearby_matches_brute_force(self):
+        rng = random.Random(60)
+        for _ in range(5):
+            lat, lng = 12.6 + rng.random() * 0.8, 77.2 + rng.random() * 0.8
+            response = self.client.get(
+                "/api/donations/nearby/", {"lat": lat, "lng": lng, "radius_km": self.RADIUS_KM, "limit": 100},
+            )
+            self.assertEqual(response.status_code, 200)
+            expected = self.brute_force(lat, lng, self.RADIUS_KM, 100)
+            self.assertTrue(expected)
+            self.assertEqual([item["id"] for item in response.data], expected)
+
+
+@benchmark
+class NearbyBenchmarkTests(NearbyTests):
+    """
+    The same at 100k donations, where the indexed search has to beat a
+    full table scan.
+    """
+    LOCATIONS = 100_000
+
+    def test_nearby_beats_full_scan(self):
+        lat, lng = 12.97, 77.59
+        started = time.perf_counter()
+        for _ in range(10):
+            self.client.get("/api/donations/nearby/", {"lat": lat, "lng": lng, "radius_km": 2})
+        indexed = (time.perf_counter() - started) / 10
+
+        started = time.perf_counter()
+        scanned = [
+            donation_id
+            for donation_id, latitude, longitude in Donation.objects.values_list(
+                "id", "location__latitude", "location__longitude",
+            )
+            if haversine_km(lat, lng, latitude, longitude) <= 2
+        ]
+        full_scan = time.perf_counter() - started
+
+        self.assertTrue(scanned)
+        self.assertLess(indexed * 3, full_scan, f"nearby {indexed * 1000:.1f} ms, full scan {full_scan * 1000:.1f} ms")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SearchTests(TestCase):
+    """
+    Donations with seeded random text over a small vocabulary; ?search=
+    has to find exactly the documents containing the words.
+    """
+    DONATIONS = 3000
+    FILLER_WORDS = 200
+    FOOD_WORDS = [
+        "biryani", "chapati", "sambar", "idli", "dosa", "paneer", "khichdi", "pulao",
+        "bread", "bananas", "apples", "milk", "curd", "lentils", "vegetables", "sweets",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        words = random.Random(70)
+        filler = set()
+        while len(filler) < cls.FILLER_WORDS:
+            filler.add("".join(words.choices("bcdfghklmnprstvz", k=3)) + "ora")
+        vocabulary = cls.FOOD_WORDS + sorted(filler)
+        donor = make_user("donor")
+        pickup_time = timezone.now() + timedelta(hours=2)
+
+        def build(rng, number):
+            donation = Donation(
+                donor=donor, pickup_time=pickup_time,
+                title=" ".join(rng.sample(vocabulary, 2)),
+                description=" ".join(rng.choices(vocabulary, k=8)),
+            )
+            donation.update_search_document()
+            return donation
+
+        # the FTS table follows through its insert trigger
+        seed_rows(Donation, cls.DONATIONS, build, seed=7)
+        cls.documents = dict(Donation.objects.values_list("id", "search_document"))
+
+    def setUp(self):
+        cache.clear()
+
+    def expected(self, *words):
+        return {pk for pk, document in self.documents.items() if all(word in document.split() for word in words)}
+
+    def test_search_finds_exactly_the_matching_documents(self):
+        for words in (["biryani"], ["paneer", "sweets"], ["milk", "bread"]):
+            response = self.client.get("/api/donations/", {"search": " ".join(words), "limit": 100})
+            self.assertEqual(response.status_code, 200)
+            expected = self.expected(*words)
+            self.assertTrue(expected)
+            self.assertEqual(response.data["count"], len(expected))
+            self.assertLessEqual({item["id"] for item in response.data["results"]}, expected)
+
+
+@benchmark
+class SearchBenchmarkTests(SearchTests):
+    """
+    The same at 30k donations over a 2k-word vocabulary, where the index
+    has to beat a LIKE scan of search_document.
+    """
+    DONATIONS = 30_000
+    FILLER_WORDS = 2000
+
+    def test_search_beats_like_scan(self):
+        # what a list page costs: the count and the first 20 ids
+        def page(queryset):
+            return queryset.count(), list(queryset[:20].values_list("id", flat=True))
+
+        queryset = Donation.objects.all()
+        search = DonationSearchFilter()
+        vendor_search = search.sqlite_search if connection.vendor == "sqlite" else search.postgres_search
+        started = time.perf_counter()
+        found = [page(vendor_search(queryset, word)) for word in self.FOOD_WORDS]
+        indexed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        scanned = [
+            page(queryset.filter(search_document__icontains=word).order_by("-created_at", "-id"))
+            for word in self.FOOD_WORDS
+        ]
+        full_scan = time.perf_counter() - started
+
+        self.assertEqual([count for count, _ in found], [count for count, _ in scanned])
+        self.assertLess(indexed * 3, full_scan, f"search {indexed * 1000:.1f} ms, LIKE scan {full_scan * 1000:.1f} ms")
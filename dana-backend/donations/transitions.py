@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, PermissionDenied
+
+from .exceptions import Conflict, InvalidTransition
+from .models import Donation, DonationEvent
+from .response_cache import feed_cache
+from .supply import move_supply
+
+# (from_status, to_status) -> who may make the move:
+#   "ngo"     any NGO (it becomes the donation's ngo)
+#   "claimer" the NGO holding the claim
+#   "donor"   the donation's donor
+#   "system"  only background jobs such as expire_donations
+TRANSITIONS = {
+    ("available", "claimed"): "ngo",
+    ("available", "cancelled"): "donor",
+    ("available", "expired"): "system",
+    ("claimed", "picked_up"): "claimer",
+    ("claimed", "completed"): "claimer",
+    ("claimed", "cancelled"): "donor",
+    ("picked_up", "completed"): "claimer",
+}
+
+# fields a move has to set
+REQUIRED_FIELDS = {
+    "completed": ["recipient"],
+}
+
+
+def is_allowed_actor(rule, donation, user):
+    """
+    `donation` is anything with donor_id/ngo_id attributes.
+    """
+    user_id = getattr(user, "pk", None)
+    if rule == "ngo":
+        return getattr(user, "user_type", None) == "ngo"
+    if rule == "claimer":
+        return getattr(user, "user_type", None) == "ngo" and donation.ngo_id == user_id
+    if rule == "donor":
+        return user_id is not None and donation.donor_id == user_id
+    return False
+
+
+def check_transition(donation, to_status, user, fields=None):
+    """
+    Raise unless `user` may move `donation` to `to_status` with `fields`:
+    Conflict if the donation has moved past `to_status`, InvalidTransition
+    for moves the table doesn't have, PermissionDenied for the wrong user.
+    """
+    rule = TRANSITIONS.get((donation.status, to_status))
+    if rule is None:
+        if any(target == to_status for _, target in TRANSITIONS):
+            # a valid move, just not any more: someone got there first
+            if donation.status == to_status:
+                raise Conflict(f"Donation is already {to_status}.")
+            raise Conflict(f"Donation is {donation.status}, it can no longer be moved to {to_status}.")
+        raise InvalidTransition(f"Cannot move a donation from {donation.status} to {to_status}.")
+    if not is_allowed_actor(rule, donation, user):
+        raise PermissionDenied(f"You may not move this donation from {donation.status} to {to_status}.")
+    missing = [name for name in REQUIRED_FIELDS.get(to_status, []) if not (fields or {}).get(name)]
+    if missing:
+        raise InvalidTransition(f"{', '.join(missing)} must be specified to move a donation to {to_status}.")
+
+
+def _cas_update(ids, from_status, to_status, user, fields):
+    """
+    Compare-and-swap: only rows still in `from_status` (and, for the
+    claimer, still claimed by `user`) are moved. Returns the row count.
+    """
+    queryset = Donation.objects.filter(pk__in=ids, status=from_status)
+    if TRANSITIONS[(from_status, to_status)] == "claimer":
+        queryset = queryset.filter(ngo=user)
+    values = dict(fields)
+    if to_status == "claimed":
+        values["ngo"] = user
+    return queryset.update(status=to_status, updated_at=timezone.now(), **values)
+
+
+def transition(donation_id, to_status, user, **fields):
+    """
+    Move one donation to `to_status`. Raises NotFound, InvalidTransition,
+    PermissionDenied, or Conflict if someone else moved it first.
+    """
+    return apply_transitions([(donation_id, to_status, fields)], user)
+
+
+def apply_transitions(moves, user):
+    """
+    Apply `(donation_id, to_status, fields)` moves in one transaction: one
+    conditional UPDATE per (from, to, fields) group, plus their history
+    rows. All or nothing; failures raise with a detail per donation id.
+    """
+    ids = [donation_id for donation_id, _, _ in moves]
+    if len(set(ids)) != len(ids):
+        raise InvalidTransition("Each donation can only be moved once per request.")
+
+    with transaction.atomic():
+        current = Donation.objects.only("id", "status", "donor_id", "ngo_id").in_bulk(ids)
+        errors = {}
+        groups = defaultdict(list)
+        for donation_id, to_status, fields in moves:
+            try:
+                donation = current.get(donation_id)
+                if donation is None:
+                    raise NotFound("Donation not found.")
+                check_transition(donation, to_status, user, fields)
+            except (NotFound, Conflict, InvalidTransition, PermissionDenied) as exc:
+                errors[donation_id] = exc
+                continue
+            groups[(donation.status, to_status, tuple(sorted(fields.items())))].append(donation_id)
+
+        if errors:
+            if len(moves) == 1:
+                raise errors[ids[0]]
+            raise InvalidTransition({donation_id: str(exc.detail) for donation_id, exc in errors.items()})
+
+        for (from_status, to_status, fields), group_ids in groups.items():
+            if _cas_update(group_ids, from_status, to_status, user, dict(fields)) != len(group_ids):
+                # Someone moved one of them since it was read; roll the whole batch back
+                if len(moves) == 1:
+                    raise Conflict()
+                raise Conflict({donation_id: "Changed by someone else, reload and retry." for donation_id in group_ids})
+            move_supply(group_ids, from_status, to_status)
+            DonationEvent.record_bulk(
+                group_ids, "status_changed", from_status=from_status, to_status=to_status, actor=user
+            )
+        # conditional UPDATEs bypass the post_save invalidation
+        feed_cache.invalidate()
+    return len(moves)
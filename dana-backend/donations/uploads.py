@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ParseError, ValidationError
+
+from .exceptions import Conflict
+from .models import DocumentUpload, NGOVerification
+
+READ_SIZE = 64 * 1024
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, offset):
+        super().__init__(f"Chunk does not start at the current offset {offset}")
+        self.offset = offset
+
+
+def part_path(upload):
+    return os.path.join(settings.NGO_UPLOAD_DIR, f"{upload.pk}.part")
+
+
+def parse_content_range(header):
+    """
+    `bytes <first>-<last>/<total>` -> (start, length, total).
+    """
+    match = CONTENT_RANGE.match(header or "")
+    if not match:
+        raise ParseError("Content-Range must look like 'bytes <first>-<last>/<total>'")
+    first, last, total = (int(group) for group in match.groups())
+    if last < first or last >= total:
+        raise ParseError("Invalid Content-Range")
+    return first, last - first + 1, total
+
+
+@contextmanager
+def locked_part(upload):
+    """
+    The upload's part file, opened while its DocumentUpload row is locked,
+    so two requests can never write the same upload at once. The lock is
+    held by the surrounding transaction; SQLite, without row locks, relies
+    on there being a single development server.
+    """
+    with transaction.atomic():
+        try:
+            DocumentUpload.objects.select_for_update(nowait=True).filter(pk=upload.pk).exists()
+        except DatabaseError:
+            raise Conflict("Another chunk of this upload is being written.")
+        os.makedirs(settings.NGO_UPLOAD_DIR, exist_ok=True)
+        fd = os.open(part_path(upload), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            yield fd
+        finally:
+            os.close(fd)
+
+
+def write_chunk(upload, stream, start, length, checksum=None):
+    """
+    Append `length` bytes read from `stream` in small blocks, so memory use
+    stays flat whatever the chunk size. A chunk that is already on disk
+    (a retried request) is skipped; one that doesn't start at the current
+    offset is rejected with the offset to resume from. Short or corrupt
+    chunks (optional sha256 `checksum`) are cut off again.
+    Returns the new offset.
+    """
+    with locked_part(upload) as fd:
+        offset = os.fstat(fd).st_size
+        if start + length <= offset:
+            return offset
+        if start != offset:
+            raise OffsetMismatch(offset)
+
+        digest = hashlib.sha256()
+        os.lseek(fd, offset, os.SEEK_SET)
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            digest.update(data)
+            remaining -= len(data)
+
+        if remaining:
+            os.ftruncate(fd, offset)
+            raise ParseError(f"Chunk ended after {length - remaining} of {length} bytes")
+        if checksum and digest.hexdigest() != checksum.lower():
+            os.ftruncate(fd, offset)
+            raise ParseError("Chunk checksum mismatch")
+        return offset + length
+
+
+def file_sha256(fd):
+    digest = hashlib.sha256()
+    os.lseek(fd, 0, os.SEEK_SET)
+    while data := os.read(fd, READ_SIZE):
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def attach_ngo_document(user, document, upload=None):
+    """
+    Make `document` the user's NGO verification document and send it back
+    for review. The new file is written before the row changes and the old
+    one is only deleted once the transaction commits, so a failure never
+    leaves the verification without a document.
+    """
+    with transaction.atomic():
+        verification = NGOVerification.objects.select_for_update().filter(user=user).first()
+        if verification is None:
+            verification = NGOVerification(user=user)
+        old_name = verification.document.name if verification.pk else None
+
+        verification.document.save(os.path.basename(document.name), document, save=False)
+        try:
+            verification.status = "pending"
+            verification.reviewed_at = None
+            verification.save()
+            if upload is not None:
+                DocumentUpload.objects.filter(pk=upload.pk).update(status="complete", received=upload.size)
+        except Exception:
+            verification.document.storage.delete(verification.document.name)
+            raise
+
+        storage = verification.document.storage
+        if old_name and old_name != verification.document.name:
+            transaction.on_commit(lambda: storage.delete(old_name))
+    return verification
+
+
+def complete_upload(upload, sha256=""):
+    """
+    Check the assembled file against the declared size and sha256, then
+    attach it to the user's NGOVerification. A checksum mismatch discards
+    the data so the client starts over.
+    """
+    expected = (sha256 or upload.sha256).lower()
+    if not expected:
+        raise ValidationError({"sha256": "sha256 of the whole file is required"})
+
+    with locked_part(upload) as fd:
+        size = os.fstat(fd).st_size
+        if size != upload.size:
+            raise Conflict(f"Upload is incomplete: {size} of {upload.size} bytes received")
+        # Reset without raising, so the transaction holding the lock commits it
+        mismatch = file_sha256(fd) != expected
+        if mismatch:
+            os.ftruncate(fd, 0)
+            DocumentUpload.objects.filter(pk=upload.pk).update(received=0, updated_at=timezone.now())
+        else:
+            with open(part_path(upload), "rb") as part:
+                verification = attach_ngo_document(upload.user, File(part, name=upload.filename), upload)
+    if mismatch:
+        raise ValidationError({"sha256": "Checksum mismatch, upload the file again"})
+    discard_part(upload)
+    return verification
+
+
+def discard_part(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
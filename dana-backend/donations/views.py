@@ -1,42 +1,439 @@
-from django.shortcuts import render
+from datetime import datetime
+
+from django.shortcuts import get_object_or_404, render
 from rest_framework import viewsets, permissions, filters, serializers, status
-from .models import Donation, PickupLocation, NGOVerification
-from django.utils.timezone import now
-from .serializers import DonationSerializer, NGOVerificationSerializer
-from .permissions import IsDonorOrReadOnly, IsNGOCanClaim
+from .models import Donation, DocumentUpload, DonationEvent, NGOVerification, SupplyIndex
+from .outbox import outbox_stats as get_outbox_stats
+from .response_cache import feed_cache
+from .transitions import REQUIRED_FIELDS, apply_transitions, transition
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import get_current_timezone, is_naive, localtime, make_aware, now
+from .serializers import (
+    DonationSerializer, DonationListSerializer, DonationEventSerializer,
+    DonationTransitionSerializer, DocumentUploadSerializer, NGOVerificationSerializer,
+)
+from .permissions import IsDonorOrReadOnly, IsNGOCanClaim, IsNGOCanClaimOrComplete
+from .pagination import DonationPagination
+from .geo import bounding_box, covering_cells, encode_geohash, haversine_km, prefix_lookup
+from .bulk import create_donations, validate_rows
+from .matching import get_candidates, ngo_profile, recommend
+from .routes import donation_stop, plan_route
+from .locations import get_or_create_location
+from .images import attach_uploaded_images, validate_upload
+from .uploads import (
+    OffsetMismatch, attach_ngo_document, complete_upload, discard_part, parse_content_range, write_chunk,
+)
+from .exceptions import Conflict
+from .search import DonationSearchFilter
+from .sync import feed_last_modified, get_changes
+from django.db.models import Q, Sum
+from django.conf import settings
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
-from firebase_admin import auth
-from rest_framework.parsers import MultiPartParser, FormParser
+from users.auth import verify_id_token
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.exceptions import NotFound
 
 
 class DonationViewSet(viewsets.ModelViewSet):
-    queryset = Donation.objects.all().order_by('-created_at')
+    queryset = Donation.objects.all().order_by('-created_at', '-id')
     serializer_class = DonationSerializer
-    parser_classes = [MultiPartParser, FormParser]
-    permission_classes = [permissions.AllowAny]
+    pagination_class = DonationPagination
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    permission_classes = [permissions.AllowAny, IsNGOCanClaimOrComplete]
 
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, DonationSearchFilter, filters.OrderingFilter]
     filterset_fields = ["status", "donor", "ngo", "recipient", "expiry_date"]
-    search_fields = ["food_type", "description", "location"]
+    search_fields = ["title", "food_type", "description", "location__address"]
     ordering_fields = ["created_at", "expiry_date"]
 
-    def perform_create(self, serializer):
-        user = self.request.user
-        location_data = self.request.data.get("location")
+    def get_serializer_class(self):
+        if self.action in ("list", "nearby", "changes", "recommended") and self.request.query_params.get("view") == "compact":
+            return DonationListSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    def cached(self, handler, request, *args, **kwargs):
+        """
+        Serve JSON reads from the feed cache, answering conditional GETs with
+        304. Misses get stored by finalize_response once they are rendered.
+        """
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+        version = feed_cache.version()
+        key = feed_cache.key(request, version) if version is not None else None
+        entry = feed_cache.get(key) if key else None
+        if entry is not None:
+            return feed_cache.respond(request, entry)
+        self.conditional = True
+        self.response_cache_key = key
+        if self.action == "list":
+            self.last_modified = feed_last_modified()
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "conditional", False):
+            response = feed_cache.store(
+                request, getattr(self, "response_cache_key", None), response, getattr(self, "last_modified", None)
+            )
+        return response
+
+    def get_object(self):
+        donation = super().get_object()
+        self.last_modified = donation.updated_at
+        return donation
+
+    def get_queryset(self):
+        # Lists only load the columns they render (plus the keyset column)
+        only = ["created_at"] if self.action == "list" else None
+        if self.action == "nearby":
+            only = ["location__latitude", "location__longitude"]
+        return self.get_serializer().setup_eager_loading(super().get_queryset(), only=only)
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Available donations within `radius_km` of `lat`/`lng`, nearest first.
+        Candidates come from the geohash cells covering the circle and a
+        bounding box, then get ranked by exact haversine distance.
+        """
+        try:
+            lat = float(request.query_params["lat"])
+            lng = float(request.query_params["lng"])
+            radius_km = float(request.query_params.get("radius_km", settings.NEARBY_DEFAULT_RADIUS_KM))
+            limit = int(request.query_params.get("limit", 50))
+        except (KeyError, ValueError):
+            return Response({"error": "lat and lng are required numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius_km <= 0:
+            return Response({"error": "Invalid coordinates or radius"}, status=status.HTTP_400_BAD_REQUEST)
+        radius_km = min(radius_km, settings.NEARBY_MAX_RADIUS_KM)
+        limit = max(1, min(limit, 100))
+
+        cells = Q()
+        for cell in covering_cells(lat, lng, radius_km):
+            cells |= Q(**prefix_lookup("location__geohash", cell))
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        box = Q(location__latitude__range=(min_lat, max_lat))
+        if -180 <= min_lng and max_lng <= 180:
+            box &= Q(location__longitude__range=(min_lng, max_lng))
+
+        candidates = (
+            self.filter_queryset(self.get_queryset())
+            .filter(cells, box, status="available")
+            .select_related("location")
+            # ranked by distance below; a feed ordering would steer the
+            # planner onto the status index instead of the geohash one
+            .order_by()
+        )
+
+        ranked = []
+        for donation in candidates:
+            distance = haversine_km(lat, lng, donation.location.latitude, donation.location.longitude)
+            if distance <= radius_km:
+                ranked.append((distance, donation))
+        ranked.sort(key=lambda pair: pair[0])
+        ranked = ranked[:limit]
+
+        data = self.get_serializer([donation for _, donation in ranked], many=True).data
+        for item, (distance, _) in zip(data, ranked):
+            item["distance_km"] = round(distance, 3)
+        return Response(data)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """
+        NGOs: the `k` available donations that suit them best, scored on
+        distance, time left before expiry, quantity and the NGO's history
+        (donations.matching). Position and radius come from `lat`/`lng`/
+        `radius_km` or the NGO's notification preference.
+        """
+        if request.user.user_type != "ngo":
+            return Response({"error": "Only NGOs get recommendations"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            lat = float(request.query_params["lat"]) if "lat" in request.query_params else None
+            lng = float(request.query_params["lng"]) if "lng" in request.query_params else None
+            radius_km = float(request.query_params["radius_km"]) if "radius_km" in request.query_params else None
+            k = int(request.query_params.get("k", 20))
+        except ValueError:
+            return Response({"error": "lat, lng, radius_km and k must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if (lat is not None and not -90 <= lat <= 90) or (lng is not None and not -180 <= lng <= 180):
+            return Response({"error": "Invalid coordinates"}, status=status.HTTP_400_BAD_REQUEST)
+        if radius_km is not None and radius_km <= 0:
+            return Response({"error": "Invalid radius"}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = ngo_profile(request.user, lat, lng, radius_km)
+        if profile is None:
+            return Response(
+                {"error": "lat and lng are required without notification preferences"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        profile = profile._replace(radius_km=min(profile.radius_km, settings.NEARBY_MAX_RADIUS_KM))
+        candidates = get_candidates(covering_cells(profile.lat, profile.lng, profile.radius_km))
+        ranked = recommend([profile], candidates, max(1, min(k, 100)))[0]
+
+        donations = self.get_queryset().filter(pk__in=[donation_id for donation_id, _, _ in ranked]).in_bulk()
+        ranked = [(donations[donation_id], score, distance) for donation_id, score, distance in ranked if donation_id in donations]
+        data = self.get_serializer([donation for donation, _, _ in ranked], many=True).data
+        for item, (_, score, distance) in zip(data, ranked):
+            item["score"] = round(score, 4)
+            item["distance_km"] = round(distance, 3)
+        return Response(data)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def route(self, request):
+        """
+        NGOs: a visit order for the donations they have claimed, respecting
+        pickup windows (donations.routes). Starts from `lat`/`lng` when
+        given, at `start_time` (ISO 8601, default now). Donations without
+        coordinates, or past ROUTE_MAX_STOPS, come back in `unrouted`.
+        """
+        if request.user.user_type != "ngo":
+            return Response({"error": "Only NGOs plan pickup routes"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            lat = float(request.query_params["lat"]) if "lat" in request.query_params else None
+            lng = float(request.query_params["lng"]) if "lng" in request.query_params else None
+        except ValueError:
+            return Response({"error": "lat and lng must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if (lat is None) != (lng is None):
+            return Response({"error": "lat and lng go together"}, status=status.HTTP_400_BAD_REQUEST)
+        if lat is not None and not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return Response({"error": "Invalid coordinates"}, status=status.HTTP_400_BAD_REQUEST)
+        start_time = now()
+        if "start_time" in request.query_params:
+            try:
+                # None when malformed, ValueError for impossible dates like month 13
+                start_time = parse_datetime(request.query_params["start_time"])
+            except ValueError:
+                start_time = None
+            if start_time is None:
+                return Response({"error": "start_time must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST)
+            if is_naive(start_time):
+                start_time = make_aware(start_time)
+
+        claimed = list(
+            self.get_queryset().filter(ngo=request.user, status="claimed")
+            .select_related("location").order_by("pickup_time", "id")
+        )
+        routable = [
+            donation for donation in claimed
+            if donation.location and donation.location.latitude is not None and donation.location.longitude is not None
+        ][:settings.ROUTE_MAX_STOPS]
+        routed_ids = {donation.pk for donation in routable}
+        windows = [donation_stop(donation) for donation in routable]
+        route = plan_route(windows, lat, lng, start_time.timestamp())
+
+        ordered = [routable[index] for index in route.order]
+        data = DonationListSerializer(ordered, many=True, context=self.get_serializer_context()).data
+        stops = []
+        for item, arrival, leg, index in zip(data, route.arrivals, route.legs, route.order):
+            latest = windows[index].latest
+            stops.append({
+                "donation": item,
+                "arrival": datetime.fromtimestamp(arrival, tz=get_current_timezone()),
+                "leg_km": round(leg, 3),
+                "late_minutes": round(max(arrival - latest, 0) / 60, 1),
+            })
+        finish = route.arrivals[-1] + settings.ROUTE_STOP_MINUTES * 60 if route.arrivals else start_time.timestamp()
+        return Response({
+            "start_time": localtime(start_time),
+            "stops": stops,
+            "distance_km": round(route.distance_km, 3),
+            "duration_minutes": round((finish - start_time.timestamp()) / 60, 1),
+            "late_stops": sum(1 for stop in stops if stop["late_minutes"] > 0),
+            "optimized": route.complete,
+            "unrouted": [donation.pk for donation in claimed if donation.pk not in routed_ids],
+        })
 
-        # If location is a string, create or get PickupLocation
-        if isinstance(location_data, str):
-            location_obj, _ = PickupLocation.objects.get_or_create(address=location_data)
-        elif isinstance(location_data, dict) and "address" in location_data:
-            location_obj, _ = PickupLocation.objects.get_or_create(address=location_data["address"])
+    @action(detail=False, methods=["get"])
+    def supply(self, request):
+        """
+        Available supply (donations, kg, servings) per food type, read from
+        SupplyIndex. `?area=` is a geohash prefix, or give `lat`/`lng` for
+        the SUPPLY_INDEX_PRECISION cell around a point; `?food_type=` narrows
+        to one type. Quantities that can't be converted count as donations only.
+        """
+        precision = settings.SUPPLY_INDEX_PRECISION
+        area = request.query_params.get("area", "").lower()
+        if "lat" in request.query_params or "lng" in request.query_params:
+            try:
+                lat = float(request.query_params["lat"])
+                lng = float(request.query_params["lng"])
+            except (KeyError, ValueError):
+                return Response({"error": "lat and lng are required numbers"}, status=status.HTTP_400_BAD_REQUEST)
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                return Response({"error": "Invalid coordinates"}, status=status.HTTP_400_BAD_REQUEST)
+            area = encode_geohash(lat, lng, precision)
+        if len(area) > precision:
+            return Response({"error": f"area is at most {precision} geohash characters"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = SupplyIndex.objects.filter(donations__gt=0)
+        if area:
+            rows = rows.filter(cell__startswith=area)
+        if "food_type" in request.query_params:
+            rows = rows.filter(food_type=request.query_params["food_type"])
+        by_food_type = list(
+            rows.values("food_type")
+            .annotate(donations=Sum("donations"), kg=Sum("kg"), servings=Sum("servings"))
+            .order_by("-donations", "food_type")
+        )
+        for row in by_food_type:
+            row["kg"] = round(row["kg"], 3)
+            row["servings"] = round(row["servings"], 3)
+        totals = {
+            name: round(sum(row[name] for row in by_food_type), 3)
+            for name in ("donations", "kg", "servings")
+        }
+        return Response({"area": area or None, "totals": totals, "food_types": by_food_type})
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Delta sync: donations created or updated and ids deleted since
+        `?since=<cursor>` (everything when it is missing). Keep calling with
+        the returned cursor while `has_more` is true; a 410 means the cursor
+        is too old and the client should sync from scratch.
+        """
+        try:
+            limit = int(request.query_params.get("limit", 100))
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.DONATION_CHANGES_MAX_LIMIT))
+
+        changed, deleted, cursor, has_more = get_changes(self.get_queryset(), request.query_params.get("since"), limit)
+        return Response({
+            "changed": self.get_serializer(changed, many=True).data,
+            "deleted": deleted,
+            "cursor": cursor,
+            "has_more": has_more,
+        })
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def claim(self, request, pk=None):
+        """
+        NGOs: claim an available donation. Exactly one of any number of
+        concurrent claims wins; the others get 409.
+        """
+        try:
+            donation_id = int(pk)
+        except ValueError:
+            raise NotFound("Donation not found.")
+        transition(donation_id, "claimed", request.user)
+        donation = self.get_queryset().get(pk=pk)
+        return Response(self.get_serializer(donation).data)
+
+    @action(detail=False, methods=["post"], url_path="transitions",
+            permission_classes=[IsAuthenticated], parser_classes=[JSONParser])
+    def bulk_transitions(self, request):
+        """
+        Apply many status changes at once, e.g. a driver marking every
+        pickup of a run done. Body: [{"id": 1, "status": "picked_up"}, ...].
+        All of them are applied in one transaction or none are.
+        """
+        data = request.data.get("transitions") if isinstance(request.data, dict) else request.data
+        serializer = DonationTransitionSerializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        if len(serializer.validated_data) > settings.DONATION_TRANSITIONS_MAX_BATCH:
+            return Response(
+                {"error": f"At most {settings.DONATION_TRANSITIONS_MAX_BATCH} transitions per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        moves = []
+        for move in serializer.validated_data:
+            fields = {name: move[name] for name in REQUIRED_FIELDS.get(move["status"], []) if name in move}
+            moves.append((move["id"], move["status"], fields))
+        updated = apply_transitions(moves, request.user)
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=["post"], url_path="bulk",
+            permission_classes=[IsAuthenticated], parser_classes=[JSONParser])
+    def bulk_create(self, request):
+        """
+        Donors: post many donations at once, e.g. a supermarket at closing
+        time. Body: [{"title": ..., "pickup_time": ..., "location": {...},
+        "items": [...]}, ...]. Valid rows are created together in one
+        transaction; the response has a result per row, in order.
+        """
+        if request.user.user_type != "donor":
+            return Response({"error": "Only donors can create donations"}, status=status.HTTP_403_FORBIDDEN)
+        rows = request.data.get("donations") if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({"error": "Expected a non-empty list of donations"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.DONATION_BULK_MAX_BATCH:
+            return Response(
+                {"error": f"At most {settings.DONATION_BULK_MAX_BATCH} donations per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        valid, errors = validate_rows(rows, self.get_serializer_context())
+        donations = create_donations(request.user, [data for _, data in valid]) if valid else []
+        results = [{"index": index, "errors": detail} for index, detail in errors.items()]
+        results += [{"index": index, "id": donation.pk} for (index, _), donation in zip(valid, donations)]
+        results.sort(key=lambda result: result["index"])
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif donations:
+            response_status = status.HTTP_207_MULTI_STATUS
         else:
-            location_obj = None
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({"created": len(donations), "failed": len(errors), "results": results}, status=response_status)
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        """
+        Every status change of a donation, oldest first.
+        """
+        donation = self.get_object()
+        events = DonationEvent.objects.filter(donation_id=donation.pk).order_by("id")
+        return Response(DonationEventSerializer(events, many=True).data)
 
-        serializer.save(donor=self.request.user, location=location_obj)
+    def perform_create(self, serializer):
+        location_data = self.request.data.get("location")
+        extra = {}
+        # A bare address string (multipart forms); location dicts and the
+        # flattened location.* fields are resolved by the serializer
+        if isinstance(location_data, str):
+            extra["location"] = get_or_create_location(location_data)
+
+        uploads = self.request.FILES.getlist("image") + self.request.FILES.getlist("images")
+        self.validate_uploads(uploads)
+
+        serializer.save(donor=self.request.user, **extra)
+        # photos are processed by a celery task, the response shows placeholders
+        if uploads:
+            serializer.instance = attach_uploaded_images(serializer.instance, uploads)
+
+    def validate_uploads(self, uploads, existing=0):
+        if existing + len(uploads) > settings.DONATION_IMAGE_MAX_COUNT:
+            raise serializers.ValidationError({"images": f"At most {settings.DONATION_IMAGE_MAX_COUNT} images per donation."})
+        errors = [error for error in map(validate_upload, uploads) if error]
+        if errors:
+            raise serializers.ValidationError({"images": errors})
+
+    @action(detail=True, methods=["post"], url_path="images", permission_classes=[IsAuthenticated])
+    def add_images(self, request, pk=None):
+        """
+        Donors: add photos to a donation. Returns at once with placeholders.
+        """
+        donation = self.get_object()
+        if donation.donor_id != request.user.pk:
+            return Response({"error": "Only the donor can add images"}, status=status.HTTP_403_FORBIDDEN)
+        uploads = request.FILES.getlist("image") + request.FILES.getlist("images")
+        if not uploads:
+            return Response({"error": "No images uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+        self.validate_uploads(uploads, existing=len(donation.images or []))
+        donation = attach_uploaded_images(donation, uploads)
+        return Response(self.get_serializer(donation).data, status=status.HTTP_202_ACCEPTED)
 
 
     def create(self, request, *args, **kwargs):
@@ -46,21 +443,22 @@ class DonationViewSet(viewsets.ModelViewSet):
 
 
     def perform_update(self, serializer):
-        new_status = self.request.data.get("status")
-
-        # Any user can claim
-        if new_status == "claimed":
-            serializer.save(ngo=self.request.user, status="claimed")
-
-        # Any user can complete
-        elif new_status == "completed":
-            recipient = serializer.validated_data.get("recipient")
-            if not recipient:
-                raise serializers.ValidationError({"recipient_id": "Recipient must be specified when completing a donation."})
-            serializer.save(status="completed")
-
-        else:
-            serializer.save()
+        donation = serializer.instance
+        # recorded on the outbox event if the status changes
+        donation.event_actor = self.request.user
+
+        # Status changes go through the transition table as a conditional update
+        new_status = serializer.validated_data.pop("status", donation.status)
+        if new_status != donation.status:
+            fields = {
+                name: serializer.validated_data.pop(name)
+                for name in REQUIRED_FIELDS.get(new_status, [])
+                if name in serializer.validated_data
+            }
+            transition(donation.pk, new_status, self.request.user, **fields)
+            donation.refresh_from_db()
+
+        serializer.save()
 
         def get_serializer_context(self):
             context = super().get_serializer_context()
@@ -81,7 +479,7 @@ def health_check(request):
 
     try:
         # Verify the token with Firebase
-        decoded_token = auth.verify_id_token(id_token)
+        decoded_token = verify_id_token(id_token)
         uid = decoded_token["uid"]
         email = decoded_token.get("email")
 
@@ -126,19 +524,100 @@ def upload_ngo_doc(request):
         return Response({"error": "Document file required"},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    verification, created = NGOVerification.objects.get_or_create(
-        user=request.user,
-        defaults={"document": request.FILES["document"]}
-    )
-
-    if not created:
-        verification.document = request.FILES["document"]
-        verification.status = False  # reset if re-uploaded
-        verification.save()
+    # resets the review if re-uploaded
+    verification = attach_ngo_document(request.user, request.FILES["document"])
 
     serializer = NGOVerificationSerializer(verification)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def start_ngo_upload(request):
+    """
+    Start a resumable NGO document upload.
+    Body: {"filename": "...", "size": <bytes>, "sha256": "<hex, optional here>"}
+    Then PUT the bytes in order to the returned session with
+    `Content-Range: bytes <first>-<last>/<size>` (and optionally
+    `X-Chunk-SHA256`), GET it to find the offset to resume from, and POST
+    to its complete/ route with the file's sha256.
+    """
+    active = DocumentUpload.objects.filter(user=request.user, status="active").count()
+    if active >= settings.NGO_UPLOAD_MAX_ACTIVE:
+        return Response({"error": "Too many unfinished uploads"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+    serializer = DocumentUploadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    upload = serializer.save(user=request.user)
+    data = dict(serializer.data, chunk_size=settings.NGO_UPLOAD_CHUNK_SIZE)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET", "PUT", "DELETE"])
+@permission_classes([IsAuthenticated])
+def ngo_upload_session(request, pk):
+    """
+    GET: progress. PUT: append one chunk. DELETE: abandon the upload.
+    """
+    upload = get_object_or_404(DocumentUpload, pk=pk, user=request.user)
+
+    if request.method == "GET":
+        return Response(DocumentUploadSerializer(upload).data)
+
+    if request.method == "DELETE":
+        DocumentUpload.objects.filter(pk=upload.pk, status="active").update(status="expired")
+        discard_part(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if upload.status != "active":
+        raise Conflict(f"Upload is {upload.status}.")
+    start, length, total = parse_content_range(request.headers.get("Content-Range"))
+    if total != upload.size:
+        return Response({"error": "Content-Range total does not match the upload size"}, status=status.HTTP_400_BAD_REQUEST)
+    if length > settings.NGO_UPLOAD_MAX_CHUNK_SIZE:
+        return Response({"error": f"Chunks are limited to {settings.NGO_UPLOAD_MAX_CHUNK_SIZE} bytes"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    try:
+        content_length = int(request.headers.get("Content-Length") or 0)
+    except ValueError:
+        content_length = None
+    if content_length != length:
+        return Response({"error": "Content-Length does not match Content-Range"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        offset = write_chunk(upload, request.stream, start, length, request.headers.get("X-Chunk-SHA256"))
+    except OffsetMismatch as exc:
+        return Response({"error": "Chunk does not start at the current offset", "offset": exc.offset}, status=status.HTTP_409_CONFLICT)
+    DocumentUpload.objects.filter(pk=upload.pk).update(received=offset, updated_at=now())
+    return Response({"offset": offset, "complete": offset == upload.size})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def complete_ngo_upload(request, pk):
+    """
+    Verify the assembled document (size and sha256) and attach it to the
+    user's NGO verification.
+    """
+    upload = get_object_or_404(DocumentUpload, pk=pk, user=request.user)
+    if upload.status != "active":
+        raise Conflict(f"Upload is {upload.status}.")
+    verification = complete_upload(upload, request.data.get("sha256", ""))
+    return Response(NGOVerificationSerializer(verification).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def outbox_stats(request):
+    """
+    Admin-only: donation event outbox backlog, relay lag and throughput.
+    """
+    return Response(get_outbox_stats())
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def feed_cache_stats(request):
+    """
+    Admin-only: donation feed response cache hits, misses and 304s for this worker.
+    """
+    return Response(feed_cache.get_stats())
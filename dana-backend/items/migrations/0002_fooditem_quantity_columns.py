@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+from donations.quantities import parse_quantity
+
+QUANTITY_FIELDS = ['quantity_amount', 'quantity_unit', 'quantity_kg', 'quantity_servings']
+
+
+def backfill_quantities(apps, schema_editor):
+    FoodItem = apps.get_model('items', 'FoodItem')
+    batch = []
+    for row in FoodItem.objects.exclude(quantity=None).exclude(quantity='').only('id', 'quantity').iterator(chunk_size=2000):
+        row.quantity_amount, row.quantity_unit, row.quantity_kg, row.quantity_servings = parse_quantity(row.quantity)
+        batch.append(row)
+        if len(batch) >= 2000:
+            FoodItem.objects.bulk_update(batch, QUANTITY_FIELDS)
+            batch = []
+    if batch:
+        FoodItem.objects.bulk_update(batch, QUANTITY_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='quantity_amount',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='quantity_kg',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='quantity_servings',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='quantity_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_quantities, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,34 @@
 from django.db import models
 from donations.models import Donation
+from donations.quantities import parse_quantity
 
 class FoodItem(models.Model):
     donation = models.ForeignKey(Donation, related_name='items', on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
     quantity = models.CharField(max_length=100)  # flexible: "2 boxes", "5 kg"
     estimated_expiry_hours = models.IntegerField(null=True, blank=True)
+    # `quantity` parsed on save (donations/quantities.py), null when unknown
+    quantity_amount = models.FloatField(null=True, blank=True, editable=False)
+    quantity_unit = models.CharField(max_length=20, blank=True, default="", editable=False)
+    quantity_kg = models.FloatField(null=True, blank=True, editable=False)
+    quantity_servings = models.FloatField(null=True, blank=True, editable=False)
+
+    QUANTITY_FIELDS = {"quantity_amount", "quantity_unit", "quantity_kg", "quantity_servings"}
 
     def __str__(self):
         return f"{self.name} ({self.quantity})"
 
+    def update_quantity(self):
+        (self.quantity_amount, self.quantity_unit,
+         self.quantity_kg, self.quantity_servings) = parse_quantity(self.quantity)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "quantity" in update_fields:
+            self.update_quantity()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | self.QUANTITY_FIELDS
+        super().save(*args, **kwargs)
+
 
 # Create your models here.
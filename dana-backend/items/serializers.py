@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from .models import FoodItem
+from dana.serializers import DynamicFieldsMixin
+
+class FoodItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # writable so a donation update can say which existing item a row is
+    id = serializers.IntegerField(required=False)
 
-class FoodItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = FoodItem
         fields = ['id','name','quantity','estimated_expiry_hours']
@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import Notification, NotificationPreference
 
-# Register your models here.
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ("user", "radius_km", "email_enabled", "push_enabled")
+    search_fields = ("user__username", "user__email")
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "donation", "channel", "status", "created_at", "sent_at")
+    list_filter = ("channel", "status")
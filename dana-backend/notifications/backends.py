@@ -0,0 +1,103 @@
+import logging
+from collections import deque
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseNotificationBackend:
+    """
+    Sends a batch of notifications. `messages` is a list of dicts with
+    `recipient` (a User), `subject`, `body` and `data`. Returns the
+    `data["notification_id"]`s it could not send, so only those are retried;
+    raising means nothing was sent and the caller retries the whole batch.
+    """
+    def send_messages(self, messages):
+        raise NotImplementedError
+
+
+class EmailBackend(BaseNotificationBackend):
+    """
+    Sends the whole batch over one reused connection of Django's EMAIL_BACKEND.
+    """
+    def send_messages(self, messages):
+        connection = get_connection()
+        emails = [
+            EmailMessage(
+                subject=message["subject"],
+                body=message["body"],
+                to=[message["recipient"].email],
+                connection=connection,
+            )
+            for message in messages
+            if message["recipient"].email
+        ]
+        connection.send_messages(emails)
+        return [message["data"]["notification_id"] for message in messages if not message["recipient"].email]
+
+
+# Stand-in outbox, like django.core.mail.outbox for the locmem email
+# backend; bounded, so a long-running dev server doesn't grow without end
+push_outbox = deque(maxlen=1000)
+
+
+class LocalPushBackend(BaseNotificationBackend):
+    """
+    Records push notifications in `push_outbox` instead of sending them.
+    For development and tests only: `check --deploy` rejects it.
+    """
+    def send_messages(self, messages):
+        failed = []
+        for message in messages:
+            token = message["recipient"].notification_preference.push_token
+            if not token:
+                failed.append(message["data"]["notification_id"])
+                continue
+            push_outbox.append({
+                "token": token,
+                "title": message["subject"],
+                "body": message["body"],
+                "data": message["data"],
+            })
+        logger.info(f"Queued {len(messages) - len(failed)} push notifications locally")
+        return failed
+
+
+class FirebasePushBackend(BaseNotificationBackend):
+    """
+    Sends through Firebase Cloud Messaging in one batched call. send_each
+    reports failures per message instead of raising, so each response is
+    checked against the message it answers.
+    """
+    def send_messages(self, messages):
+        from firebase_admin import messaging
+
+        sendable = [message for message in messages if message["recipient"].notification_preference.push_token]
+        failed = [message["data"]["notification_id"] for message in messages if message not in sendable]
+        if not sendable:
+            return failed
+        response = messaging.send_each([
+            messaging.Message(
+                token=message["recipient"].notification_preference.push_token,
+                notification=messaging.Notification(title=message["subject"], body=message["body"]),
+                data={key: str(value) for key, value in message["data"].items()},
+            )
+            for message in sendable
+        ])
+        for message, result in zip(sendable, response.responses):
+            if not result.success:
+                failed.append(message["data"]["notification_id"])
+                logger.warning(f"Push for notification {message['data']['notification_id']} failed: {result.exception}")
+        return failed
+
+
+_backends = {}
+
+
+def get_backend(channel):
+    if channel not in _backends:
+        _backends[channel] = import_string(settings.NOTIFICATION_BACKENDS[channel])()
+    return _backends[channel]
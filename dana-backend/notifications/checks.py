@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_BACKENDS = {"notifications.backends.LocalPushBackend"}
+
+
+@register(Tags.compatibility, deploy=True)
+def check_notification_backends(app_configs, **kwargs):
+    """
+    `check --deploy`: LocalPushBackend marks pushes sent without sending
+    them, so a deployment must name a real one.
+    """
+    return [
+        Error(
+            f"NOTIFICATION_BACKENDS['{channel}'] is {path}, which never delivers anything.",
+            hint="Set NOTIFICATION_PUSH_BACKEND, e.g. to notifications.backends.FirebasePushBackend.",
+            id="notifications.E001",
+        )
+        for channel, path in settings.NOTIFICATION_BACKENDS.items()
+        if path in LOCAL_BACKENDS
+    ]
@@ -0,0 +1,11 @@
+from .tasks import send_donation_notification
+
+
+def notify_new_donations(events):
+    """
+    Donation outbox consumer: fan out every newly created donation.
+    Re-deliveries are harmless, Notification rows are unique per recipient.
+    """
+    for event in events:
+        if event.event_type == "created":
+            send_donation_notification.delay(event.donation_id)
@@ -1,3 +1,70 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from donations.geo import encode_geohash
+
+
+class NotificationPreference(models.Model):
+    """
+    Where and what an NGO wants to hear about when a donation is posted.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notification_preference",
+        limit_choices_to={"user_type": "ngo"},
+    )
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    geohash = models.CharField(max_length=12, db_index=True, editable=False)
+    radius_km = models.FloatField(default=10)
+    food_types = models.JSONField(default=list, blank=True)  # empty = everything
+    email_enabled = models.BooleanField(default=True)
+    push_enabled = models.BooleanField(default=True)
+    push_token = models.CharField(max_length=255, blank=True, null=True)
+
+    def __str__(self):
+        return f"Notifications for {self.user.username} ({self.radius_km} km)"
+
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        super().save(*args, **kwargs)
+
+    def wants(self, food_type):
+        return not self.food_types or food_type in self.food_types
+
+
+class Notification(models.Model):
+    """
+    One message to one recipient about one donation over one channel.
+    The unique constraint is what dedupes repeated fan-outs.
+    """
+    CHANNEL_CHOICES = (
+        ("email", "Email"),
+        ("push", "Push"),
+    )
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+        ("rate_limited", "Rate limited"),
+    )
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    donation = models.ForeignKey("donations.Donation", on_delete=models.CASCADE, related_name="notifications")
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["recipient", "donation", "channel"], name="notification_once_per_channel"),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient_id} about donation {self.donation_id} ({self.status})"
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import NotificationPreference
+
+
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NotificationPreference
+        fields = ["latitude", "longitude", "radius_km", "food_types", "email_enabled", "push_enabled", "push_token"]
+
+    def validate_food_types(self, value):
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise serializers.ValidationError("Must be a list of food types.")
+        return value
@@ -1,7 +1,177 @@
+import logging
+import time
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from donations.geo import covering_cells, haversine_km, prefix_lookup
+from donations.models import Donation
+from .backends import get_backend
+from .models import Notification, NotificationPreference
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """
+    Some notifications in a batch were not delivered; raised to retry them.
+    """
+
+
+def find_interested_ngos(donation):
+    """
+    Preferences of active NGOs whose radius covers the pickup location and
+    who want this food type. The geohash cells around the location bound
+    the candidates; the exact distance check runs on those only.
+    """
+    location = donation.location
+    if location is None or location.latitude is None or location.longitude is None:
+        return []
+
+    max_radius = settings.NOTIFICATION_MAX_RADIUS_KM
+    cells = Q()
+    for cell in covering_cells(location.latitude, location.longitude, max_radius):
+        cells |= Q(**prefix_lookup("geohash", cell))
+
+    preferences = (
+        NotificationPreference.objects
+        .filter(cells, user__is_active=True, user__user_type="ngo")
+        .select_related("user")
+    )
+    return [
+        preference for preference in preferences
+        if preference.wants(donation.food_type)
+        and haversine_km(location.latitude, location.longitude, preference.latitude, preference.longitude)
+        <= min(preference.radius_km, max_radius)
+    ]
+
+
+def allow_notification(user_id):
+    """
+    Fixed-window per-recipient rate limit shared by all workers.
+    """
+    key = f"notify-rate:{user_id}:{int(time.time() // 3600)}"
+    cache.add(key, 0, timeout=3600)
+    return cache.incr(key) <= settings.NOTIFICATION_RATE_LIMIT_PER_HOUR
+
+
+def build_message(notification):
+    donation = notification.donation
+    address = donation.location.address if donation.location else "see app"
+    return {
+        "recipient": notification.recipient,
+        "subject": f"New donation near you: {donation.title}",
+        "body": (
+            f"{donation.food_type or 'Food'} ({donation.quantity or 'quantity not given'}) "
+            f"is available for pickup at {address} from {donation.pickup_time:%d %b %H:%M}."
+        ),
+        "data": {"donation_id": donation.id, "notification_id": notification.id},
+    }
+
 
 @shared_task
 def send_donation_notification(donation_id):
-    # load donation, find admin or interested organizations and notify
-    pass
+    """
+    Fan a new donation out to nearby, interested NGOs. Records one
+    Notification per recipient and channel (the unique constraint drops
+    duplicates on re-runs) and hands them to delivery tasks in batches.
+    """
+    donation = Donation.objects.select_related("location").filter(pk=donation_id).first()
+    if donation is None or donation.status != "available":
+        return 0
+
+    rows = []
+    for preference in find_interested_ngos(donation):
+        if preference.email_enabled:
+            rows.append(Notification(recipient_id=preference.user_id, donation=donation, channel="email"))
+        if preference.push_enabled and preference.push_token:
+            rows.append(Notification(recipient_id=preference.user_id, donation=donation, channel="push"))
+    Notification.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+
+    ids = list(
+        Notification.objects.filter(donation=donation, status="pending").values_list("id", flat=True)
+    )
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+    for start in range(0, len(ids), batch_size):
+        deliver_notifications.delay(ids[start:start + batch_size])
+    return len(ids)
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
+def deliver_notifications(self, notification_ids):
+    """
+    Send one batch of pending notifications, grouped per channel so each
+    backend gets a single call. A failing backend, or one that reports some
+    messages undelivered, retries the batch with exponential backoff; rows
+    already sent are skipped by the retry and never sent twice. Rows are
+    claimed as "sending" before the backend call, so a worker dying mid-send
+    leaves them there rather than sending them again: at most once.
+    """
+    # Claim the pending rows first, so a duplicate or overlapping task
+    # can't send them too
+    with transaction.atomic():
+        claimed = list(
+            Notification.objects
+            .select_for_update(skip_locked=True)
+            .filter(id__in=notification_ids, status="pending")
+            .values_list("id", flat=True)
+        )
+        Notification.objects.filter(id__in=claimed).update(status="sending")
+    notifications = list(
+        Notification.objects
+        .filter(id__in=claimed)
+        .select_related("recipient__notification_preference", "donation__location")
+    )
+
+    # Count against the rate limit only once, not on every retry
+    if self.request.retries == 0:
+        limited = [n.id for n in notifications if not allow_notification(n.recipient_id)]
+        if limited:
+            Notification.objects.filter(id__in=limited).update(status="rate_limited")
+            notifications = [n for n in notifications if n.id not in set(limited)]
+
+    by_channel = {}
+    for notification in notifications:
+        by_channel.setdefault(notification.channel, []).append(notification)
+
+    sent = 0
+    failed = []
+    for channel, batch in by_channel.items():
+        ids = [n.id for n in batch]
+        try:
+            undelivered = set(get_backend(channel).send_messages([build_message(n) for n in batch]))
+        except Exception:
+            Notification.objects.filter(id__in=ids).update(attempts=F("attempts") + 1)
+            if self.request.retries >= self.max_retries:
+                Notification.objects.filter(id__in=ids).update(status="failed")
+                logger.exception(f"Giving up on {len(ids)} {channel} notifications")
+            # Hand back this channel and any not yet tried to the retry
+            Notification.objects.filter(id__in=claimed, status="sending").update(status="pending")
+            raise
+        delivered = [i for i in ids if i not in undelivered]
+        Notification.objects.filter(id__in=delivered).update(
+            status="sent", sent_at=timezone.now(), attempts=F("attempts") + 1
+        )
+        sent += len(delivered)
+        failed += [i for i in ids if i in undelivered]
+
+    # Undelivered rows go back to pending, so the retry sends only those
+    if failed:
+        if self.request.retries >= self.max_retries:
+            Notification.objects.filter(id__in=failed).update(status="failed", attempts=F("attempts") + 1)
+            logger.error(f"Giving up on {len(failed)} undeliverable notifications")
+        else:
+            Notification.objects.filter(id__in=failed).update(status="pending", attempts=F("attempts") + 1)
+            raise DeliveryError(f"{len(failed)} of {len(notification_ids)} notifications not delivered")
+    return sent
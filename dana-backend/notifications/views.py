@@ -1,3 +1,27 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import NotificationPreference
+from .serializers import NotificationPreferenceSerializer
 
-# Create your views here.
+
+@api_view(["GET", "PUT"])
+@permission_classes([IsAuthenticated])
+def notification_preferences(request):
+    """
+    NGOs: read or set where and what they want to be notified about.
+    """
+    if request.user.user_type != "ngo":
+        return Response({"error": "Only NGOs receive donation notifications"}, status=status.HTTP_403_FORBIDDEN)
+
+    preference = NotificationPreference.objects.filter(user=request.user).first()
+    if request.method == "GET":
+        if preference is None:
+            return Response({"error": "No notification preferences set"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(NotificationPreferenceSerializer(preference).data)
+
+    serializer = NotificationPreferenceSerializer(preference, data=request.data)
+    serializer.is_valid(raise_exception=True)
+    serializer.save(user=request.user)
+    return Response(serializer.data)
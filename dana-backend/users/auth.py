@@ -1,10 +1,50 @@
 # users/auth.py
-from firebase_admin import auth as firebase_auth
 from rest_framework import authentication, exceptions
 from django.contrib.auth import get_user_model
 
+from .token_cache import token_cache
+from .verifiers import get_verifier
+
 User = get_user_model()
 
+
+def verify_id_token(id_token):
+    """
+    Verify a Firebase ID token with the configured FIREBASE_TOKEN_VERIFIER
+    backend and return its claims.
+    """
+    return get_verifier().verify(id_token)
+
+
+def authenticate_id_token(id_token):
+    """
+    The local user for a Firebase ID token, created on first sight.
+    Raises AuthenticationFailed for invalid tokens.
+    """
+    decoded_token = token_cache.get_claims(id_token)
+    if decoded_token is None:
+        try:
+            decoded_token = verify_id_token(id_token)
+        except Exception:
+            raise exceptions.AuthenticationFailed("Invalid Firebase ID token")
+        token_cache.set_claims(id_token, decoded_token)
+
+    uid = decoded_token.get("uid")
+    email = decoded_token.get("email")
+
+    user = token_cache.get_user(uid)
+    if user is not None:
+        return user
+
+    # Get or create local user
+    user, _ = User.objects.get_or_create(
+        email=email,
+        defaults={"username": email.split("@")[0], },
+    )
+    token_cache.set_user(uid, user)
+    return user
+
+
 class FirebaseAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
         auth_header = request.META.get("HTTP_AUTHORIZATION")
@@ -15,19 +55,4 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
         if parts[0].lower() != "bearer" or len(parts) != 2:
             return None
 
-        id_token = parts[1]
-        try:
-            decoded_token = firebase_auth.verify_id_token(id_token)
-        except Exception:
-            raise exceptions.AuthenticationFailed("Invalid Firebase ID token")
-
-        uid = decoded_token.get("uid")
-        email = decoded_token.get("email")
-
-        # Get or create local user
-        user, _ = User.objects.get_or_create(
-            email=email,
-            defaults={"username": email.split("@")[0], },
-        )
-
-        return (user, None)
+        return (authenticate_id_token(parts[1]), None)
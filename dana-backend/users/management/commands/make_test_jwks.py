@@ -0,0 +1,61 @@
+import json
+import time
+import uuid
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.verifiers import ID_TOKEN_ISSUER_PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a stand-in JWKS plus ID tokens signed with it, so the whole auth "
+        "path can run offline. Serve them with FIREBASE_TOKEN_VERIFIER="
+        "users.verifiers.JWKSVerifier and FIREBASE_JWKS_FILE=<out>/jwks.json."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--out", default="test_jwks", help="Output directory")
+        parser.add_argument("--tokens", type=int, default=100, help="Number of ID tokens to mint")
+        parser.add_argument("--lifetime", type=int, default=3600, help="Token lifetime in seconds")
+        parser.add_argument("--project-id", default=None, help="Audience; defaults to FIREBASE_PROJECT_ID")
+
+    def handle(self, *args, **options):
+        out = Path(options["out"])
+        out.mkdir(parents=True, exist_ok=True)
+        project_id = options["project_id"] or settings.FIREBASE_PROJECT_ID or "dana-loadtest"
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        kid = uuid.uuid4().hex
+
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+        jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+        (out / "jwks.json").write_text(json.dumps({"keys": [jwk]}, indent=2))
+
+        (out / "private_key.pem").write_bytes(private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+
+        now = int(time.time())
+        with open(out / "tokens.txt", "w") as f:
+            for i in range(options["tokens"]):
+                claims = {
+                    "iss": ID_TOKEN_ISSUER_PREFIX + project_id,
+                    "aud": project_id,
+                    "sub": f"loadtest-{i}",
+                    "email": f"loadtest{i}@example.com",
+                    "iat": now,
+                    "exp": now + options["lifetime"],
+                }
+                f.write(jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid}) + "\n")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote jwks.json, private_key.pem and {options['tokens']} tokens to {out} (project {project_id})"
+        ))
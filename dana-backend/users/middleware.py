@@ -0,0 +1,38 @@
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework import exceptions
+
+from .auth import authenticate_id_token
+
+# Browsers can't set headers on a WebSocket, so they offer
+# ["bearer", <id token>] as subprotocols; the server accepts "bearer"
+TOKEN_SUBPROTOCOL = "bearer"
+
+
+@database_sync_to_async
+def get_user(id_token):
+    try:
+        return authenticate_id_token(id_token)
+    except exceptions.AuthenticationFailed:
+        return AnonymousUser()
+
+
+class FirebaseTokenAuthMiddleware(BaseMiddleware):
+    """
+    Sets scope["user"] for WebSocket connections from a Firebase ID token in
+    the Authorization header or, for browsers, the Sec-WebSocket-Protocol
+    header. Never from the query string: URLs end up in access logs.
+    """
+    async def __call__(self, scope, receive, send):
+        id_token = None
+        headers = dict(scope.get("headers", []))
+        auth_header = headers.get(b"authorization", b"").decode().split()
+        subprotocols = scope.get("subprotocols") or []
+        if len(auth_header) == 2 and auth_header[0].lower() == "bearer":
+            id_token = auth_header[1]
+        elif len(subprotocols) == 2 and subprotocols[0] == TOKEN_SUBPROTOCOL:
+            id_token = subprotocols[1]
+
+        scope = dict(scope, user=await get_user(id_token) if id_token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import User, NGOVerification
+from dana.serializers import DynamicFieldsMixin
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "phone_number", "address", "firebase_uid",]
@@ -1,3 +1,182 @@
-from django.test import TestCase
+import io
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dana.testing import LOCMEM_CACHES
+from .auth import authenticate_id_token
+from .middleware import TOKEN_SUBPROTOCOL, FirebaseTokenAuthMiddleware
+from .models import User
+from .token_cache import token_cache
+from .verifiers import FORCED_REFRESH_INTERVAL, ID_TOKEN_ISSUER_PREFIX, JWKSVerifier, KeySetVerifier
+
+
+class StaticKeySetVerifier(KeySetVerifier):
+    def fetch_keys(self):
+        return {"known": "secret"}, 3600
+
+
+class KeySetVerifierTests(SimpleTestCase):
+    def setUp(self):
+        self.verifier = StaticKeySetVerifier()
+        # loaded already, so no refresher thread is started
+        self.verifier._keys = {"known": "secret"}
+
+    def unknown_kid_token(self):
+        return jwt.encode({"sub": "user"}, "other", algorithm="HS256", headers={"kid": "made-up"})
+
+    def test_unknown_kid_refreshes_at_most_once_per_interval(self):
+        with mock.patch("users.verifiers.time.monotonic", return_value=1000.0):
+            for _ in range(50):
+                with self.assertRaises(ValueError):
+                    self.verifier.verify(self.unknown_kid_token())
+            self.assertTrue(self.verifier._wakeup.is_set())
+            self.verifier._wakeup.clear()
+
+            with self.assertRaises(ValueError):
+                self.verifier.verify(self.unknown_kid_token())
+            self.assertFalse(self.verifier._wakeup.is_set())
+
+        with mock.patch("users.verifiers.time.monotonic", return_value=1000.0 + FORCED_REFRESH_INTERVAL):
+            with self.assertRaises(ValueError):
+                self.verifier.verify(self.unknown_kid_token())
+            self.assertTrue(self.verifier._wakeup.is_set())
+
+    def test_recent_refresh_suppresses_forced_refresh(self):
+        self.verifier.refresh()
+        self.assertFalse(self.verifier.request_refresh())
+        self.assertFalse(self.verifier._wakeup.is_set())
+
+
+class JWKSVerifierTests(SimpleTestCase):
+    """
+    The real RS256 path, against a key set written by make_test_jwks.
+    """
+    def setUp(self):
+        out = tempfile.TemporaryDirectory()
+        self.addCleanup(out.cleanup)
+        self.out = Path(out.name)
+        call_command("make_test_jwks", out=out.name, tokens=1, project_id="dana-test", stdout=io.StringIO())
+        self.enterContext(override_settings(FIREBASE_JWKS_FILE=str(self.out / "jwks.json"), FIREBASE_PROJECT_ID="dana-test"))
+        self.verifier = JWKSVerifier()
+        # loaded already, so no refresher thread is started
+        self.assertTrue(self.verifier.refresh())
+        self.kid = next(iter(self.verifier._keys))
+
+    def sign(self, key, kid, **claims):
+        now = int(time.time())
+        claims = {
+            "iss": ID_TOKEN_ISSUER_PREFIX + "dana-test", "aud": "dana-test", "sub": "user-1",
+            "iat": now, "exp": now + 600, **claims,
+        }
+        return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+    def test_valid_token(self):
+        token = (self.out / "tokens.txt").read_text().split()[0]
+        claims = self.verifier.verify(token)
+        self.assertEqual((claims["uid"], claims["email"]), ("loadtest-0", "loadtest0@example.com"))
+
+    def test_unknown_kid_is_rejected_after_the_refresh(self):
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        token = self.sign(other_key, "rotated")
+        # past the refresh the setUp load counts as
+        with mock.patch("users.verifiers.time.monotonic", return_value=time.monotonic() + FORCED_REFRESH_INTERVAL):
+            with self.assertRaisesMessage(ValueError, "Unknown signing key id 'rotated'"):
+                self.verifier.verify(token)
+            self.assertTrue(self.verifier._wakeup.is_set())
+
+            # what the woken refresher does: the key set still lacks the kid
+            self.verifier._wakeup.clear()
+            self.verifier.refresh()
+            with self.assertRaises(ValueError):
+                self.verifier.verify(token)
+            # and it is not woken again within the interval
+            self.assertFalse(self.verifier._wakeup.is_set())
+        self.assertEqual(self.verifier.stats.as_dict()["failed"], 2)
+
+    def test_expired_token(self):
+        private_key = serialization.load_pem_private_key((self.out / "private_key.pem").read_bytes(), password=None)
+        now = int(time.time())
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            self.verifier.verify(self.sign(private_key, self.kid, iat=now - 7200, exp=now - 3600))
+
+    def test_wrong_audience(self):
+        private_key = serialization.load_pem_private_key((self.out / "private_key.pem").read_bytes(), password=None)
+        with self.assertRaises(jwt.InvalidAudienceError):
+            self.verifier.verify(self.sign(private_key, self.kid, aud="another-project"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.local.clear()
+        self.addCleanup(token_cache.local.clear)
+        self.claims = {"uid": "firebase-uid", "email": "ngo@example.com", "exp": time.time() + 600}
+        verify = mock.patch("users.auth.verify_id_token", side_effect=lambda token: dict(self.claims))
+        self.verify = self.enterContext(verify)
+
+    def test_repeat_token_needs_no_verification_or_query(self):
+        user = authenticate_id_token("token")
+        self.assertEqual(user.email, "ngo@example.com")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(authenticate_id_token("token").pk, user.pk)
+        # another worker: only the shared cache has it
+        token_cache.local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(authenticate_id_token("token").pk, user.pk)
+        self.assertEqual(self.verify.call_count, 1)
+
+    def test_miss_verifies(self):
+        authenticate_id_token("token")
+        authenticate_id_token("another token")
+        self.assertEqual(self.verify.call_count, 2)
+        self.assertEqual(User.objects.filter(email="ngo@example.com").count(), 1)
+
+    def test_expired_claims_are_not_cached(self):
+        self.claims["exp"] = time.time() - 1
+        token_cache.set_claims("token", self.claims)
+        self.assertIsNone(token_cache.get_claims("token"))
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        user = authenticate_id_token("token")
+        user.first_name = "Renamed"
+        user.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate_id_token("token").first_name, "Renamed")
+        self.assertEqual(self.verify.call_count, 1)
+
+
+class WebSocketAuthMiddlewareTests(SimpleTestCase):
+    async def scope_user(self, scope):
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen["user"] = scope["user"]
+
+        with mock.patch("users.middleware.authenticate_id_token", side_effect=lambda token: f"user for {token}"):
+            await FirebaseTokenAuthMiddleware(app)({"type": "websocket", **scope}, None, None)
+        return seen["user"]
+
+    async def test_token_from_the_authorization_header(self):
+        user = await self.scope_user({"headers": [(b"authorization", b"Bearer header-token")]})
+        self.assertEqual(user, "user for header-token")
+
+    async def test_token_from_the_subprotocol(self):
+        user = await self.scope_user({"headers": [], "subprotocols": [TOKEN_SUBPROTOCOL, "protocol-token"]})
+        self.assertEqual(user, "user for protocol-token")
+
+    async def test_query_string_token_is_ignored(self):
+        user = await self.scope_user({"headers": [], "query_string": b"token=query-token"})
+        self.assertIsInstance(user, AnonymousUser)
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KEY_PREFIX = "firebase_token:"
+UID_KEY_PREFIX = "firebase_uid:"
+USER_KEY_PREFIX = "auth_user:"
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU. Entries carry their own expiry time
+    so verified tokens never outlive their `exp` claim.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TokenCache:
+    """
+    Two-level cache for verified Firebase ID tokens: a per-process LRU in
+    front of the shared Django cache (Redis). Also keeps the uid -> user id
+    map and the user objects themselves so a repeat request needs no DB query.
+
+    User objects are only kept in the shared cache, because they can change
+    and the save/delete signals can only invalidate what every worker sees.
+    """
+    def __init__(self):
+        self.local = LRUCache(getattr(settings, "FIREBASE_TOKEN_CACHE_SIZE", 1024))
+        self.stats = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "user_hits": 0,
+            "user_misses": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, "FIREBASE_TOKEN_CACHE_ALIAS", "default")]
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _shared_get(self, key):
+        # A Redis outage must not take authentication down with it
+        try:
+            return self.shared.get(key)
+        except Exception:
+            logger.warning("Token cache read failed for %s", key, exc_info=True)
+            return None
+
+    def _shared_set(self, key, value, timeout):
+        try:
+            self.shared.set(key, value, timeout)
+        except Exception:
+            logger.warning("Token cache write failed for %s", key, exc_info=True)
+
+    def _shared_delete(self, key):
+        try:
+            self.shared.delete(key)
+        except Exception:
+            logger.warning("Token cache delete failed for %s", key, exc_info=True)
+
+    @staticmethod
+    def token_key(id_token):
+        return TOKEN_KEY_PREFIX + hashlib.sha256(id_token.encode()).hexdigest()
+
+    def get_claims(self, id_token):
+        key = self.token_key(id_token)
+        claims = self.local.get(key)
+        if claims is not None:
+            self._count("local_hits")
+            return claims
+
+        claims = self._shared_get(key)
+        if claims is not None and claims.get("exp", 0) > time.time():
+            self._count("shared_hits")
+            self.local.set(key, claims, claims["exp"])
+            return claims
+
+        self._count("misses")
+        return None
+
+    def set_claims(self, id_token, claims):
+        expires_at = claims.get("exp")
+        if not expires_at:
+            return
+        timeout = int(expires_at - time.time())
+        if timeout <= 0:
+            return
+        key = self.token_key(id_token)
+        self.local.set(key, claims, expires_at)
+        self._shared_set(key, claims, timeout)
+
+    def get_user(self, uid):
+        user_id = self.local.get(UID_KEY_PREFIX + uid)
+        if user_id is None:
+            user_id = self._shared_get(UID_KEY_PREFIX + uid)
+            if user_id is not None:
+                self.local.set(UID_KEY_PREFIX + uid, user_id)
+
+        user = None
+        if user_id is not None:
+            user = self._shared_get(f"{USER_KEY_PREFIX}{user_id}")
+
+        self._count("user_hits" if user is not None else "user_misses")
+        return user
+
+    def set_user(self, uid, user):
+        # uid -> user id never changes, so it can live without a timeout
+        self.local.set(UID_KEY_PREFIX + uid, user.pk)
+        self._shared_set(UID_KEY_PREFIX + uid, user.pk, None)
+        self._shared_set(
+            f"{USER_KEY_PREFIX}{user.pk}",
+            user,
+            getattr(settings, "FIREBASE_USER_CACHE_TIMEOUT", 300),
+        )
+
+    def invalidate_user(self, user_id):
+        self._shared_delete(f"{USER_KEY_PREFIX}{user_id}")
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else None
+        stats["local_size"] = len(self.local)
+        return stats
+
+
+token_cache = TokenCache()
@@ -0,0 +1,254 @@
+import json
+import logging
+import re
+import threading
+import time
+
+import firebase_admin
+import jwt
+import requests
+from cryptography.x509 import load_pem_x509_certificate
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+ID_TOKEN_CERT_URI = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ID_TOKEN_JWKS_URI = "https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com"
+ID_TOKEN_ISSUER_PREFIX = "https://securetoken.google.com/"
+DEFAULT_KEY_MAX_AGE = 3600
+REFRESH_MARGIN = 300          # refresh this many seconds before keys expire
+RETRY_INTERVAL = 30           # back-off after a failed refresh
+FORCED_REFRESH_INTERVAL = 60  # at most one unknown-kid refresh per this many seconds
+
+
+class VerifierStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.verified = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh = None
+
+    def record(self, ok, seconds):
+        with self._lock:
+            if ok:
+                self.verified += 1
+            else:
+                self.failed += 1
+            self.total_seconds += seconds
+
+    def record_refresh(self, ok):
+        with self._lock:
+            if ok:
+                self.refreshes += 1
+                self.last_refresh = time.time()
+            else:
+                self.refresh_failures += 1
+
+    def as_dict(self):
+        with self._lock:
+            count = self.verified + self.failed
+            return {
+                "verified": self.verified,
+                "failed": self.failed,
+                "avg_ms": round(self.total_seconds * 1000 / count, 3) if count else None,
+                "key_refreshes": self.refreshes,
+                "key_refresh_failures": self.refresh_failures,
+                "last_key_refresh": self.last_refresh,
+            }
+
+
+class BaseTokenVerifier:
+    """
+    Verifies a Firebase ID token and returns its claims with `uid` set.
+    Backends are selected with the FIREBASE_TOKEN_VERIFIER setting.
+    """
+    def __init__(self):
+        self.stats = VerifierStats()
+
+    @property
+    def project_id(self):
+        return getattr(settings, "FIREBASE_PROJECT_ID", None) or firebase_admin.get_app().project_id
+
+    def verify(self, id_token):
+        started = time.perf_counter()
+        try:
+            claims = self._verify(id_token)
+        except Exception:
+            self.stats.record(False, time.perf_counter() - started)
+            raise
+        self.stats.record(True, time.perf_counter() - started)
+        return claims
+
+    def _verify(self, id_token):
+        raise NotImplementedError
+
+
+class FirebaseSDKVerifier(BaseTokenVerifier):
+    """
+    Delegates to firebase_admin, which may block on a cert fetch.
+    """
+    def _verify(self, id_token):
+        from firebase_admin import auth as firebase_auth
+        return firebase_auth.verify_id_token(id_token)
+
+
+class KeySetVerifier(BaseTokenVerifier):
+    """
+    Checks RS256 signatures against a locally held set of parsed public keys.
+
+    The key set is loaded once, then refreshed by a background thread ahead
+    of its expiry, so request threads never wait on the network once warm.
+    A token signed with an unknown `kid` is rejected and wakes the refresher,
+    at most once per FORCED_REFRESH_INTERVAL so made-up kids can't turn
+    into a key fetch per request.
+    """
+    def __init__(self):
+        super().__init__()
+        self._keys = {}
+        self._expires_at = 0
+        self._load_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = float("-inf")
+
+    def fetch_keys(self):
+        """
+        Return ({kid: public_key}, max_age_seconds).
+        """
+        raise NotImplementedError
+
+    def refresh(self):
+        with self._refresh_lock:
+            self._last_refresh = time.monotonic()
+        try:
+            keys, max_age = self.fetch_keys()
+        except Exception:
+            self.stats.record_refresh(False)
+            logger.warning("Refreshing token signing keys failed", exc_info=True)
+            return False
+        self._keys = keys
+        self._expires_at = time.time() + max_age
+        self.stats.record_refresh(True)
+        return True
+
+    def _ensure_loaded(self):
+        if self._keys:
+            return
+        # Only the very first request of a process waits for the keys
+        with self._load_lock:
+            if not self._keys and not self.refresh():
+                raise ValueError("Token signing keys are unavailable")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh_loop, name="token-key-refresh", daemon=True
+                )
+                self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            delay = max(self._expires_at - time.time() - REFRESH_MARGIN, 0)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if not self.refresh():
+                time.sleep(RETRY_INTERVAL)
+
+    def request_refresh(self):
+        """
+        Wake the refresher unless the keys were fetched, or a fetch was
+        asked for, within the last FORCED_REFRESH_INTERVAL seconds.
+        Returns whether it was woken.
+        """
+        with self._refresh_lock:
+            now = time.monotonic()
+            if now - self._last_refresh < FORCED_REFRESH_INTERVAL:
+                return False
+            self._last_refresh = now
+        self._wakeup.set()
+        return True
+
+    def _verify(self, id_token):
+        self._ensure_loaded()
+
+        kid = jwt.get_unverified_header(id_token).get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            self.request_refresh()
+            raise ValueError(f"Unknown signing key id {kid!r}")
+
+        project_id = self.project_id
+        claims = jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=project_id,
+            issuer=ID_TOKEN_ISSUER_PREFIX + project_id,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+        if not claims["sub"]:
+            raise ValueError("ID token has no subject")
+
+        claims["uid"] = claims["sub"]
+        return claims
+
+    @staticmethod
+    def _max_age(response):
+        match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        return int(match.group(1)) if match else DEFAULT_KEY_MAX_AGE
+
+
+class FirebaseCertVerifier(KeySetVerifier):
+    """
+    Uses the x509 certificates Google publishes for Firebase ID tokens.
+    """
+    def fetch_keys(self):
+        response = requests.get(ID_TOKEN_CERT_URI, timeout=10)
+        response.raise_for_status()
+        keys = {
+            kid: load_pem_x509_certificate(pem.encode()).public_key()
+            for kid, pem in response.json().items()
+        }
+        return keys, self._max_age(response)
+
+
+class JWKSVerifier(KeySetVerifier):
+    """
+    Uses a JWKS document, read from FIREBASE_JWKS_FILE when set (offline and
+    load testing, see `manage.py make_test_jwks`) or else FIREBASE_JWKS_URL.
+    """
+    def fetch_keys(self):
+        path = getattr(settings, "FIREBASE_JWKS_FILE", None)
+        if path:
+            with open(path) as f:
+                jwks = json.load(f)
+            max_age = DEFAULT_KEY_MAX_AGE
+        else:
+            url = getattr(settings, "FIREBASE_JWKS_URL", None) or ID_TOKEN_JWKS_URI
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            jwks = response.json()
+            max_age = self._max_age(response)
+
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("kty") == "RSA" and jwk.get("kid"):
+                keys[jwk["kid"]] = jwt.PyJWK(jwk, algorithm="RS256").key
+        return keys, max_age
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                path = getattr(settings, "FIREBASE_TOKEN_VERIFIER", "users.verifiers.FirebaseCertVerifier")
+                _verifier = import_string(path)()
+    return _verifier
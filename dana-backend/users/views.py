@@ -6,8 +6,10 @@ from .models import User, NGOVerification
 from .serializers import UserSerializer, NGOVerificationSerializer
 from .permissions import IsAdminOrReadOnly
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from .token_cache import token_cache
+from .verifiers import get_verifier
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -67,3 +69,14 @@ def sync_user(request):
         "user_type": user.user_type,
     }
 })
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def auth_cache_stats(request):
+    """
+    Admin-only: token cache hit/miss counters and verifier metrics for this worker.
+    """
+    stats = token_cache.get_stats()
+    stats["verifier"] = get_verifier().stats.as_dict()
+    return Response(stats)
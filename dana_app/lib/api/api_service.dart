@@ -98,12 +98,33 @@ class ApiService {
   );
 
   if (response.statusCode == 200) {
-    return json.decode(response.body);
+    // Paginated: {"count", "next", "previous", "results"}
+    return json.decode(response.body)["results"];
   } else {
     throw Exception("Failed to fetch donations: ${response.body}");
   }
 }
 
+  /// Delta sync: donations changed and ids deleted since [since].
+  /// Returns {"changed", "deleted", "cursor", "has_more"}; keep the cursor
+  /// for the next call. A 410 means the cursor expired, sync without one.
+  static Future<Map<String, dynamic>> fetchDonationChanges(String token, {String? since}) async {
+  final query = since == null ? "" : "?since=${Uri.encodeQueryComponent(since)}";
+  final url = Uri.parse("${ApiConfig.baseUrl}/api/donations/changes/$query");
+  final response = await http.get(
+    url,
+    headers: {
+      "Authorization": "Bearer $token",
+    },
+  );
+
+  if (response.statusCode == 200) {
+    return json.decode(response.body);
+  } else {
+    throw Exception("Failed to sync donations: ${response.body}");
+  }
+}
+
   /// ✅ Upload NGO / Donor Verification Document
   static Future<Map<String, dynamic>> uploadNGODoc(
       String token, File file) async {